@@ -0,0 +1,115 @@
+"""
+Recall/latency/memory benchmark for the vector store index types.
+
+Reports recall@k against the exact flat index, p50/p99 single-query search latency and the
+index size for each index type and search setting, so a trade-off can be picked per
+deployment.
+
+Usage:
+    # Synthetic clustered embeddings
+    python -m benchmarks.ann_index --rows 200000
+    # Real embeddings from the index cache
+    python -m benchmarks.ann_index --embeddings src/data/cache/<key>/embeddings.npy
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.analytics.faiss_indexes import IndexConfig, build_index, index_memory_bytes, set_search_params
+
+
+def synthetic_embeddings(n_rows: int, dimension: int = 384, n_clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Clustered, L2-normalized vectors that roughly resemble sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dimension)).astype("float32")
+    labels = rng.integers(0, n_clusters, n_rows)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n_rows, dimension)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+
+def _latencies_ms(index, queries: np.ndarray, k: int) -> np.ndarray:
+    # One query at a time, like the /ask path
+    timings = np.empty(len(queries))
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        index.search(queries[i:i + 1], k)
+        timings[i] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run(embeddings: np.ndarray, queries: np.ndarray, k: int, nprobes: List[int], ef_searches: List[int]) -> List[Dict[str, Any]]:
+    results = []
+    flat = build_index(embeddings, IndexConfig(index_type="flat"))
+    _, truth = flat.search(queries, k)
+
+    def record(name, index, build_s, params):
+        _, found = index.search(queries, k)
+        latencies = _latencies_ms(index, queries, k)
+        results.append({
+            "index": name,
+            "params": params,
+            "build_seconds": round(build_s, 2),
+            "memory_mb": round(index_memory_bytes(index) / 1e6, 1),
+            f"recall@{k}": round(_recall(found, truth), 4),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        })
+
+    record("flat", flat, 0.0, {})
+    for index_type in ("ivf_flat", "ivf_pq", "hnsw"):
+        start = time.perf_counter()
+        index = build_index(embeddings, IndexConfig(index_type=index_type))
+        build_s = time.perf_counter() - start
+        if index_type == "hnsw":
+            for ef in ef_searches:
+                set_search_params(index, ef_search=ef)
+                record(index_type, index, build_s, {"ef_search": ef})
+        else:
+            for nprobe in nprobes:
+                set_search_params(index, nprobe=nprobe)
+                record(index_type, index, build_s, {"nprobe": nprobe})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against the flat index.")
+    parser.add_argument("--embeddings", help="Path to an embeddings .npy file (defaults to synthetic data)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic rows when --embeddings is not given")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    embeddings = np.load(args.embeddings).astype("float32") if args.embeddings else synthetic_embeddings(args.rows)
+    rng = np.random.default_rng(1)
+    # Queries are perturbed copies of indexed vectors, so they have real near neighbours
+    picks = rng.choice(len(embeddings), size=min(args.queries, len(embeddings)), replace=False)
+    queries = embeddings[picks] + 0.05 * rng.standard_normal((len(picks), embeddings.shape[1])).astype("float32")
+
+    results = run(embeddings, queries, args.k, args.nprobe, args.ef_search)
+    print(f"{len(embeddings)} vectors, dimension {embeddings.shape[1]}, {len(queries)} queries")
+    print(f"{'index':<10} {'params':<18} {'build_s':>8} {'mem_mb':>8} {'recall':>7} {'p50_ms':>8} {'p99_ms':>8}")
+    for row in results:
+        params = ",".join(f"{key}={value}" for key, value in row["params"].items())
+        print(f"{row['index']:<10} {params:<18} {row['build_seconds']:>8} {row['memory_mb']:>8} "
+              f"{row[f'recall@{args.k}']:>7} {row['p50_ms']:>8} {row['p99_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"vectors": len(embeddings), "k": args.k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
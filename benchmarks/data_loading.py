@@ -0,0 +1,92 @@
+"""
+Load time and memory benchmark for the processed bookings formats.
+
+Compares the original pd.read_csv load against the Parquet loader (all columns and the
+projected analytics columns) and the CSV fallback. Each load runs in a fresh process so the
+resident memory growth is measured in isolation.
+
+Usage:
+    python -m benchmarks.data_loading --rows 1000000
+    # Existing processed files instead of synthetic data
+    python -m benchmarks.data_loading --csv src/data/processed/hotel_bookings_processed.csv \
+        --parquet src/data/processed/hotel_bookings_processed.parquet
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+import pandas as pd
+import psutil
+
+from src.data.storage import ANALYTICS_COLUMNS, read_bookings, write_bookings
+
+
+def _load(mode: str, path: str, results) -> None:
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    if mode == "csv (read_csv)":
+        df = pd.read_csv(path)
+    elif mode.endswith("projected"):
+        df = read_bookings(path, columns=ANALYTICS_COLUMNS)
+    else:
+        df = read_bookings(path)
+    seconds = time.perf_counter() - start
+    results.put({
+        "format": mode,
+        "columns": df.shape[1],
+        "load_seconds": round(seconds, 3),
+        "rss_growth_mb": round((process.memory_info().rss - rss_before) / 1e6, 1),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 1e6, 1)
+    })
+
+
+def measure(mode: str, path: str) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_load, args=(mode, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading processed bookings from CSV and Parquet.")
+    parser.add_argument("--rows", type=int, default=500_000, help="Synthetic rows when no files are given")
+    parser.add_argument("--csv", help="Existing processed CSV file")
+    parser.add_argument("--parquet", help="Existing processed Parquet file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path, parquet_path = args.csv, args.parquet
+        if not (csv_path and parquet_path):
+            from benchmarks.synthetic import make_bookings
+            df = make_bookings(args.rows)
+            csv_path = csv_path or os.path.join(tmp_dir, "bookings.csv")
+            parquet_path = parquet_path or os.path.join(tmp_dir, "bookings.parquet")
+            if not os.path.exists(csv_path):
+                df.to_csv(csv_path, index=False)
+            if not os.path.exists(parquet_path):
+                write_bookings(df, parquet_path)
+
+        print(f"CSV {os.path.getsize(csv_path) / 1e6:.1f} MB, Parquet {os.path.getsize(parquet_path) / 1e6:.1f} MB")
+        print(f"{'format':<24} {'columns':>7} {'load_s':>8} {'rss_mb':>8} {'frame_mb':>9}")
+        runs = [
+            ("csv (read_csv)", csv_path),
+            ("csv fallback projected", csv_path),
+            ("parquet", parquet_path),
+            ("parquet projected", parquet_path),
+        ]
+        for mode, path in runs:
+            row = measure(mode, path)
+            print(f"{row['format']:<24} {row['columns']:>7} {row['load_seconds']:>8} "
+                  f"{row['rss_growth_mb']:>8} {row['frame_mb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
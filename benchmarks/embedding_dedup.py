@@ -0,0 +1,111 @@
+"""
+Encode time, index size and search cost of indexing unique summaries instead of every row.
+
+Many bookings render to exactly the same summary text. The vector store embeds and indexes
+each distinct text once and maps it back to its rows; this benchmark compares that with
+embedding every row:
+
+- encode: the unique texts are encoded in full; per-row encoding is timed on a sample of
+  rows and extrapolated, since encoding every row of the real data takes minutes
+- index: serialized size of the index over all rows (each row gets its text's vector) and
+  over the unique texts
+- search: p50/p99 single-query latency of both indexes
+
+Usage:
+    # The processed bookings file from src/config.py
+    python -m benchmarks.embedding_dedup
+    # Synthetic bookings
+    python -m benchmarks.embedding_dedup --synthetic --rows 119390
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.ann_index import _latencies_ms
+from benchmarks.synthetic import make_bookings
+from src import config
+from src.analytics.faiss_indexes import IndexConfig, build_index, index_memory_bytes
+from src.analytics.model_registry import get_embedding_model
+from src.analytics.summaries import build_summary_column
+from src.data.storage import ANALYTICS_COLUMNS, read_bookings
+
+
+def _load(args) -> pd.DataFrame:
+    if args.synthetic or not os.path.exists(config.PROCESSED_DATA_PATH):
+        return make_bookings(args.rows, seed=0)
+    return read_bookings(config.PROCESSED_DATA_PATH, columns=ANALYTICS_COLUMNS)
+
+
+def _search_stats(index, queries: np.ndarray, k: int) -> Dict[str, float]:
+    latencies = _latencies_ms(index, queries, k)
+    return {"p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding and indexing unique summaries only.")
+    parser.add_argument("--synthetic", action="store_true", help="Use synthetic bookings instead of the data file")
+    parser.add_argument("--rows", type=int, default=119_390, help="Number of synthetic bookings")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--sample", type=int, default=5000, help="Rows encoded to time per-row encoding")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    df = _load(args)
+    summaries = build_summary_column(df)
+    text_ids, unique_texts = pd.factorize(summaries, sort=False)
+    unique_texts = list(unique_texts)
+    n_rows, n_unique = len(text_ids), len(unique_texts)
+
+    model = get_embedding_model(args.model)
+    start = time.perf_counter()
+    unique_embeddings = np.asarray(model.encode(unique_texts), dtype="float32")
+    unique_encode_s = time.perf_counter() - start
+
+    sample = summaries.sample(min(args.sample, n_rows), random_state=0).tolist()
+    start = time.perf_counter()
+    model.encode(sample)
+    per_text_s = (time.perf_counter() - start) / len(sample)
+
+    index_config = IndexConfig(index_type=args.index_type)
+    row_embeddings = unique_embeddings[text_ids]
+    row_index = build_index(row_embeddings, index_config)
+    unique_index = build_index(unique_embeddings, index_config)
+    queries = np.asarray(model.encode(sample[:args.queries]), dtype="float32")
+
+    results: Dict[str, Any] = {
+        "rows": n_rows,
+        "unique_texts": n_unique,
+        "duplicate_fraction": round(1 - n_unique / n_rows, 4),
+        "encode_seconds": {"per_row_estimated": round(per_text_s * n_rows, 2),
+                           "unique_measured": round(unique_encode_s, 2)},
+        "index_mb": {"per_row": round(index_memory_bytes(row_index) / 1e6, 2),
+                     "unique": round(index_memory_bytes(unique_index) / 1e6, 2)},
+        "search": {"per_row": _search_stats(row_index, queries, args.k),
+                   "unique": _search_stats(unique_index, queries, args.k)},
+    }
+
+    print(f"{n_rows} rows, {n_unique} unique summaries ({results['duplicate_fraction']:.1%} duplicates), "
+          f"{args.model}, {args.index_type} index")
+    print(f"{'':<10} {'encode_s':>9} {'index_mb':>9} {'p50_ms':>8} {'p99_ms':>8}")
+    for name, encode_key in (("per_row", "per_row_estimated"), ("unique", "unique_measured")):
+        search = results["search"][name]
+        print(f"{name:<10} {results['encode_seconds'][encode_key]:>9} {results['index_mb'][name]:>9} "
+              f"{search['p50_ms']:>8} {search['p99_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Throughput benchmark for the bulk embedding engine.
+
+Encodes the same booking summaries with every backend and worker process count and reports
+rows/sec, plus how far the embeddings are from the reference path (the torch backend in one
+process, i.e. a plain SentenceTransformer.encode): the largest absolute difference and the
+lowest cosine similarity over all rows.
+
+Usage:
+    python -m benchmarks.embedding_engine --rows 20000 --processes 1 2 4
+    python -m benchmarks.embedding_engine --backends torch onnx --processes 1 4 --json embed.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_bookings
+from src import config
+from src.analytics.embedding_engine import BACKENDS, EmbeddingConfig, EmbeddingEngine
+from src.analytics.summaries import build_summary_column
+
+
+def _min_cosine(a: np.ndarray, b: np.ndarray) -> float:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return float(np.min(np.sum(a * b, axis=1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk embedding backends and process counts.")
+    parser.add_argument("--rows", type=int, default=20_000, help="Number of distinct summaries to encode")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["torch"])
+    parser.add_argument("--processes", nargs="+", type=int, default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--batch-size", type=int, default=config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--onnx-file", default=config.EMBEDDING_ONNX_FILE)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    texts = list(pd.unique(build_summary_column(make_bookings(args.rows, seed=0))))
+    quiet = lambda done, total: None
+
+    reference_engine = EmbeddingEngine(args.model, EmbeddingConfig(processes=1, batch_size=args.batch_size),
+                                       progress=quiet)
+    reference = reference_engine.encode(texts)
+
+    results = []
+    for backend in args.backends:
+        for processes in sorted(set(args.processes)):
+            embedding_config = EmbeddingConfig(backend=backend, processes=processes, batch_size=args.batch_size,
+                                               onnx_file=args.onnx_file)
+            engine = EmbeddingEngine(args.model, embedding_config, progress=quiet)
+            start = time.perf_counter()
+            embeddings = engine.encode(texts)
+            seconds = time.perf_counter() - start
+            results.append({
+                "backend": backend,
+                "processes": processes,
+                "rows_per_second": round(len(texts) / seconds, 1),
+                "seconds": round(seconds, 2),
+                "max_abs_diff": float(np.max(np.abs(embeddings - reference))),
+                "min_cosine": round(_min_cosine(embeddings, reference), 6),
+            })
+
+    print(f"{args.model}, {len(texts)} summaries, batch size {args.batch_size}, {os.cpu_count()} cores")
+    print(f"{'backend':<8} {'procs':>5} {'rows/s':>9} {'seconds':>8} {'max_abs_diff':>13} {'min_cosine':>11}")
+    for row in results:
+        print(f"{row['backend']:<8} {row['processes']:>5} {row['rows_per_second']:>9} {row['seconds']:>8} "
+              f"{row['max_abs_diff']:>13.2e} {row['min_cosine']:>11}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "rows": len(texts), "cores": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
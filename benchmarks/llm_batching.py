@@ -0,0 +1,121 @@
+"""
+Throughput benchmark for continuous batching of LLM generation.
+
+Runs the same questions through GenerationScheduler with batching disabled (one sequence
+at a time) and enabled, at several levels of concurrency, and reports aggregate tokens/sec
+and per-request latency. Every answer is generated to the same length (EOS is ignored and
+decoding is greedy), so the runs do the same amount of work.
+
+Usage:
+    python -m benchmarks.llm_batching --concurrency 1 4 8 16
+    # A small model for a quick run
+    python -m benchmarks.llm_batching --model sshleifer/tiny-gpt2 --max-new-tokens 32
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from src import config
+from src.analytics.llm import GenerationScheduler
+
+QUESTIONS = [
+    "Show me total revenue for July 2017.",
+    "Which locations had the highest booking cancellations?",
+    "What is the average price of a hotel booking?",
+    "How many bookings were made from Portugal in 2016?",
+    "What is the average lead time for resort hotel bookings?",
+    "Which month has the most bookings?",
+    "How does the cancellation rate of city hotels compare to resort hotels?",
+    "What is the average length of stay for bookings from Germany?",
+]
+
+CONTEXT = (
+    "- Booking from PRT in July 2017 with daily rate 112.5 for 3 nights, canceled\n"
+    "- Booking from GBR in August 2016 with daily rate 98.0 for 7 nights, not canceled\n"
+    "- Booking from DEU in March 2017 with daily rate 85.3 for 2 nights, not canceled"
+)
+
+
+def make_prompts(n: int) -> List[str]:
+    """Prompts shaped like the ones LLMReasoner builds, with questions of varying length."""
+    return [
+        "You are a hotel analytics assistant that provides accurate information about hotel bookings and data.\n"
+        f"Question: {QUESTIONS[i % len(QUESTIONS)]}\n\nContext:\n{CONTEXT}\n\n"
+        "Based on the above information, the answer is:"
+        for i in range(n)
+    ]
+
+
+def run(model, tokenizer, prompts: List[str], concurrency: int, max_batch_size: int,
+        max_new_tokens: int) -> Dict[str, Any]:
+    scheduler = GenerationScheduler(model, tokenizer, max_batch_size=max_batch_size,
+                                    max_new_tokens=max_new_tokens, do_sample=False, stop_at_eos=False)
+    latencies = []
+
+    def ask(prompt):
+        start = time.perf_counter()
+        scheduler.submit(prompt)
+        latencies.append(time.perf_counter() - start)
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(ask, prompts))
+        elapsed = time.perf_counter() - start
+        stats = scheduler.stats()
+    finally:
+        scheduler.close()
+    return {
+        "concurrency": concurrency,
+        "max_batch_size": max_batch_size,
+        "requests": len(prompts),
+        "seconds": round(elapsed, 2),
+        "tokens_per_second": round(stats["tokens"] / elapsed, 2),
+        "avg_batch_size": stats["avg_batch_size"],
+        "p50_latency_s": round(float(np.percentile(latencies, 50)), 3),
+        "p95_latency_s": round(float(np.percentile(latencies, 95)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched against one-at-a-time LLM generation.")
+    parser.add_argument("--model", default=config.LLM_MODEL_NAME)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--rounds", type=int, default=2, help="Questions per concurrent client")
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+    model.eval()
+
+    results = []
+    for concurrency in args.concurrency:
+        prompts = make_prompts(concurrency * args.rounds)
+        for max_batch_size in (1, concurrency):
+            results.append(run(model, tokenizer, prompts, concurrency, max_batch_size, args.max_new_tokens))
+            if concurrency == 1:
+                break
+
+    print(f"{args.model}, {args.max_new_tokens} new tokens per answer")
+    print(f"{'clients':>7} {'batch':>5} {'requests':>8} {'seconds':>8} {'tok/s':>8} {'avg_bs':>6} {'p50_s':>7} {'p95_s':>7}")
+    for row in results:
+        print(f"{row['concurrency']:>7} {row['max_batch_size']:>5} {row['requests']:>8} {row['seconds']:>8} "
+              f"{row['tokens_per_second']:>8} {row['avg_batch_size']:>6} {row['p50_latency_s']:>7} {row['p95_latency_s']:>7}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "max_new_tokens": args.max_new_tokens, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Prompt size and prefill latency benchmark for the LLM prompt builder.
+
+Builds the prompt for a set of questions three ways and times the forward pass over the
+prompt (the prefill, which dominates time to first token):
+
+- original: every metadata value verbatim, including the full booking rows
+- budgeted: PromptBuilder output within the token budget, prefix included in the prefill
+- budgeted + prefix cache: only the question-specific part is prefilled, on top of a copy
+  of the cached instruction prefix
+
+Usage:
+    python -m benchmarks.llm_prefill
+    python -m benchmarks.llm_prefill --model sshleifer/tiny-gpt2 --budget 256
+"""
+
+import argparse
+import copy
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from benchmarks.llm_batching import QUESTIONS
+from benchmarks.synthetic import make_bookings
+from src import config
+from src.analytics.prompting import PROMPT_PREFIX, PROMPT_SUFFIX, PromptBuilder
+from src.analytics.summaries import build_summary_column
+
+
+def original_prompt(question: str, context: List[str], metadata: Dict[str, Any]) -> str:
+    """The prompt as it was built before the token budget: everything, verbatim."""
+    metadata_text = "Additional data:\n" + "".join(f"- {key}: {value}\n" for key, value in metadata.items())
+    context_text = "\n".join(f"- {c}" for c in context)
+    return f"{PROMPT_PREFIX}Question: {question}\n\nContext:\n{context_text}\n\n{metadata_text}\n\n{PROMPT_SUFFIX}"
+
+
+def _prefill_ms(model, input_ids: torch.Tensor, past_key_values=None, repeats: int = 3) -> float:
+    timings = []
+    for _ in range(repeats):
+        cache = copy.deepcopy(past_key_values)
+        start = time.perf_counter()
+        with torch.inference_mode():
+            model(input_ids=input_ids, past_key_values=cache, use_cache=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt size and prefill latency of the prompt builder.")
+    parser.add_argument("--model", default=config.LLM_MODEL_NAME)
+    parser.add_argument("--budget", type=int, default=config.LLM_PROMPT_TOKEN_BUDGET)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+    model.eval()
+    builder = PromptBuilder(tokenizer, max_context_tokens=args.budget)
+
+    bookings = make_bookings(5 * len(QUESTIONS), seed=1)
+    bookings["summary"] = build_summary_column(bookings)
+    prefix_ids = tokenizer(PROMPT_PREFIX, return_tensors="pt")["input_ids"]
+    with torch.no_grad():
+        prefix_cache = model(input_ids=prefix_ids, use_cache=True).past_key_values
+
+    rows = {"original": [], "budgeted": [], "budgeted + prefix cache": []}
+    for i, question in enumerate(QUESTIONS):
+        retrieved = bookings.iloc[5 * i:5 * i + 5]
+        context = retrieved["summary"].tolist()
+        metadata = {"total_revenue": 1234567.89, "total_bookings": 119390,
+                    "relevant_records": retrieved.head(2).to_dict("records")}
+
+        original_ids = tokenizer(original_prompt(question, context, metadata), return_tensors="pt")["input_ids"]
+        body_ids = tokenizer(builder.build(question, context, metadata), add_special_tokens=False,
+                             return_tensors="pt")["input_ids"]
+        budgeted_ids = torch.cat([prefix_ids, body_ids], dim=1)
+        rows["original"].append((original_ids.shape[1], _prefill_ms(model, original_ids)))
+        rows["budgeted"].append((budgeted_ids.shape[1], _prefill_ms(model, budgeted_ids)))
+        rows["budgeted + prefix cache"].append((body_ids.shape[1], _prefill_ms(model, body_ids, prefix_cache)))
+
+    results = [
+        {
+            "prompt": name,
+            "avg_prefilled_tokens": round(float(np.mean([tokens for tokens, _ in values])), 1),
+            "avg_prefill_ms": round(float(np.mean([ms for _, ms in values])), 2),
+        }
+        for name, values in rows.items()
+    ]
+    print(f"{args.model}, budget {args.budget} tokens, {len(QUESTIONS)} questions")
+    print(f"{'prompt':<24} {'tokens':>7} {'prefill_ms':>11}")
+    for row in results:
+        print(f"{row['prompt']:<24} {row['avg_prefilled_tokens']:>7} {row['avg_prefill_ms']:>11}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "budget": args.budget, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Latency, memory and quality benchmark for the LLM quantization modes.
+
+Loads the model in each mode in a fresh process, answers a fixed question set with greedy
+decoding and reports load time, resident memory, tokens/sec and how closely the answers agree
+with the float32 baseline (exact matches and mean token-sequence similarity).
+
+Usage:
+    python -m benchmarks.llm_quantization
+    python -m benchmarks.llm_quantization --modes none int8 --max-new-tokens 32 --json quant.json
+"""
+
+import argparse
+import difflib
+import json
+import multiprocessing
+import resource
+import time
+from typing import Any, Dict, List
+
+import psutil
+
+from benchmarks.llm_batching import CONTEXT, QUESTIONS
+from src import config
+from src.analytics.llm import QUANTIZATION_MODES
+
+
+def _run(model_name: str, mode: str, max_new_tokens: int, results) -> None:
+    import torch
+    from src.analytics.llm import LLMReasoner
+
+    torch.manual_seed(0)
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    reasoner = LLMReasoner(model_name=model_name, device="cpu", quantization=mode)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = process.memory_info().rss
+
+    context = [line[2:] for line in CONTEXT.splitlines()]
+    answers, tokens, generate_seconds = [], 0, 0.0
+    for question in QUESTIONS:
+        prompt = reasoner._build_prompt(question, context)
+        inputs = reasoner.tokenizer(prompt, return_tensors="pt")
+        start = time.perf_counter()
+        with torch.inference_mode():
+            output = reasoner.model.generate(**inputs, do_sample=False, max_new_tokens=max_new_tokens,
+                                             pad_token_id=reasoner.tokenizer.eos_token_id)
+        generate_seconds += time.perf_counter() - start
+        new_ids = output[0, inputs["input_ids"].shape[1]:].tolist()
+        tokens += len(new_ids)
+        answers.append(new_ids)
+
+    results.put({
+        "mode": mode,
+        "load_seconds": round(load_seconds, 2),
+        "rss_growth_mb": round((rss_loaded - rss_before) / 1e6, 1),
+        # Includes the float32 weights that int8 quantization replaces while loading (kB on Linux)
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e6, 1),
+        "tokens_per_second": round(tokens / generate_seconds, 2) if generate_seconds else 0,
+        "answers": answers,
+    })
+
+
+def measure(model_name: str, mode: str, max_new_tokens: int) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run, args=(model_name, mode, max_new_tokens, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def agreement(answers: List[List[int]], baseline: List[List[int]]) -> Dict[str, float]:
+    """Share of identical answers and mean similarity of the token sequences."""
+    exact = sum(a == b for a, b in zip(answers, baseline)) / len(baseline)
+    similarity = sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(answers, baseline)) / len(baseline)
+    return {"exact_match": round(exact, 3), "token_similarity": round(similarity, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM quantization modes against float32.")
+    parser.add_argument("--model", default=config.LLM_MODEL_NAME)
+    parser.add_argument("--modes", nargs="+", default=list(QUANTIZATION_MODES), choices=QUANTIZATION_MODES)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # The float32 run is the reference for answer agreement
+    modes = ["none"] + [mode for mode in args.modes if mode != "none"]
+    results = [measure(args.model, mode, args.max_new_tokens) for mode in modes]
+    baseline = results[0]["answers"]
+    for row in results:
+        row.update(agreement(row.pop("answers"), baseline))
+
+    print(f"{args.model}, {len(QUESTIONS)} questions, {args.max_new_tokens} new tokens, greedy decoding")
+    print(f"{'mode':<6} {'load_s':>7} {'rss_mb':>8} {'peak_mb':>8} {'tok/s':>7} {'exact':>6} {'similar':>8}")
+    for row in results:
+        print(f"{row['mode']:<6} {row['load_seconds']:>7} {row['rss_growth_mb']:>8} {row['peak_rss_mb']:>8} "
+              f"{row['tokens_per_second']:>7} {row['exact_match']:>6} {row['token_similarity']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "max_new_tokens": args.max_new_tokens, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
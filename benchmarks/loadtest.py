@@ -0,0 +1,374 @@
+"""
+Load test for the API under concurrent traffic.
+
+Replays a mix of /ask, /analytics and /health requests against the app and reports, per
+endpoint, throughput, latency percentiles, error rate and queueing. Each value of
+--concurrency (closed loop: that many clients sending back to back) or --rate (open loop:
+Poisson arrivals at that many requests per second) is one stage, so a sweep shows where
+/ask saturates.
+
+Targets:
+- in-process (default): the app is served through httpx's ASGI transport in this process
+- --uvicorn:            the app is served by uvicorn on a local port in this process
+- --url:                an already running server (its own models and data are used)
+
+For the first two, the embedding model and LLMReasoner are replaced by the deterministic
+stubs from benchmarks/stubs.py (the LLM's latency is set with --llm-profile,
+--llm-decode-ms and --llm-tokens), and the data is synthetic unless --rows 0 is given.
+In-process, the load generator shares the interpreter with the app, so use --uvicorn or
+--url when the client's own CPU use matters.
+
+Queueing is reported twice: on the client, as the time an open-loop arrival waited for a
+free connection (--max-in-flight), and on the server, as the inference pool's queue wait
+and rejections from /health, collected after each stage (the wait percentiles cover the
+server's recent questions and the counters are totals since it started). Settings such as
+HOTEL_ANALYTICS_INFERENCE_MAX_CONCURRENCY are read from the environment as usual.
+
+Usage:
+    python -m benchmarks.loadtest --concurrency 1 4 16 --duration 30
+    python -m benchmarks.loadtest --rate 1 2 5 --mix ask=1 --questions questions.jsonl
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 8 --json load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.stubs import LLM_PROFILES, install_stubs
+from benchmarks.suite import QUESTIONS
+from src import config
+
+ENDPOINTS = ("ask", "analytics", "health")
+
+
+def load_questions(path: str) -> List[str]:
+    """
+    Questions from a JSONL file, one per line.
+
+    Each line is a JSON object with a "text", "question" or "title" field (the first one
+    present is used) or, failing that, the line itself.
+
+    Args:
+        path: JSONL file
+
+    Returns:
+        The questions, in file order
+    """
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = line
+            if isinstance(record, dict):
+                record = next((record[key] for key in ("text", "question", "title") if key in record), None)
+            if isinstance(record, str) and record:
+                questions.append(record)
+    if not questions:
+        raise ValueError(f"No questions found in {path}")
+    return questions
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse "ask=8,analytics=1,health=1" into endpoint weights."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in mix, expected one of {ENDPOINTS}")
+        weights[name] = float(weight) if weight else 1.0
+    if sum(weights.values()) <= 0:
+        raise ValueError("The mix needs at least one endpoint with a positive weight")
+    return weights
+
+
+class Workload:
+    """Deterministic sequence of (endpoint, question) picks from the mix."""
+
+    def __init__(self, weights: Dict[str, float], questions: List[str], seed: int = 0):
+        self.endpoints = list(weights)
+        self.weights = [weights[name] for name in self.endpoints]
+        self.questions = questions
+        self.rng = random.Random(seed)
+        self._next_question = 0
+
+    def next(self) -> Tuple[str, Optional[str]]:
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        if endpoint != "ask":
+            return endpoint, None
+        question = self.questions[self._next_question % len(self.questions)]
+        self._next_question += 1
+        return endpoint, question
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, question: Optional[str]) -> int:
+    if endpoint == "ask":
+        response = await client.post("/ask", json={"text": question})
+    elif endpoint == "analytics":
+        response = await client.get("/analytics")
+    else:
+        response = await client.get("/health")
+    return response.status_code
+
+
+async def _timed(client: httpx.AsyncClient, endpoint: str, question: Optional[str],
+                 lag: float) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        status = await send(client, endpoint, question)
+        error = None
+    except httpx.HTTPError as e:
+        status, error = None, type(e).__name__
+    return {"endpoint": endpoint, "status": status, "error": error, "lag": lag,
+            "latency": time.perf_counter() - start}
+
+
+async def run_closed_loop(client: httpx.AsyncClient, workload: Workload, concurrency: int,
+                          duration: float, max_requests: int) -> List[Dict[str, Any]]:
+    """Concurrency clients, each sending its next request as soon as the previous one returns."""
+    records = []
+    deadline = time.perf_counter() + duration
+
+    async def _client():
+        while time.perf_counter() < deadline and (not max_requests or len(records) < max_requests):
+            endpoint, question = workload.next()
+            records.append(await _timed(client, endpoint, question, 0.0))
+
+    await asyncio.gather(*(_client() for _ in range(concurrency)))
+    return records
+
+
+async def run_open_loop(client: httpx.AsyncClient, workload: Workload, rate: float, duration: float,
+                        max_requests: int, max_in_flight: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Poisson arrivals at rate per second, independent of how fast responses come back."""
+    rng = random.Random(seed)
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = []
+    started = time.perf_counter()
+    scheduled = started
+
+    async def _request(arrival: float, endpoint: str, question: Optional[str]):
+        async with slots:
+            # Time the arrival waited for a free connection on the client
+            return await _timed(client, endpoint, question, time.perf_counter() - arrival)
+
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled - started >= duration or (max_requests and len(tasks) >= max_requests):
+            break
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        endpoint, question = workload.next()
+        tasks.append(asyncio.ensure_future(_request(scheduled, endpoint, question)))
+    return list(await asyncio.gather(*tasks))
+
+
+def _latency_summary(seconds: List[float]) -> Dict[str, float]:
+    if not seconds:
+        return {}
+    ms = np.array(seconds) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def summarize(records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Per-endpoint (and "all") throughput, latency, errors and client-side queueing."""
+    summary = {}
+    for endpoint in ("all",) + ENDPOINTS:
+        selected = [r for r in records if endpoint == "all" or r["endpoint"] == endpoint]
+        if not selected:
+            continue
+        ok = [r for r in selected if r["status"] is not None and r["status"] < 400]
+        statuses = Counter(str(r["status"] or r["error"]) for r in selected)
+        summary[endpoint] = {
+            "requests": len(selected),
+            "rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+            "error_rate": round(1 - len(ok) / len(selected), 4),
+            "statuses": dict(sorted(statuses.items())),
+            "latency": _latency_summary([r["latency"] for r in ok]),
+            "client_queue": _latency_summary([r["lag"] for r in selected]),
+        }
+    return summary
+
+
+async def server_queue_stats(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """The inference pool's queue statistics as reported by /health."""
+    try:
+        response = await client.get("/health")
+        return response.json().get("performance", {}).get("inference_pool", {})
+    except (httpx.HTTPError, ValueError):
+        return {}
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"The app did not become ready within {timeout:.0f} seconds")
+
+
+async def run_stages(client: httpx.AsyncClient, args) -> List[Dict[str, Any]]:
+    await wait_until_ready(client, args.ready_timeout)
+    questions = load_questions(args.questions) if args.questions else QUESTIONS
+    weights = parse_mix(args.mix)
+
+    stages = [("concurrency", value) for value in args.concurrency or []]
+    stages += [("rate", value) for value in args.rate or []]
+    results = []
+    for mode, value in stages:
+        print(f"Running {mode}={value} for {args.duration:g}s...", file=sys.stderr)
+        workload = Workload(weights, questions, seed=args.seed)
+        started = time.perf_counter()
+        if mode == "concurrency":
+            records = await run_closed_loop(client, workload, int(value), args.duration, args.requests)
+        else:
+            records = await run_open_loop(client, workload, value, args.duration, args.requests,
+                                          args.max_in_flight, seed=args.seed)
+        elapsed = time.perf_counter() - started
+        results.append({mode: value, "seconds": round(elapsed, 2), "endpoints": summarize(records, elapsed),
+                        "server_queue": await server_queue_stats(client)})
+    return results
+
+
+def _prepare_in_process(args, data_dir: str):
+    """Point the settings at the load-test data and install the stub models."""
+    if args.rows:
+        from benchmarks.synthetic import make_bookings
+        from src.data.storage import write_bookings
+        path = os.path.join(data_dir, "bookings.parquet")
+        write_bookings(make_bookings(args.rows, seed=args.seed), path)
+        config.PROCESSED_DATA_PATH = path
+        config.INDEX_CACHE_DIR = ""
+    if args.no_answer_cache:
+        config.ANSWER_CACHE_SIZE = 0
+    llm_cost = {}
+    if args.llm_decode_ms is not None:
+        llm_cost["decode_ms_per_token"] = args.llm_decode_ms
+    if args.llm_tokens is not None:
+        llm_cost["new_tokens"] = args.llm_tokens
+    install_stubs(embedding_profile=args.embedding_profile, llm_profile=args.llm_profile, llm_cost=llm_cost)
+
+
+async def run_in_process(args) -> List[Dict[str, Any]]:
+    from src.api.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest",
+                                     timeout=args.timeout) as client:
+            return await run_stages(client, args)
+
+
+async def run_against_url(url: str, args) -> List[Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await run_stages(client, args)
+
+
+def start_uvicorn(port: int):
+    """Serve the app with uvicorn on a daemon thread and return the server once it is up."""
+    import uvicorn
+    from src.api.main import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="loadtest-uvicorn", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def print_stage(stage: Dict[str, Any]):
+    mode = "concurrency" if "concurrency" in stage else "rate"
+    print(f"\n{mode}={stage[mode]} ({stage['seconds']}s)")
+    print(f"{'endpoint':<10} {'requests':>8} {'rps':>8} {'errors':>7} {'p50_ms':>9} {'p95_ms':>9} "
+          f"{'p99_ms':>9} {'queue_p95':>9}")
+    for endpoint, row in stage["endpoints"].items():
+        latency = row["latency"]
+        print(f"{endpoint:<10} {row['requests']:>8} {row['rps']:>8} {row['error_rate']:>7.1%} "
+              f"{latency.get('p50_ms', '-'):>9} {latency.get('p95_ms', '-'):>9} {latency.get('p99_ms', '-'):>9} "
+              f"{row['client_queue'].get('p95_ms', '-'):>9}")
+    queue = stage["server_queue"]
+    if queue:
+        print(f"server inference queue: wait p50/p95/max {queue['queue_wait_ms']['p50']}/"
+              f"{queue['queue_wait_ms']['p95']}/{queue['queue_wait_ms']['max']} ms, "
+              f"rejected {queue.get('rejected', 0)}, expired {queue.get('expired', 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a replayed request mix.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running server; default is to serve the app in-process")
+    target.add_argument("--uvicorn", action="store_true", help="Serve the app with uvicorn on a local port")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --uvicorn")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, nargs="+", help="Closed-loop client counts, one stage each")
+    load.add_argument("--rate", type=float, nargs="+", help="Open-loop arrival rates (requests/s), one stage each")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per stage")
+    parser.add_argument("--requests", type=int, default=0, help="Stop a stage after this many requests (0: no limit)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open-loop cap on concurrent requests")
+    parser.add_argument("--mix", default="ask=8,analytics=1,health=1", help="Endpoint weights")
+    parser.add_argument("--questions", help="JSONL file with the questions to replay")
+    parser.add_argument("--rows", type=int, default=100_000,
+                        help="Synthetic bookings to serve in-process; 0 uses the configured dataset")
+    parser.add_argument("--embedding-profile", default="minilm-cpu")
+    parser.add_argument("--llm-profile", choices=sorted(LLM_PROFILES), default="phi2-cpu")
+    parser.add_argument("--llm-decode-ms", type=float, help="Override the stub LLM's milliseconds per token")
+    parser.add_argument("--llm-tokens", type=int, help="Override the stub LLM's answer length in tokens")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Answer repeated questions from scratch")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--ready-timeout", type=float, default=600.0, help="Seconds to wait for /health/ready")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+    if not args.concurrency and not args.rate:
+        args.concurrency = [1, 4, 16]
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        if args.url:
+            stages = asyncio.run(run_against_url(args.url, args))
+        else:
+            _prepare_in_process(args, data_dir)
+            if args.uvicorn:
+                server = start_uvicorn(args.port)
+                try:
+                    stages = asyncio.run(run_against_url(f"http://127.0.0.1:{args.port}", args))
+                finally:
+                    server.should_exit = True
+            else:
+                stages = asyncio.run(run_in_process(args))
+
+    for stage in stages:
+        print_stage(stage)
+
+    if args.json:
+        results = {"target": args.url or ("uvicorn" if args.uvicorn else "in-process"), "mix": parse_mix(args.mix),
+                   "llm_profile": args.llm_profile, "stages": stages}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Memory benchmark of API workers with private versus memory-mapped shared artifacts.
+
+Starts N worker processes that each build a HotelAnalytics, as uvicorn --workers N does,
+first with private copies of the data (loaded from the processed file and the index cache)
+and then mapping a shared artifacts snapshot. While all workers of a mode are alive, their
+memory is read from the operating system:
+
+- rss:  resident memory, shared pages included (overstates the total)
+- uss:  memory private to the worker, i.e. what one more worker costs
+- pss:  resident memory with shared pages split between the processes sharing them; the
+        sum over the workers is their real physical footprint
+- anon: anonymous (heap) memory, which can never be shared
+
+The stub embedding model from benchmarks/stubs.py is used, so no model is downloaded; the
+interpreter and libraries are the same in both modes, so differences come from the data.
+
+Usage:
+    python -m benchmarks.shared_memory --rows 1000000 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import psutil
+
+from benchmarks.synthetic import make_bookings
+from src import config
+from src.data.storage import write_bookings
+
+
+def _anon_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _worker(settings: Dict[str, Any], ready, release):
+    from benchmarks.stubs import install_stubs
+    for name, value in settings.items():
+        setattr(config, name, value)
+    install_stubs(embedding_profile="instant", llm_profile="instant", dimension=settings["_DIMENSION"])
+    from src.analytics.reports import HotelAnalytics
+    started = time.perf_counter()
+    analytics = HotelAnalytics()
+    # Touch what a request touches: the report, a filtered and an unfiltered search
+    analytics.generate_report()
+    analytics.vector_store.query("Bookings from PRT in July 2017", top_k=5)
+    analytics.vector_store.query("Bookings from PRT in July 2017", top_k=5, filters={"country": ["PRT"]})
+    ready.put(time.perf_counter() - started)
+    release.wait()
+
+
+def run_mode(settings: Dict[str, Any], workers: int) -> Dict[str, Any]:
+    """Start the workers, measure them once all are ready, then stop them."""
+    context = multiprocessing.get_context("spawn")
+    ready, release = context.Queue(), context.Event()
+    processes = [context.Process(target=_worker, args=(settings, ready, release)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    startup = [ready.get() for _ in processes]
+
+    per_worker: List[Dict[str, float]] = []
+    for process in processes:
+        memory = psutil.Process(process.pid).memory_full_info()
+        per_worker.append({"rss_mb": memory.rss / 1e6, "uss_mb": memory.uss / 1e6, "pss_mb": memory.pss / 1e6,
+                           "anon_mb": _anon_mb(process.pid)})
+    release.set()
+    for process in processes:
+        process.join()
+
+    mean = lambda key: round(sum(w[key] for w in per_worker) / len(per_worker), 1)
+    return {
+        "workers": workers,
+        "startup_seconds": round(max(startup), 2),
+        "rss_mb": mean("rss_mb"),
+        "uss_mb": mean("uss_mb"),
+        "pss_mb": mean("pss_mb"),
+        "anon_mb": mean("anon_mb"),
+        "total_pss_mb": round(sum(w["pss_mb"] for w in per_worker), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare worker memory with private and shared artifacts.")
+    parser.add_argument("--rows", type=int, default=500_000, help="Synthetic bookings")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per mode")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension of the stub model")
+    parser.add_argument("--index-type", default=config.VECTOR_INDEX_TYPE)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, "bookings.parquet")
+        write_bookings(make_bookings(args.rows, seed=0), data_path)
+        settings = {
+            "PROCESSED_DATA_PATH": data_path,
+            "INDEX_CACHE_DIR": os.path.join(tmp_dir, "cache"),
+            "VECTOR_INDEX_TYPE": args.index_type,
+            "QUERY_BATCH_WINDOW_MS": 0,
+            "_DIMENSION": args.dimension,
+        }
+
+        # Build the snapshot (and the index cache the private workers load) once, up front
+        from benchmarks.stubs import install_stubs
+        from src.analytics import shared_artifacts
+        install_stubs(embedding_profile="instant", llm_profile="instant", dimension=args.dimension)
+        config.VECTOR_INDEX_TYPE = args.index_type
+        started = time.perf_counter()
+        shared_artifacts.main(["--data-path", data_path, "--output-dir", os.path.join(tmp_dir, "shared"),
+                               "--cache-dir", settings["INDEX_CACHE_DIR"]])
+        build_seconds = time.perf_counter() - started
+
+        results = {
+            "rows": args.rows,
+            "index_type": args.index_type,
+            "build_seconds": round(build_seconds, 2),
+            "private": run_mode({**settings, "SHARED_ARTIFACTS_DIR": ""}, args.workers),
+            "shared": run_mode({**settings, "SHARED_ARTIFACTS_DIR": os.path.join(tmp_dir, "shared")}, args.workers),
+        }
+
+    print(f"{args.rows} bookings, {args.workers} workers, {args.index_type} index "
+          f"(snapshot built in {results['build_seconds']}s)")
+    print(f"{'mode':<8} {'startup_s':>9} {'rss_mb':>9} {'uss_mb':>9} {'pss_mb':>9} {'anon_mb':>9} {'total_pss_mb':>13}")
+    for mode in ("private", "shared"):
+        row = results[mode]
+        print(f"{mode:<8} {row['startup_seconds']:>9} {row['rss_mb']:>9} {row['uss_mb']:>9} {row['pss_mb']:>9} "
+              f"{row['anon_mb']:>9} {row['total_pss_mb']:>13}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
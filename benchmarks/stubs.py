@@ -0,0 +1,156 @@
+"""
+Offline stand-ins for the embedding model and the LLM, with realistic cost profiles.
+
+The stubs let the benchmarks exercise the real HotelAnalytics / VectorStore code paths
+without network access or downloaded models. The embedding stub hashes words into a
+fixed-size vector (texts sharing words end up close, so retrieval still behaves sensibly),
+and the LLM stub answers from the retrieved context. Both sleep for the time the real model
+would take according to a cost profile, so end-to-end latencies keep their shape.
+
+Register them in the model registry before the code under test loads its models:
+    install_stubs(embedding_profile="minilm-cpu", llm_profile="phi2-cpu")
+"""
+
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from src import config
+from src.analytics.model_registry import registry
+
+# Milliseconds per encode call and per text. "minilm-cpu" approximates all-MiniLM-L6-v2 on a
+# few CPU cores: single queries pay mostly the fixed cost, bulk encodes the per-text cost.
+EMBEDDING_PROFILES = {
+    "minilm-cpu": {"call_ms": 4.0, "per_text_ms": 0.3},
+    "instant": {"call_ms": 0.0, "per_text_ms": 0.0},
+}
+
+# Prefill milliseconds per prompt token, decode milliseconds per generated token and the
+# number of generated tokens. "phi2-cpu" approximates phi-2 in float32 on a CPU.
+LLM_PROFILES = {
+    "phi2-cpu": {"prefill_ms_per_token": 1.5, "decode_ms_per_token": 90.0, "new_tokens": 40},
+    "instant": {"prefill_ms_per_token": 0.0, "decode_ms_per_token": 0.0, "new_tokens": 40},
+}
+
+
+def _sleep_ms(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000.0)
+
+
+class StubEmbeddingModel:
+    """
+    Word-hashing embedding model with the SentenceTransformer encode interface.
+    """
+
+    def __init__(self, dimension: int = 384, profile: str = "minilm-cpu"):
+        self.dimension = dimension
+        self.cost = EMBEDDING_PROFILES[profile]
+        self._vocabulary: Dict[str, int] = {}
+        self._word_vectors = np.zeros((0, dimension), dtype="float32")
+        self._lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _word_ids(self, texts: List[str]):
+        ids, offsets = [], [0]
+        with self._lock:
+            for text in texts:
+                for word in text.lower().split():
+                    word_id = self._vocabulary.get(word)
+                    if word_id is None:
+                        word_id = self._vocabulary[word] = len(self._vocabulary)
+                    ids.append(word_id)
+                offsets.append(len(ids))
+            # One fixed random vector per word, seeded by the word itself
+            new_words = list(self._vocabulary)[len(self._word_vectors):]
+            if new_words:
+                vectors = [np.random.default_rng(zlib.crc32(word.encode("utf-8"))).standard_normal(self.dimension)
+                           for word in new_words]
+                self._word_vectors = np.concatenate([self._word_vectors, np.asarray(vectors, dtype="float32")])
+            return ids, offsets, self._word_vectors
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        _sleep_ms(self.cost["call_ms"] + self.cost["per_text_ms"] * len(texts))
+        ids, offsets, word_vectors = self._word_ids(texts)
+        # Sum of the word vectors of each text, as a sparse (texts x words) product
+        counts = sparse.csr_matrix((np.ones(len(ids), dtype="float32"), ids, offsets),
+                                   shape=(len(texts), len(word_vectors)))
+        embeddings = np.asarray(counts @ word_vectors, dtype="float32")
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+
+class StubLLM:
+    """
+    LLM reasoner stand-in with the LLMReasoner call and streaming interface.
+    """
+
+    def __init__(self, profile: str = "phi2-cpu", **cost: float):
+        # Keyword arguments override single entries of the profile, e.g. decode_ms_per_token=20
+        self.cost = {**LLM_PROFILES[profile], **cost}
+        self.scheduler = None
+
+    def enable_batching(self, max_batch_size: int = 8):
+        pass
+
+    def _prefill(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]]):
+        # Roughly 1.3 tokens per word for the question, context and metadata in the prompt
+        words = len(question.split()) + sum(len(c.split()) for c in context) + 4 * len(metadata or {})
+        _sleep_ms(self.cost["prefill_ms_per_token"] * 1.3 * words)
+
+    def _answer_tokens(self, question: str, context: List[str]) -> List[str]:
+        evidence = context[0] if context else "no matching bookings"
+        words = f"Based on the retrieved bookings, {evidence}".split()
+        new_tokens = int(self.cost["new_tokens"])
+        words = (words * (new_tokens // max(len(words), 1) + 1))[:new_tokens]
+        return [word + " " for word in words]
+
+    def __call__(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]] = None) -> str:
+        self._prefill(question, context, metadata)
+        tokens = self._answer_tokens(question, context)
+        _sleep_ms(self.cost["decode_ms_per_token"] * len(tokens))
+        return "".join(tokens).strip()
+
+    def stream_answer(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]] = None,
+                      stop_event: Optional[threading.Event] = None,
+                      stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        started = time.perf_counter()
+        self._prefill(question, context, metadata)
+        produced = 0
+        for token in self._answer_tokens(question, context):
+            if stop_event is not None and stop_event.is_set():
+                break
+            _sleep_ms(self.cost["decode_ms_per_token"])
+            produced += 1
+            yield token
+        if stats is not None:
+            elapsed = time.perf_counter() - started
+            stats.update({"tokens": produced, "cancelled": stop_event is not None and stop_event.is_set(),
+                          "tokens_per_second": round(produced / elapsed, 2) if elapsed > 0 else None})
+
+
+def install_stubs(embedding_profile: str = "minilm-cpu", llm_profile: str = "phi2-cpu",
+                  dimension: int = 384, llm_cost: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Register the stubs under the configured embedding and LLM model names.
+
+    Args:
+        embedding_profile: Key of EMBEDDING_PROFILES
+        llm_profile: Key of LLM_PROFILES
+        dimension: Embedding dimension of the stub model
+        llm_cost: Overrides of single LLM_PROFILES entries
+
+    Returns:
+        The registered stubs, by role
+    """
+    embedding_model = StubEmbeddingModel(dimension=dimension, profile=embedding_profile)
+    llm = StubLLM(profile=llm_profile, **(llm_cost or {}))
+    registry.register(config.EMBEDDING_MODEL_NAME, embedding_model)
+    registry.register(f"llm:{config.LLM_MODEL_NAME}", llm)
+    return {"embedding": embedding_model, "llm": llm}
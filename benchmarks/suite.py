@@ -0,0 +1,237 @@
+"""
+Offline benchmark suite for startup, the analytics report and question answering.
+
+Runs the real HotelAnalytics code on synthetic bookings with the stub embedding model and
+LLM from benchmarks/stubs.py, so it needs neither the processed dataset nor any downloaded
+model or network access. Scenarios, per row count:
+
+- startup:           HotelAnalytics construction (load, summaries, embeddings, index, cubes)
+- generate_report:   the first (computed) and repeated (cached) report
+- extract_metrics:   _extract_relevant_metrics per question
+- vector_query:      VectorStore.query per question, unfiltered and with the question's filters
+- answer_question:   the full /ask path, retrieval and (stub) generation included
+
+Results are written as JSON. Passing an earlier results file with --compare reports every
+timing that got slower by more than --tolerance and exits with status 1, so the suite can
+gate a release.
+
+Usage:
+    python -m benchmarks.suite --rows 100000 1000000 --json bench.json
+    python -m benchmarks.suite --rows 100000 --compare baseline.json
+    # Stub models without simulated model cost, for a quick check of the Python overhead
+    python -m benchmarks.suite --embedding-profile instant --llm-profile instant
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import psutil
+
+from benchmarks.stubs import EMBEDDING_PROFILES, LLM_PROFILES, install_stubs
+from benchmarks.synthetic import make_bookings
+from src import config
+from src.data.storage import write_bookings
+
+QUESTIONS = [
+    "Show me total revenue for July 2017",
+    "Which locations had the highest booking cancellations?",
+    "What is the average price of a hotel booking?",
+    "How many bookings were made from PRT in 2016?",
+    "What is the average lead time for resort hotel bookings?",
+    "Which month has the highest number of bookings?",
+    "What is the cancellation rate for GBR in August?",
+    "What is the average length of stay for bookings from DEU?",
+    "Revenue from ESP and FRA in 2015",
+    "What percentage of bookings are cancelled?",
+]
+
+
+def _summary(seconds: List[float]) -> Dict[str, float]:
+    ms = np.array(seconds) * 1000
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def _per_call(fn: Callable[[str], Any], questions: List[str], repeats: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeats):
+        for question in questions:
+            start = time.perf_counter()
+            fn(question)
+            timings.append(time.perf_counter() - start)
+    return _summary(timings)
+
+
+def run_scenarios(n_rows: int, args) -> Dict[str, Any]:
+    """Run every scenario on n_rows synthetic bookings and return their timings."""
+    from src.analytics.reports import HotelAnalytics
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bookings.parquet")
+        write_bookings(make_bookings(n_rows, seed=args.seed), path)
+        gc.collect()
+
+        # Cold start from the data file: no index cache, and no answer cache between questions
+        config.PROCESSED_DATA_PATH = path
+        config.INDEX_CACHE_DIR = ""
+        config.ANSWER_CACHE_SIZE = 0
+
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
+        start = time.perf_counter()
+        analytics = HotelAnalytics()
+        scenarios: Dict[str, Any] = {"startup": {
+            "seconds": round(time.perf_counter() - start, 3),
+            "rss_mb": round((process.memory_info().rss - rss_before) / 1e6, 1),
+        }}
+
+    try:
+        start = time.perf_counter()
+        analytics.generate_report()
+        first = time.perf_counter() - start
+        cached = _per_call(lambda _: analytics.generate_report(), ["cached"], args.repeats * 10)
+        scenarios["generate_report"] = {"first_ms": round(first * 1000, 3), "cached": cached}
+
+        scenarios["extract_metrics"] = _per_call(analytics._extract_relevant_metrics, QUESTIONS, args.repeats * 10)
+
+        store = analytics.vector_store
+        scenarios["vector_query"] = {
+            "unfiltered": _per_call(lambda q: store.query(q, top_k=5), QUESTIONS, args.repeats),
+            "filtered": _per_call(lambda q: store.query(q, top_k=5, filters=analytics._extract_retrieval_filters(q)),
+                                  QUESTIONS, args.repeats),
+        }
+
+        scenarios["answer_question"] = _per_call(analytics.answer_question, QUESTIONS[:args.questions], 1)
+    finally:
+        if analytics.vector_store.batcher is not None:
+            analytics.vector_store.batcher.close()
+    return scenarios
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _timings(value: Any, prefix: str = "") -> Dict[str, float]:
+    # Flatten to "scenario.metric" -> value, for the timing metrics only
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_timings(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if prefix.endswith(("_ms", "seconds")) and isinstance(value, (int, float)):
+        return {prefix: float(value)}
+    return {}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float = 1.0) -> List[str]:
+    """
+    Timings that are more than tolerance (a fraction) slower than in the baseline.
+
+    Args:
+        results: Output of this run
+        baseline: Output of an earlier run
+        tolerance: Allowed relative slowdown, e.g. 0.25 for 25%
+        min_delta_ms: Slowdowns smaller than this are timer noise and never reported
+
+    Returns:
+        One line per regression
+    """
+    regressions = []
+    baseline_runs = {run["rows"]: run for run in baseline.get("runs", [])}
+    for run in results["runs"]:
+        previous = baseline_runs.get(run["rows"])
+        if previous is None:
+            continue
+        old = _timings(previous["scenarios"])
+        for name, value in _timings(run["scenarios"]).items():
+            if name not in old or old[name] <= 0:
+                continue
+            delta_ms = (value - old[name]) * (1000 if name.endswith("seconds") else 1)
+            if value > old[name] * (1 + tolerance) and delta_ms >= min_delta_ms:
+                regressions.append(f"{run['rows']} rows {name}: {old[name]:g} -> {value:g} "
+                                   f"(+{(value / old[name] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite on synthetic data with stub models.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000],
+                        help="Synthetic booking counts to run the scenarios for (e.g. 100000 1000000 10000000)")
+    parser.add_argument("--embedding-profile", choices=sorted(EMBEDDING_PROFILES), default="minilm-cpu")
+    parser.add_argument("--llm-profile", choices=sorted(LLM_PROFILES), default="phi2-cpu")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension of the stub model")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the questions per scenario")
+    parser.add_argument("--questions", type=int, default=len(QUESTIONS),
+                        help="Questions answered end to end")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown against --compare")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore slowdowns smaller than this against --compare")
+    args = parser.parse_args()
+
+    install_stubs(embedding_profile=args.embedding_profile, llm_profile=args.llm_profile, dimension=args.dimension)
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "embedding_profile": args.embedding_profile,
+            "llm_profile": args.llm_profile,
+            "dimension": args.dimension,
+            "index_type": config.VECTOR_INDEX_TYPE,
+            "query_batch_window_ms": config.QUERY_BATCH_WINDOW_MS,
+            "repeats": args.repeats,
+        },
+        "runs": [],
+    }
+    for n_rows in args.rows:
+        print(f"Running scenarios on {n_rows} bookings...", file=sys.stderr)
+        results["runs"].append({"rows": n_rows, "scenarios": run_scenarios(n_rows, args)})
+        gc.collect()
+
+    print(f"{'rows':>10}  {'scenario':<40} {'value':>12}")
+    for run in results["runs"]:
+        for name, value in _timings(run["scenarios"]).items():
+            print(f"{run['rows']:>10}  {name:<40} {value:>12g}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark the column-wise summary builder against the row-wise DataFrame.apply version.
+
+Usage:
+    python -m benchmarks.summary_builder --rows 100000 1000000
+"""
+
+import argparse
+import time
+
+from benchmarks.synthetic import make_bookings
+from src.analytics.summaries import build_summary_column, build_summary_column_rowwise
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare summary builders on synthetic bookings.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--rowwise-limit", type=int, default=1_000_000,
+                        help="Skip the row-wise builder above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'rowwise_s':>10} {'columnar_s':>11} {'speedup':>8} {'identical':>10}")
+    for n_rows in args.rows:
+        df = make_bookings(n_rows)
+        columnar, columnar_s = _time(build_summary_column, df)
+        if n_rows <= args.rowwise_limit:
+            rowwise, rowwise_s = _time(build_summary_column_rowwise, df)
+            identical = bool((columnar == rowwise).all())
+            print(f"{n_rows:>10} {rowwise_s:>10.2f} {columnar_s:>11.2f} {rowwise_s / columnar_s:>7.1f}x {str(identical):>10}")
+        else:
+            print(f"{n_rows:>10} {'-':>10} {columnar_s:>11.2f} {'-':>8} {'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
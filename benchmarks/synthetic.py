@@ -0,0 +1,113 @@
+"""
+Synthetic booking data matching the schema of hotel_bookings_processed.csv.
+
+Used by the benchmarks so they can run without the real dataset. Distributions are rough
+approximations of the public hotel bookings dataset (mostly low-cardinality categoricals,
+a skewed lead time and a two-decimal daily rate).
+"""
+
+import calendar
+
+import numpy as np
+import pandas as pd
+
+MONTHS = list(calendar.month_name)[1:]
+COUNTRIES = [
+    "PRT", "GBR", "FRA", "ESP", "DEU", "ITA", "IRL", "BEL", "BRA", "NLD",
+    "USA", "CHE", "CN", "AUT", "SWE", "CHN", "POL", "ISR", "RUS", "NOR",
+    "ROU", "FIN", "DNK", "AUS", "AGO", "LUX", "MAR", "TUR", "ARG", "HUN",
+]
+COUNTRY_WEIGHTS = np.array([40, 10, 9, 7, 6, 3, 3, 2, 2, 2] + [1] * 20, dtype=float)
+ROOM_TYPES = list("ABCDEFGHL")
+ROOM_WEIGHTS = np.array([64, 1, 1, 16, 6, 3, 2, 1, 0.1])
+
+
+def make_bookings(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a processed bookings DataFrame with n_rows rows.
+
+    Args:
+        n_rows: Number of bookings to generate
+        seed: Random seed, so repeated runs produce the same data
+
+    Returns:
+        A DataFrame with the same columns and dtypes as the processed CSV
+    """
+    rng = np.random.default_rng(seed)
+
+    def choice(values, weights=None):
+        p = None if weights is None else np.asarray(weights, dtype=float) / np.sum(weights)
+        return rng.choice(np.array(values, dtype=object), size=n_rows, p=p)
+
+    weekend = rng.integers(0, 3, n_rows)
+    week = rng.integers(0, 6, n_rows)
+    # Every processed booking has at least one night
+    week[(weekend + week) == 0] = 1
+    adr = np.round(rng.gamma(4.0, 26.0, n_rows), 2) + 1.0
+    year = rng.choice([2015, 2016, 2017], size=n_rows, p=[0.2, 0.47, 0.33])
+    month_idx = rng.integers(0, 12, n_rows)
+
+    df = pd.DataFrame({
+        "hotel": choice(["City Hotel", "Resort Hotel"], [66, 34]),
+        "is_canceled": (rng.random(n_rows) < 0.37).astype(np.int64),
+        "lead_time": np.minimum(rng.exponential(100.0, n_rows).astype(np.int64), 737),
+        "arrival_date_year": year.astype(np.int64),
+        "arrival_date_month": np.array(MONTHS, dtype=object)[month_idx],
+        "arrival_date_week_number": np.clip(month_idx * 4 + rng.integers(1, 6, n_rows), 1, 53).astype(np.int64),
+        "arrival_date_day_of_month": rng.integers(1, 29, n_rows).astype(np.int64),
+        "stays_in_weekend_nights": weekend.astype(np.int64),
+        "stays_in_week_nights": week.astype(np.int64),
+        "adults": rng.choice([1, 2, 3], size=n_rows, p=[0.2, 0.72, 0.08]).astype(np.int64),
+        "children": rng.choice([0, 1, 2], size=n_rows, p=[0.93, 0.04, 0.03]).astype(np.int64),
+        "babies": (rng.random(n_rows) < 0.01).astype(np.int64),
+        "meal": choice(["BB", "HB", "SC", "Undefined", "FB"], [77, 12, 9, 1, 1]),
+        "country": choice(COUNTRIES, COUNTRY_WEIGHTS),
+        "market_segment": choice(["Online TA", "Offline TA/TO", "Groups", "Direct", "Corporate", "Complementary", "Aviation"],
+                                 [47, 20, 17, 10, 4, 1, 1]),
+        "distribution_channel": choice(["TA/TO", "Direct", "Corporate", "GDS"], [82, 12, 5, 1]),
+        "is_repeated_guest": (rng.random(n_rows) < 0.03).astype(np.int64),
+        "previous_cancellations": (rng.random(n_rows) < 0.05).astype(np.int64),
+        "previous_bookings_not_canceled": (rng.random(n_rows) < 0.03).astype(np.int64),
+        "reserved_room_type": choice(ROOM_TYPES, ROOM_WEIGHTS),
+        "assigned_room_type": choice(ROOM_TYPES, ROOM_WEIGHTS),
+        "booking_changes": rng.choice([0, 1, 2], size=n_rows, p=[0.85, 0.1, 0.05]).astype(np.int64),
+        "deposit_type": choice(["No Deposit", "Non Refund", "Refundable"], [87, 12, 1]),
+        "agent": rng.choice([0, 9, 240, 1, 14, 7], size=n_rows).astype(np.int64),
+        "company": np.where(rng.random(n_rows) < 0.94, 0, rng.integers(1, 500, n_rows)).astype(np.int64),
+        "days_in_waiting_list": np.where(rng.random(n_rows) < 0.97, 0, rng.integers(1, 100, n_rows)).astype(np.int64),
+        "customer_type": choice(["Transient", "Transient-Party", "Contract", "Group"], [75, 21, 3, 1]),
+        "adr": adr,
+        "required_car_parking_spaces": (rng.random(n_rows) < 0.06).astype(np.int64),
+        "total_of_special_requests": rng.choice([0, 1, 2, 3], size=n_rows, p=[0.58, 0.28, 0.11, 0.03]).astype(np.int64),
+        "reservation_status": None,
+        "reservation_status_date": None,
+    })
+    df["reservation_status"] = np.where(df["is_canceled"] == 1, "Canceled", "Check-Out").astype(object)
+    df["reservation_status_date"] = (
+        df["arrival_date_year"].astype(str) + "-"
+        + pd.Series(month_idx + 1).astype(str).str.zfill(2) + "-"
+        + df["arrival_date_day_of_month"].astype(str).str.zfill(2)
+    )
+    df["total_nights"] = df["stays_in_weekend_nights"] + df["stays_in_week_nights"]
+    df["total_price"] = df["adr"] * df["total_nights"]
+    return df
+
+
+def make_raw_bookings(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a raw bookings export (the input of src/data/preprocessing.py) with n_rows rows.
+
+    Includes the missing values and the zero-rate and zero-night bookings that preprocessing
+    fills or drops.
+    """
+    rng = np.random.default_rng(seed + 1)
+    df = make_bookings(n_rows, seed).drop(columns=["total_nights", "total_price"])
+    df["children"] = df["children"].astype(float)
+    df.loc[rng.random(n_rows) < 0.001, "children"] = np.nan
+    df["country"] = df["country"].where(rng.random(n_rows) >= 0.004, None)
+    df["agent"] = df["agent"].where(df["agent"] != 0).astype(float)
+    df["company"] = df["company"].where(df["company"] != 0).astype(float)
+    df.loc[rng.random(n_rows) < 0.01, "adr"] = 0.0
+    no_nights = rng.random(n_rows) < 0.01
+    df.loc[no_nights, ["stays_in_weekend_nights", "stays_in_week_nights"]] = 0
+    return df
@@ -0,0 +1,179 @@
+"""
+Answer cache for the question answering endpoint.
+
+Generating an answer with the LLM takes seconds, while questions are often repeated or
+rephrased. Answers are cached per data version and looked up by normalized question text
+first, then by cosine similarity between question embeddings. A similar question only
+matches an entry with the same signature (the dimension values and numbers it mentions), so
+"revenue in July 2016" never reuses the answer for "revenue in July 2017".
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fallback answers produced when the LLM is unavailable or fails; these are never cached
+UNCACHEABLE_PREFIXES = ("I encountered an error", "I'm unable to process")
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question: str) -> str:
+    """Lower-case the question and drop punctuation and repeated whitespace."""
+    return " ".join(_PUNCTUATION.sub(" ", question.lower()).split())
+
+
+@dataclass
+class _Entry:
+    question: str
+    signature: Hashable
+    result: Dict[str, Any]
+    data_version: Optional[str]
+    created: float
+    slot: int
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe LRU cache of answers with a TTL and an embedding similarity lookup.
+
+    Memory is bounded by max_entries: the question embeddings live in a preallocated
+    (max_entries x dimension) matrix, so a similarity lookup is one matrix-vector product.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0,
+                 similarity_threshold: float = 0.95):
+        """
+        Args:
+            max_entries: Maximum number of cached answers; the least recently used is evicted
+            ttl_seconds: Age after which an entry is no longer served
+            similarity_threshold: Minimum cosine similarity for a similar-question hit
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._slot_keys = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self._data_version: Optional[str] = None
+        self._counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                          "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached result for the same normalized question, if any.
+
+        A miss is not counted here, since it is usually followed by get_similar.
+        """
+        key = normalize_question(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._is_fresh(entry):
+                return None
+            self._entries.move_to_end(key)
+            self._counters["exact_hits"] += 1
+            return entry.result
+
+    def get_similar(self, embedding: np.ndarray, signature: Hashable) -> Optional[Tuple[Dict[str, Any], str, float]]:
+        """
+        Return (result, cached question, similarity) for the most similar cached question
+        with the same signature, if its similarity reaches the threshold.
+        """
+        query = _normalize_vector(embedding)
+        with self._lock:
+            if self._matrix is None or not self._entries:
+                self._counters["misses"] += 1
+                return None
+            similarities = self._matrix @ query
+            for slot in np.argsort(-similarities):
+                similarity = float(similarities[slot])
+                if similarity < self.similarity_threshold:
+                    break
+                key = self._slot_keys[slot]
+                entry = self._entries.get(key) if key is not None else None
+                if entry is None or entry.signature != signature or not self._is_fresh(entry):
+                    continue
+                self._entries.move_to_end(key)
+                self._counters["semantic_hits"] += 1
+                return entry.result, entry.question, similarity
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, question: str, embedding: np.ndarray, signature: Hashable,
+            result: Dict[str, Any], data_version: Optional[str]) -> None:
+        """
+        Cache the result for a question. Results computed for an older data version than the
+        current one, and fallback answers, are not cached.
+        """
+        if self.max_entries <= 0 or str(result.get("answer", "")).startswith(UNCACHEABLE_PREFIXES):
+            return
+        key = normalize_question(question)
+        vector = _normalize_vector(embedding)
+        with self._lock:
+            if data_version != self._data_version:
+                return
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype="float32")
+            if key in self._entries:
+                self._remove(key)
+            if not self._free_slots:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._counters["evictions"] += 1
+            slot = self._free_slots.pop()
+            self._matrix[slot] = vector
+            self._slot_keys[slot] = key
+            self._entries[key] = _Entry(question, signature, result, data_version, time.time(), slot)
+
+    def invalidate(self, data_version: Optional[str]) -> None:
+        """Drop every entry and only accept answers for the given data version from now on."""
+        with self._lock:
+            if self._entries:
+                self._counters["invalidations"] += 1
+            for key in list(self._entries):
+                self._remove(key)
+            self._data_version = data_version
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters and the current number of entries."""
+        with self._lock:
+            hits = self._counters["exact_hits"] + self._counters["semantic_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+    def _is_fresh(self, entry: _Entry) -> bool:
+        # Expired entries are removed when they are found
+        if entry.data_version == self._data_version and time.time() - entry.created <= self.ttl:
+            return True
+        self._remove(normalize_question(entry.question))
+        self._counters["expirations"] += 1
+        return False
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._matrix[entry.slot] = 0.0
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+
+def _normalize_vector(embedding: np.ndarray) -> np.ndarray:
+    vector = np.asarray(embedding, dtype="float32").reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
@@ -0,0 +1,194 @@
+"""
+Micro-batching dispatcher for vector store queries.
+
+Concurrent /ask requests each need one query embedding and one FAISS search. Both the
+SentenceTransformer and FAISS are much more efficient on batches, so the dispatcher gathers
+queries that arrive within a short window (up to a maximum batch size), runs them as one
+encode + search call on a single worker thread and hands each caller its own results.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class QueryBatcher:
+    """
+    Collects queries from many threads and executes them in batches.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[str], int], List[List[Dict[str, Any]]]],
+                 window_ms: float = 5.0, max_batch_size: int = 32, history_size: int = 1000,
+                 result_timeout: float = 60.0):
+        """
+        Start the dispatcher thread.
+
+        Args:
+            batch_fn: Function that takes a list of query texts and a top_k (and, when any
+                query has filters, the list of per-query filters; when any query comes with
+                its embedding, the per-query embeddings as query_embeddings) and returns one
+                result list per query (e.g. VectorStore.query_batch)
+            window_ms: How long to wait for more queries after the first one arrives
+            max_batch_size: Dispatch immediately once this many queries are waiting
+            history_size: Number of recent batches kept for the queueing delay percentiles
+            result_timeout: Seconds submit waits for its batch before giving up
+        """
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.result_timeout = result_timeout
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._max_batch = 0
+        self._size_histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._size_histogram["+Inf"] = 0
+        self._queue_delays = deque(maxlen=history_size)
+        # Guards _closed together with queueing, so nothing is queued after the close sentinel
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, query_text: str, top_k: int, filters: Optional[Dict[str, Any]] = None,
+               embedding: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Queue a query and block until its batch has been executed.
+
+        Args:
+            query_text: The query string
+            top_k: Number of results wanted for this query
+            filters: Optional structured filters for this query, passed on to batch_fn
+            embedding: Optional precomputed embedding of query_text, passed on to batch_fn
+
+        Returns:
+            The results for this query, in the same format as VectorStore.query
+
+        Raises:
+            RuntimeError: If the batcher is closed
+            concurrent.futures.TimeoutError: If the batch did not finish within result_timeout
+        """
+        future: Future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("QueryBatcher is closed")
+            self._queue.put((query_text, top_k, filters, time.perf_counter(), future, embedding))
+        return future.result(timeout=self.result_timeout)
+
+    def _collect(self) -> List[tuple]:
+        # Block for the first query, then gather more until the window closes or the batch is full
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Closing; finish this batch first
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            self._dispatch()
+        finally:
+            self._fail_pending()
+
+    def _dispatch(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            started = time.perf_counter()
+            self._record(len(batch), [started - item[3] for item in batch])
+
+            texts = [item[0] for item in batch]
+            max_k = max(item[1] for item in batch)
+            filters = [item[2] for item in batch]
+            embeddings = [item[5] for item in batch]
+            try:
+                # Filters and embeddings are only passed when a query has them, so plain batch
+                # functions still work
+                kwargs = {"query_embeddings": embeddings} if any(e is not None for e in embeddings) else {}
+                if any(filters):
+                    results = self.batch_fn(texts, max_k, filters, **kwargs)
+                else:
+                    results = self.batch_fn(texts, max_k, **kwargs)
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch function returned {len(results)} results for {len(batch)} queries")
+                for (_, top_k, _, _, future, _), result in zip(batch, results):
+                    future.set_result(result[:top_k])
+            except Exception as e:
+                logger.error(f"Error executing query batch of {len(batch)}: {str(e)}")
+                for item in batch:
+                    if not item[4].done():
+                        item[4].set_exception(e)
+
+    def _fail_pending(self):
+        # Queries still queued when the dispatcher stops would otherwise never be answered
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and not item[4].done():
+                item[4].set_exception(RuntimeError("QueryBatcher is closed"))
+
+    def _record(self, size: int, delays: List[float]):
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += size
+            self._max_batch = max(self._max_batch, size)
+            bucket = next((b for b in BATCH_SIZE_BUCKETS if size <= b), "+Inf")
+            self._size_histogram[bucket] += 1
+            self._queue_delays.extend(delays)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size and queueing delay statistics."""
+        with self._stats_lock:
+            delays_ms = np.array(self._queue_delays) * 1000
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0,
+                "max_batch_size": self._max_batch,
+                "batch_size_histogram": {str(bucket): count for bucket, count in self._size_histogram.items()},
+                "queue_delay_ms": {
+                    "p50": round(float(np.percentile(delays_ms, 50)), 3) if len(delays_ms) else 0,
+                    "p95": round(float(np.percentile(delays_ms, 95)), 3) if len(delays_ms) else 0,
+                    "max": round(float(delays_ms.max()), 3) if len(delays_ms) else 0
+                },
+                "pending": self._queue.qsize()
+            }
+
+    def close(self):
+        """Stop the dispatcher after the queries already queued have been executed."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=5)
@@ -0,0 +1,219 @@
+"""
+Pre-aggregated cubes for ad-hoc slice-and-dice analytics queries.
+
+A cube holds the additive measures (booking count and sums) of the bookings grouped by a
+set of dimensions. Every reported metric is a ratio of those measures, so any query whose
+filter and group-by dimensions are all in a cube is answered by filtering and rolling up
+that cube, which has at most a few thousand rows, instead of scanning the bookings table.
+Queries that no cube covers fall back to a vectorized scan of the bookings.
+"""
+
+import logging
+import time
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = (
+    'hotel', 'country', 'arrival_date_year', 'arrival_date_month',
+    'market_segment', 'customer_type', 'reserved_room_type'
+)
+TIME_DIMENSIONS = ('arrival_date_year', 'arrival_date_month')
+
+# Stored measure -> bookings column it sums; "bookings" is the row count
+MEASURE_SOURCES = {
+    'revenue': 'total_price',
+    'adr_sum': 'adr',
+    'canceled': 'is_canceled',
+    'lead_time_sum': 'lead_time',
+    'nights_sum': 'total_nights',
+}
+MEASURES = ('bookings',) + tuple(MEASURE_SOURCES)
+
+METRICS = ('bookings', 'revenue', 'adr', 'cancellation_rate', 'avg_lead_time', 'avg_length_of_stay')
+
+
+def default_cubes(max_dimensions: int = 2) -> List[Tuple[str, ...]]:
+    """
+    The cubes to materialize: year and month crossed with every combination of up to
+    max_dimensions of the other dimensions.
+
+    Parameters:
+        max_dimensions (int): Largest number of non-time dimensions in one cube
+
+    Returns:
+        List[Tuple[str, ...]]: The dimensions of each cube
+    """
+    others = [dim for dim in DIMENSIONS if dim not in TIME_DIMENSIONS]
+    return [
+        combo + TIME_DIMENSIONS
+        for size in range(max(0, min(max_dimensions, len(others))) + 1)
+        for combo in combinations(others, size)
+    ]
+
+
+def _rollup(frame: pd.DataFrame, dims: Sequence[str]) -> pd.DataFrame:
+    if not dims:
+        return frame[list(MEASURES)].sum().to_frame().T
+    return frame.groupby(list(dims), observed=True, sort=False)[list(MEASURES)].sum().reset_index()
+
+
+def _aggregate(df: pd.DataFrame, dims: Sequence[str]) -> pd.DataFrame:
+    """Sum the measures of the bookings in df per combination of dims."""
+    measures = {dim: df[dim] for dim in dims}
+    measures['bookings'] = np.ones(len(df), dtype=np.int64)
+    for measure, column in MEASURE_SOURCES.items():
+        measures[measure] = df[column]
+    return _rollup(pd.DataFrame(measures), dims)
+
+
+def _merge(cube: pd.DataFrame, added: pd.DataFrame, dims: Sequence[str]) -> pd.DataFrame:
+    merged = pd.concat([cube, added], ignore_index=True)
+    # Categoricals with different categories concatenate to object; make them categorical again
+    for dim in dims:
+        if isinstance(cube[dim].dtype, pd.CategoricalDtype) and not isinstance(merged[dim].dtype, pd.CategoricalDtype):
+            merged[dim] = merged[dim].astype('category')
+    return _rollup(merged, dims)
+
+
+def _derive(totals: pd.DataFrame, metrics: Iterable[str]) -> pd.DataFrame:
+    bookings = totals['bookings'].astype(np.int64)
+    derived = {
+        'bookings': lambda: bookings,
+        'revenue': lambda: totals['revenue'].round(2),
+        'adr': lambda: (totals['adr_sum'] / bookings).round(2),
+        'cancellation_rate': lambda: (totals['canceled'] / bookings * 100).round(2),
+        'avg_lead_time': lambda: (totals['lead_time_sum'] / bookings).round(2),
+        'avg_length_of_stay': lambda: (totals['nights_sum'] / bookings).round(2),
+    }
+    return pd.DataFrame({metric: derived[metric]() for metric in metrics}, index=totals.index)
+
+
+class AnalyticsCubes:
+    """
+    Materialized cubes over the bookings, with a scan fallback for uncovered queries.
+    """
+
+    def __init__(self, df: pd.DataFrame, cube_dimensions: Optional[Iterable[Sequence[str]]] = None,
+                 _cubes: Optional[Dict[Tuple[str, ...], pd.DataFrame]] = None):
+        """
+        Parameters:
+            df (pd.DataFrame): The bookings data
+            cube_dimensions (Iterable[Sequence[str]], optional): The cubes to materialize;
+                defaults to default_cubes()
+        """
+        self.df = df
+        if _cubes is None:
+            start = time.time()
+            dims_list = [tuple(dims) for dims in (cube_dimensions if cube_dimensions is not None else default_cubes())]
+            _cubes = {dims: _aggregate(df, dims) for dims in dims_list}
+            logger.info(f"Built {len(_cubes)} analytics cubes ({sum(len(c) for c in _cubes.values())} cells) "
+                        f"in {time.time() - start:.2f}s")
+        self.cubes = _cubes
+
+    def add_rows(self, new_rows: pd.DataFrame, df: pd.DataFrame) -> "AnalyticsCubes":
+        """
+        Return new cubes that also cover the given bookings.
+
+        Only the new rows are aggregated and merged into each cube. These cubes are left
+        unchanged, so readers holding them keep a consistent view.
+
+        Parameters:
+            new_rows (pd.DataFrame): The added bookings
+            df (pd.DataFrame): The bookings data including the added rows
+
+        Returns:
+            AnalyticsCubes: Cubes over the existing and the added bookings
+        """
+        cubes = {dims: _merge(cube, _aggregate(new_rows, dims), dims) for dims, cube in self.cubes.items()}
+        return AnalyticsCubes(df, _cubes=cubes)
+
+    def _normalize_filters(self, filters: Optional[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        normalized = {}
+        for dim, values in (filters or {}).items():
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown filter dimension '{dim}'; expected one of {list(DIMENSIONS)}")
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            try:
+                normalized[dim] = [int(v) if dim == 'arrival_date_year' else str(v) for v in values]
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid values for filter '{dim}': {list(values)}")
+        return normalized
+
+    def _select_cube(self, dims: Iterable[str]) -> Optional[Tuple[str, ...]]:
+        needed = set(dims)
+        covering = [key for key in self.cubes if needed <= set(key)]
+        if not covering:
+            return None
+        return min(covering, key=lambda key: len(self.cubes[key]))
+
+    def query(self, filters: Optional[Dict[str, Any]] = None, group_by: Optional[Sequence[str]] = None,
+              metrics: Optional[Sequence[str]] = None, order_by: Optional[str] = None,
+              descending: bool = True, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Compute metrics for the filtered bookings, grouped by the given dimensions.
+
+        Parameters:
+            filters (Dict[str, Any], optional): Dimension -> allowed value or list of values
+            group_by (Sequence[str], optional): Dimensions to group by; none gives one total row
+            metrics (Sequence[str], optional): Metrics to return; defaults to all of METRICS
+            order_by (str, optional): Metric or group-by dimension to sort by; defaults to
+                the group-by dimensions in ascending order
+            descending (bool): Sort order for order_by
+            limit (int, optional): Maximum number of rows to return
+
+        Returns:
+            Dict[str, Any]: The rows, their count, and the cube (or "scan") that answered
+
+        Raises:
+            ValueError: If a dimension, metric or ordering is unknown
+        """
+        filters = self._normalize_filters(filters)
+        group_by = list(dict.fromkeys(group_by or []))
+        metrics = list(dict.fromkeys(metrics or METRICS))
+        for dim in group_by:
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown group_by dimension '{dim}'; expected one of {list(DIMENSIONS)}")
+        for metric in metrics:
+            if metric not in METRICS:
+                raise ValueError(f"Unknown metric '{metric}'; expected one of {list(METRICS)}")
+        if order_by is not None and order_by not in metrics and order_by not in group_by:
+            raise ValueError("order_by must be one of the requested metrics or group_by dimensions")
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+
+        cube_key = self._select_cube(list(filters) + group_by)
+        frame = self.cubes[cube_key] if cube_key is not None else self.df
+        if filters:
+            mask = np.ones(len(frame), dtype=bool)
+            for dim, values in filters.items():
+                mask &= frame[dim].isin(values).to_numpy()
+            frame = frame[mask]
+        totals = _rollup(frame, group_by) if cube_key is not None else _aggregate(frame, group_by)
+        totals = totals[totals['bookings'] > 0]
+
+        result = pd.concat([totals[group_by], _derive(totals, metrics)], axis=1)
+        if order_by is not None:
+            result = result.sort_values(order_by, ascending=not descending, kind='stable')
+        elif group_by:
+            result = result.sort_values(group_by, kind='stable')
+        if limit is not None:
+            result = result.head(limit)
+        for dim in group_by:
+            if isinstance(result[dim].dtype, pd.CategoricalDtype):
+                result[dim] = result[dim].astype(object)
+
+        return {
+            "source": "cube:" + ",".join(cube_key) if cube_key is not None else "scan",
+            "group_by": group_by,
+            "metrics": metrics,
+            "row_count": len(result),
+            "rows": result.to_dict('records'),
+        }
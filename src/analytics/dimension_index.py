@@ -0,0 +1,232 @@
+"""
+Precomputed per-dimension aggregates and keyword matching for question metric extraction.
+
+HotelAnalytics._extract_relevant_metrics runs on every /ask call. Instead of scanning the
+bookings table for every country, month and year mentioned in a question, the aggregates
+(bookings, revenue, cancellations) are computed once per dimension value, and all keywords
+are found in a single pass over the question with an Aho-Corasick automaton.
+"""
+
+import calendar
+import copy
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import pandas as pd
+
+REVENUE_TERMS = ["revenue", "income", "earnings", "money"]
+MONTHS = [name.lower() for name in calendar.month_name[1:]]
+YEARS = ["2015", "2016", "2017", "2018", "2019"]
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton that finds every keyword occurring as a substring of a text in
+    time linear in the length of the text.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        # Trie as parallel lists: goto transitions, failure links and outputs per state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[str]] = [set()]
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(keyword)
+
+    def _build_failure_links(self):
+        # Breadth-first, so the failure target of a state is always processed before it
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        """
+        Return the set of keywords that occur anywhere in text.
+        """
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                found |= self._output[state]
+        return found
+
+
+def _aggregate(df: pd.DataFrame, key: pd.Series) -> Dict[Any, Tuple[int, float, int]]:
+    # (bookings, revenue, cancellations) per distinct key value, in order of first appearance
+    grouped = df.groupby(key, sort=False, observed=True).agg(
+        bookings=('total_price', 'size'),
+        revenue=('total_price', 'sum'),
+        canceled=('is_canceled', 'sum')
+    )
+    return {
+        value: (int(row.bookings), float(row.revenue), int(row.canceled))
+        for value, row in zip(grouped.index, grouped.itertuples(index=False))
+    }
+
+
+def _merge(existing: Dict[Any, Tuple[int, float, int]],
+           added: Dict[Any, Tuple[int, float, int]]) -> Dict[Any, Tuple[int, float, int]]:
+    # Sum the aggregates per key; new keys go last, matching their first appearance
+    merged = dict(existing)
+    for value, (bookings, revenue, canceled) in added.items():
+        old_bookings, old_revenue, old_canceled = merged.get(value, (0, 0.0, 0))
+        merged[value] = (old_bookings + bookings, old_revenue + revenue, old_canceled + canceled)
+    return merged
+
+
+class DimensionIndex:
+    """
+    Bookings, revenue and cancellation aggregates by country, arrival month and arrival year,
+    plus the overall totals, computed once from the bookings data.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.total_bookings = len(df)
+        self.total_revenue = float(df['total_price'].sum())
+        self.adr_sum = float(df['adr'].sum())
+        self.total_canceled = int(df['is_canceled'].sum())
+
+        self.by_country = _aggregate(df, df['country'])
+        self.by_month = _aggregate(df, df['arrival_date_month'].astype(str).str.lower())
+        self.by_year = _aggregate(df, df['arrival_date_year'])
+
+        self._build_matcher()
+
+    def _build_matcher(self):
+        # Missing countries cannot be asked about by name
+        self._country_keys = {str(country).lower(): country for country in self.by_country if pd.notna(country)}
+        self.matcher = KeywordMatcher(REVENUE_TERMS + MONTHS + YEARS + list(self._country_keys))
+
+    def add_rows(self, df: pd.DataFrame) -> "DimensionIndex":
+        """
+        Return a new index that also covers the given bookings.
+
+        Only the new rows are aggregated. This index is left unchanged, so readers holding it
+        keep a consistent view while the new one is built.
+
+        Parameters:
+            df (pd.DataFrame): The added bookings
+
+        Returns:
+            DimensionIndex: The index over the existing and the added bookings
+        """
+        added = DimensionIndex(df)
+        merged = copy.copy(self)
+        merged.total_bookings = self.total_bookings + added.total_bookings
+        merged.total_revenue = self.total_revenue + added.total_revenue
+        merged.adr_sum = self.adr_sum + added.adr_sum
+        merged.total_canceled = self.total_canceled + added.total_canceled
+        merged.by_country = _merge(self.by_country, added.by_country)
+        merged.by_month = _merge(self.by_month, added.by_month)
+        merged.by_year = _merge(self.by_year, added.by_year)
+        if set(merged.by_country) != set(self.by_country):
+            merged._build_matcher()
+        return merged
+
+    def lookup(self, dimension: str, value: Any) -> Dict[str, Any]:
+        """
+        Return the aggregates for one value of a dimension ('country', 'month' or 'year').
+        """
+        table = {"country": self.by_country, "month": self.by_month, "year": self.by_year}[dimension]
+        bookings, revenue, canceled = table.get(value, (0, 0.0, 0))
+        return {
+            "bookings": bookings,
+            "revenue": revenue,
+            "cancellation_rate": canceled / bookings * 100 if bookings else float("nan")
+        }
+
+    def extract_filters(self, question: str) -> Dict[str, List[Any]]:
+        """
+        Extract the countries, arrival months and arrival years a question names, as
+        retrieval filters keyed by bookings column.
+
+        Unlike extract_metrics, keywords must appear as whole words, so that e.g. the
+        country code "can" does not match "cancellations".
+
+        Parameters:
+            question (str): The question being asked
+
+        Returns:
+            Dict[str, List[Any]]: Column -> the values named in the question
+        """
+        question_lower = question.lower()
+        found = {keyword for keyword in self.matcher.find(question_lower)
+                 if re.search(rf"\b{re.escape(keyword)}\b", question_lower)}
+        filters = {
+            "country": [country for country_lower, country in self._country_keys.items() if country_lower in found],
+            "arrival_date_month": [month.capitalize() for month in MONTHS if month in found],
+            "arrival_date_year": [int(year) for year in YEARS if year in found],
+        }
+        return {column: values for column, values in filters.items() if values}
+
+    def extract_metrics(self, question: str) -> Dict[str, Any]:
+        """
+        Extract the metrics relevant to a question.
+
+        Parameters:
+            question (str): The question being asked
+
+        Returns:
+            Dict[str, Any]: A dictionary of relevant metrics
+        """
+        metrics = {}
+        question_lower = question.lower()
+        found = self.matcher.find(question_lower)
+
+        # Revenue related
+        if any(term in found for term in REVENUE_TERMS):
+            metrics["total_revenue"] = round(self.total_revenue, 2)
+
+        # Time period related
+        for month in MONTHS:
+            if month in found:
+                metrics[f"{month}_bookings"] = self.by_month.get(month, (0, 0.0, 0))[0]
+
+        for year in YEARS:
+            if year in found:
+                metrics[f"year_{year}_bookings"] = self.by_year.get(int(year), (0, 0.0, 0))[0]
+
+        # Country related, in the order countries first appear in the data
+        for country_lower, country in self._country_keys.items():
+            if country_lower in found:
+                bookings, revenue, canceled = self.by_country[country]
+                metrics[f"{country}_bookings"] = bookings
+                metrics[f"{country}_revenue"] = round(revenue, 2)
+                metrics[f"{country}_cancellation_rate"] = round(canceled / bookings * 100, 2)
+
+        # Add some general metrics if the question is generic
+        if len(metrics) < 2:
+            metrics["total_bookings"] = self.total_bookings
+            metrics["average_daily_rate"] = round(self.adr_sum / self.total_bookings, 2) if self.total_bookings else 0.0
+            metrics["cancellation_rate"] = (
+                round(self.total_canceled / self.total_bookings * 100, 2) if self.total_bookings else 0.0
+            )
+
+        return metrics
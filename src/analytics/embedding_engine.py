@@ -0,0 +1,207 @@
+"""
+Bulk embedding of texts for index builds.
+
+Encoding every booking summary is the longest step of an index build, and a single
+SentenceTransformer.encode call leaves most cores idle. The engine splits the texts into
+chunks and encodes them either in this process or sharded across a pool of worker
+processes, each with its own copy of the model and an equal share of the cores. Progress
+is reported after every chunk.
+
+Backends:
+- torch: the regular SentenceTransformer model, the same one used at query time
+- onnx:  the model exported to ONNX and run with ONNX Runtime (sentence-transformers'
+         backend="onnx"; needs `pip install "optimum[onnxruntime]"`). Embeddings match the
+         torch backend within float tolerance; optimized or quantized exports
+         (EMBEDDING_ONNX_FILE, e.g. "onnx/model_O3.onnx") trade some accuracy for speed
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx")
+
+# Called with (texts encoded so far, total texts) after every chunk
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass(frozen=True)
+class EmbeddingConfig:
+    """
+    How bulk embedding runs.
+
+    Attributes:
+        backend: One of BACKENDS
+        processes: Worker processes; 1 encodes in this process, 0 uses every core
+        batch_size: Texts per forward pass of the model
+        chunk_size: Texts per unit of work handed to a worker (and per progress report)
+        onnx_file: ONNX file inside the model repository for the onnx backend; empty for
+            the default export
+    """
+    backend: str = "torch"
+    processes: int = 1
+    batch_size: int = 64
+    chunk_size: int = 4096
+    onnx_file: str = ""
+
+    def __post_init__(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{self.backend}', expected one of {BACKENDS}")
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "EmbeddingConfig":
+        """Create a config from the deployment settings in src/config.py."""
+        from src import config
+        settings = dict(
+            backend=config.EMBEDDING_BACKEND,
+            processes=config.EMBEDDING_PROCESSES,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            onnx_file=config.EMBEDDING_ONNX_FILE
+        )
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**settings)
+
+    @property
+    def worker_count(self) -> int:
+        return self.processes if self.processes > 0 else (os.cpu_count() or 1)
+
+
+def load_model(model_name: str, backend: str = "torch", onnx_file: str = "", threads: int = 0):
+    """
+    Load a SentenceTransformer with the given backend.
+
+    Args:
+        model_name: SentenceTransformer model name or path
+        backend: One of BACKENDS
+        onnx_file: ONNX file to load for the onnx backend (default export when empty)
+        threads: Intra-op threads for the model; 0 keeps the library default
+
+    Returns:
+        The loaded model
+    """
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if onnx_file:
+        model_kwargs["file_name"] = onnx_file
+    if threads:
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        model_kwargs["session_options"] = options
+    return SentenceTransformer(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+
+# The model of a worker process, loaded once by _init_worker
+_worker_model = None
+
+
+def _init_worker(loader: Callable[..., Any], model_name: str, backend: str, onnx_file: str, threads: int):
+    global _worker_model
+    # Keep BLAS/OpenMP pools from using every core in every worker
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    _worker_model = loader(model_name, backend, onnx_file, threads)
+
+
+def _encode_chunk(start: int, texts: List[str], batch_size: int):
+    embeddings = _worker_model.encode(texts, batch_size=batch_size)
+    return start, np.asarray(embeddings, dtype="float32")
+
+
+class EmbeddingEngine:
+    """
+    Encodes large lists of texts in chunks, in this process or across a process pool.
+    """
+
+    def __init__(self, model_name: str, config: Optional[EmbeddingConfig] = None,
+                 progress: Optional[ProgressCallback] = None,
+                 loader: Callable[..., Any] = load_model):
+        """
+        Args:
+            model_name: SentenceTransformer model name or path
+            config: Backend, process count and batch sizes; defaults to EmbeddingConfig()
+            progress: Called with (encoded, total) after every chunk; progress is logged
+                when not given
+            loader: Function (model_name, backend, onnx_file, threads) -> model. Must be
+                picklable (a module-level function) when more than one process is used
+        """
+        self.model_name = model_name
+        self.config = config or EmbeddingConfig()
+        self.progress = progress or self._log_progress
+        self.loader = loader
+        self._started = 0.0
+
+    def _log_progress(self, done: int, total: int):
+        elapsed = time.perf_counter() - self._started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Encoded {done}/{total} texts ({rate:.0f} texts/s)")
+
+    def _local_model(self):
+        # The torch model is the one shared with query-time encoding
+        from src.analytics.model_registry import registry
+        if self.config.backend == "torch" and self.loader is load_model:
+            return registry.get(self.model_name)
+        key = f"{self.model_name}:{self.config.backend}:{self.config.onnx_file}"
+        return registry.get(key, loader=lambda _: self.loader(self.model_name, self.config.backend,
+                                                               self.config.onnx_file, 0))
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Encode texts into a float32 matrix, one row per text in input order.
+
+        Args:
+            texts: The texts to encode
+
+        Returns:
+            The embeddings, shape (len(texts), dimension)
+        """
+        texts = list(texts)
+        self._started = time.perf_counter()
+        chunk_size = max(1, self.config.chunk_size)
+        chunks = [(start, texts[start:start + chunk_size]) for start in range(0, len(texts), chunk_size)]
+        workers = min(self.config.worker_count, len(chunks))
+
+        if workers <= 1:
+            model = self._local_model()
+            parts, done = [], 0
+            for _, chunk in chunks:
+                parts.append(np.asarray(model.encode(chunk, batch_size=self.config.batch_size), dtype="float32"))
+                done += len(chunk)
+                self.progress(done, len(texts))
+            if not parts:
+                return np.asarray(model.encode(texts), dtype="float32")
+            return np.concatenate(parts)
+
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        logger.info(f"Encoding {len(texts)} texts with {workers} {self.config.backend} workers "
+                    f"({threads} threads each)")
+        results = {}
+        done = 0
+        # Spawned workers do not inherit the parent's thread pools or loaded models
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(self.loader, self.model_name, self.config.backend,
+                                           self.config.onnx_file, threads)) as executor:
+            futures = [executor.submit(_encode_chunk, start, chunk, self.config.batch_size)
+                       for start, chunk in chunks]
+            for future in as_completed(futures):
+                start, embeddings = future.result()
+                results[start] = embeddings
+                done += len(embeddings)
+                self.progress(done, len(texts))
+        return np.concatenate([results[start] for start, _ in chunks])
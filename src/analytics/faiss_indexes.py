@@ -0,0 +1,210 @@
+"""
+Construction and tuning of the FAISS indexes used by the vector store.
+
+Supported index types:
+- flat:     exact brute-force search (IndexFlatL2), the default
+- ivf_flat: inverted file with full vectors; search cost scales with nprobe/nlist
+- ivf_pq:   inverted file with product-quantized vectors; much smaller, lower recall
+- hnsw:     graph-based search; fast and accurate, larger memory footprint
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# FAISS warns when k-means gets fewer than this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+@dataclass(frozen=True)
+class IndexConfig:
+    """
+    Build and search parameters for a vector index.
+
+    Attributes:
+        index_type: One of INDEX_TYPES
+        nlist: Number of IVF cells; 0 picks 4 * sqrt(n) automatically
+        nprobe: Number of IVF cells visited per query
+        pq_m: Number of PQ sub-quantizers (must divide the embedding dimension)
+        pq_nbits: Bits per PQ code
+        hnsw_m: Number of HNSW graph neighbours per node
+        ef_construction: HNSW candidate list size while building
+        ef_search: HNSW candidate list size while searching
+        max_train_points: Upper bound on vectors sampled to train IVF/PQ
+    """
+    index_type: str = "flat"
+    nlist: int = 0
+    nprobe: int = 8
+    pq_m: int = 48
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+    max_train_points: int = 100_000
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{self.index_type}', expected one of {INDEX_TYPES}")
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "IndexConfig":
+        """Create a config from the deployment settings in src/config.py."""
+        from src import config
+        settings = dict(
+            index_type=config.VECTOR_INDEX_TYPE,
+            nlist=config.VECTOR_INDEX_NLIST,
+            nprobe=config.VECTOR_INDEX_NPROBE,
+            pq_m=config.VECTOR_INDEX_PQ_M,
+            hnsw_m=config.VECTOR_INDEX_HNSW_M,
+            ef_search=config.VECTOR_INDEX_EF_SEARCH
+        )
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**settings)
+
+    @property
+    def spec(self) -> str:
+        """A short identifier of the build parameters (search parameters are excluded)."""
+        if self.index_type == "ivf_flat":
+            return f"ivf_flat-nlist{self.nlist}"
+        if self.index_type == "ivf_pq":
+            return f"ivf_pq-nlist{self.nlist}-m{self.pq_m}-nbits{self.pq_nbits}"
+        if self.index_type == "hnsw":
+            return f"hnsw-m{self.hnsw_m}-efc{self.ef_construction}"
+        return "flat"
+
+
+def _resolve_nlist(requested: int, n_vectors: int) -> int:
+    nlist = requested or int(4 * math.sqrt(n_vectors))
+    # Keep enough training points per centroid for k-means to be meaningful
+    return max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def _resolve_pq_m(requested: int, dimension: int) -> int:
+    # The number of sub-quantizers must divide the dimension
+    m = min(requested, dimension)
+    while dimension % m:
+        m -= 1
+    return m
+
+
+def _training_sample(embeddings: np.ndarray, max_points: int) -> np.ndarray:
+    if len(embeddings) <= max_points:
+        return embeddings
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(embeddings), size=max_points, replace=False)
+    return embeddings[np.sort(sample)]
+
+
+def build_index(embeddings: np.ndarray, config: Optional[IndexConfig] = None):
+    """
+    Build, train and populate a FAISS index for the given embeddings.
+
+    Args:
+        embeddings: float32 matrix of shape (n, dimension)
+        config: Index parameters; defaults to an exact flat index
+
+    Returns:
+        The populated FAISS index with search parameters applied
+    """
+    config = config or IndexConfig()
+    n_vectors, dimension = embeddings.shape
+
+    if config.index_type == "flat" or n_vectors == 0:
+        index = faiss.IndexFlatL2(dimension)
+    elif config.index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, config.hnsw_m)
+        index.hnsw.efConstruction = config.ef_construction
+    else:
+        nlist = _resolve_nlist(config.nlist, n_vectors)
+        quantizer = faiss.IndexFlatL2(dimension)
+        if config.index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
+        else:
+            pq_m = _resolve_pq_m(config.pq_m, dimension)
+            # Each sub-quantizer trains 2**nbits centroids on the same points
+            nbits = max(1, min(config.pq_nbits, int(math.log2(max(n_vectors // MIN_POINTS_PER_CENTROID, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, nbits)
+        logger.info(f"Training {config.index_type} index with nlist={nlist} on up to {config.max_train_points} vectors")
+        index.train(_training_sample(embeddings, config.max_train_points))
+
+    index.add(embeddings)
+    set_search_params(index, nprobe=config.nprobe, ef_search=config.ef_search)
+    return index
+
+
+def set_search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    """
+    Apply query-time parameters to an index; parameters that do not apply are ignored.
+
+    Args:
+        index: A FAISS index built by build_index
+        nprobe: IVF cells visited per query
+        ef_search: HNSW candidate list size per query
+    """
+    if nprobe is not None:
+        try:
+            ivf = faiss.extract_index_ivf(index)
+            ivf.nprobe = min(nprobe, ivf.nlist)
+        except RuntimeError:
+            pass
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def index_memory_bytes(index) -> int:
+    """Approximate memory used by an index, measured as its serialized size."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def _selector_params(index, selector):
+    # IVF and HNSW indexes only accept their own parameter types; keep their tuned values
+    if hasattr(index, "hnsw"):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return faiss.SearchParameters(sel=selector)
+    return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+
+
+def search_subset(index, embeddings: np.ndarray, queries: np.ndarray, k: int, ids: np.ndarray,
+                  exact_max_rows: int = 20_000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Search only the vectors with the given ids.
+
+    Subsets of up to exact_max_rows vectors are searched exactly on their stored
+    embeddings, which costs time proportional to the subset. Larger subsets are searched
+    through the index with an ID selector, so IVF and HNSW indexes keep their sublinear cost.
+
+    Args:
+        index: A FAISS index built by build_index over embeddings
+        embeddings: float32 matrix of the indexed vectors, in id order
+        queries: float32 matrix of query vectors
+        k: Number of neighbours per query
+        ids: Sorted int64 ids of the vectors to search
+
+    Returns:
+        Distances and ids like index.search; missing neighbours have id -1
+    """
+    if len(ids) > exact_max_rows:
+        selector = faiss.IDSelectorBatch(ids)
+        return index.search(queries, k, params=_selector_params(index, selector))
+
+    distances = np.full((len(queries), k), np.inf, dtype="float32")
+    labels = np.full((len(queries), k), -1, dtype="int64")
+    found = min(k, len(ids))
+    if found:
+        subset_distances, positions = faiss.knn(queries, embeddings[ids], found)
+        distances[:, :found] = subset_distances
+        labels[:, :found] = np.where(positions >= 0, ids[np.maximum(positions, 0)], -1)
+    return distances, labels
@@ -0,0 +1,123 @@
+"""
+Append-only storage for data that grows by ingestion.
+
+Appending rows with np.concatenate or pd.concat copies everything that is already there, so
+ingesting one booking costs as much as the whole data. These buffers over-allocate instead
+and double their capacity when full, so an append only writes the new rows (amortized).
+They hand out views of the filled part. An append writes past the end of every view handed
+out so far, so readers holding a view keep seeing the same data while rows are added.
+
+The caller says where to append (the length of the last view it published), so rows that
+were written but never published are simply overwritten by the next append.
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class GrowableArray:
+    """
+    An array that grows along its first axis.
+    """
+
+    def __init__(self, array: np.ndarray):
+        """
+        Args:
+            array: The initial contents. Used as the buffer until the first append, which
+                copies it (read-only arrays, e.g. memory-mapped ones, are never written to)
+        """
+        self._buffer = array
+
+    def extend(self, length: int, values: Any) -> np.ndarray:
+        """
+        Write values after the first length entries.
+
+        Args:
+            length: Number of entries to keep, i.e. the length of the last published view
+            values: The entries to append
+
+        Returns:
+            A view of the length + len(values) entries
+        """
+        values = np.asarray(values, dtype=self._buffer.dtype)
+        needed = length + len(values)
+        if needed > len(self._buffer) or not self._buffer.flags.writeable:
+            buffer = np.empty((max(needed, 2 * length),) + self._buffer.shape[1:], dtype=self._buffer.dtype)
+            buffer[:length] = self._buffer[:length]
+            self._buffer = buffer
+        self._buffer[length:needed] = values
+        return self._buffer[:needed]
+
+
+class GrowableFrame:
+    """
+    A DataFrame that grows by appending rows, with one GrowableArray per column.
+
+    The published DataFrames are built from views of the column buffers without copying.
+    Categorical columns keep their codes in the buffer; values not among the categories yet
+    are added after the existing ones, so existing codes stay valid. A column whose values
+    need a wider dtype (e.g. missing values in an integer column) or that is backed by another
+    extension array is copied once in the new dtype.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: The initial rows; the DataFrame is not modified
+        """
+        self.columns = list(df.columns)
+        self._dtypes: Dict[str, Any] = {}
+        self._buffers: Dict[str, Optional[GrowableArray]] = {}
+        for column in self.columns:
+            self._track(column, df[column])
+
+    def _track(self, column: str, values: pd.Series):
+        dtype = values.dtype
+        self._dtypes[column] = dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            self._buffers[column] = GrowableArray(values.cat.codes.to_numpy())
+        elif isinstance(dtype, np.dtype):
+            self._buffers[column] = GrowableArray(values.to_numpy())
+        else:
+            # Other extension arrays are appended with pd.concat
+            self._buffers[column] = None
+
+    def extend(self, current: pd.DataFrame, rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Append rows after the last published DataFrame.
+
+        Args:
+            current: The last published DataFrame (or the initial one)
+            rows: The rows to append, with (at least) the same columns
+
+        Returns:
+            A DataFrame with the rows of current followed by rows, and a new RangeIndex
+        """
+        length = len(current)
+        columns = {}
+        for column in self.columns:
+            dtype, buffer = self._dtypes[column], self._buffers[column]
+            new = rows[column]
+            if isinstance(dtype, pd.CategoricalDtype):
+                values = new.astype(object) if isinstance(new.dtype, pd.CategoricalDtype) else new
+                added = pd.Index(values.dropna().unique()).difference(dtype.categories)
+                if len(added):
+                    dtype = pd.CategoricalDtype(dtype.categories.append(added), ordered=dtype.ordered)
+                codes = pd.Categorical(values, dtype=dtype).codes
+                if codes.dtype != buffer._buffer.dtype:
+                    # More categories than the codes' integer type holds
+                    buffer = GrowableArray(current[column].cat.codes.to_numpy().astype(codes.dtype))
+                view = buffer.extend(length, codes)
+                columns[column] = pd.Categorical.from_codes(view, dtype=dtype, validate=False)
+            elif buffer is not None and isinstance(new.dtype, np.dtype) \
+                    and np.result_type(buffer._buffer.dtype, new.dtype) == buffer._buffer.dtype:
+                columns[column] = buffer.extend(length, new.to_numpy())
+            else:
+                combined = pd.concat([current[column], new], ignore_index=True)
+                self._track(column, combined)
+                columns[column] = combined.to_numpy() if isinstance(combined.dtype, np.dtype) else combined.array
+                continue
+            self._dtypes[column], self._buffers[column] = dtype, buffer
+        return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,261 @@
+"""
+Persistent on-disk cache for the vector store artifacts.
+
+Each cache entry holds the embeddings matrix, the list of indexed texts (each distinct text
+once) and one serialized FAISS index per index configuration. Entries are keyed by a hash of
+the texts and the embedding model name, so a change to either one produces a new key and
+the index is rebuilt automatically. Switching the index type reuses the cached embeddings
+and only builds the new index.
+
+The cache can be prebuilt offline with:
+    python -m src.analytics.index_cache
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+
+import faiss
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump whenever the on-disk layout changes so stale entries are ignored
+CACHE_FORMAT_VERSION = 3
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+TEXTS_FILE = "texts.json"
+
+
+def compute_cache_key(texts: List[str], model_name: str) -> str:
+    """
+    Compute the cache key for a list of texts embedded with a given model.
+
+    Args:
+        texts: The texts that are embedded and indexed
+        model_name: The SentenceTransformer model used for the embeddings
+
+    Returns:
+        A hex digest identifying this exact combination of texts, model and cache format
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_FORMAT_VERSION}\0{model_name}\0{len(texts)}\0".encode("utf-8"))
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _entry_dir(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key)
+
+
+def _index_file(index_spec: str) -> str:
+    return f"index-{index_spec}.faiss"
+
+
+def load_index_cache(cache_dir: str, key: str, index_spec: str = "flat",
+                     load_texts: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Load a cache entry if one exists for the given key.
+
+    Args:
+        cache_dir: Root directory of the cache
+        key: Cache key from compute_cache_key
+        index_spec: Index configuration to load (IndexConfig.spec)
+        load_texts: Whether to also read the stored text list
+
+    Returns:
+        A dictionary with the manifest, embeddings, index (and texts if requested),
+        or None when there is no usable entry. The index is None when the embeddings are
+        cached but no index has been built for this index_spec yet.
+    """
+    entry_dir = _entry_dir(cache_dir, key)
+    manifest_path = os.path.join(entry_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != CACHE_FORMAT_VERSION or manifest.get("key") != key:
+            logger.warning(f"Ignoring incompatible index cache entry at {entry_dir}")
+            return None
+
+        embeddings = np.load(os.path.join(entry_dir, EMBEDDINGS_FILE))
+        index_path = os.path.join(entry_dir, _index_file(index_spec))
+        index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+        if embeddings.shape[0] != manifest["count"] or (index is not None and index.ntotal != manifest["count"]):
+            logger.warning(f"Index cache entry at {entry_dir} is inconsistent, ignoring it")
+            return None
+
+        entry = {"manifest": manifest, "embeddings": embeddings, "index": index}
+        if load_texts:
+            with open(os.path.join(entry_dir, TEXTS_FILE), "r", encoding="utf-8") as f:
+                entry["texts"] = json.load(f)
+        return entry
+    except Exception as e:
+        logger.warning(f"Failed to load index cache entry at {entry_dir}: {str(e)}")
+        return None
+
+
+def save_index_cache(cache_dir: str, key: str, model_name: str, texts: List[str],
+                     embeddings: np.ndarray, index: Any, index_spec: str = "flat",
+                     prune: bool = True) -> str:
+    """
+    Write a cache entry atomically.
+
+    The entry is written to a temporary directory and renamed into place, so concurrent
+    readers never observe a partially written entry. If the entry already exists only the
+    index for index_spec is added to it.
+
+    Args:
+        cache_dir: Root directory of the cache
+        key: Cache key from compute_cache_key
+        model_name: The SentenceTransformer model used for the embeddings
+        texts: The indexed texts
+        embeddings: The float32 embeddings matrix
+        index: The populated FAISS index
+        index_spec: Index configuration of the index (IndexConfig.spec)
+        prune: Whether to remove older entries built with the same model
+
+    Returns:
+        The path of the written cache entry
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    entry_dir = _entry_dir(cache_dir, key)
+    if os.path.exists(os.path.join(entry_dir, MANIFEST_FILE)):
+        _write_index_file(entry_dir, index, index_spec)
+        logger.info(f"Added {index_spec} index to cache entry {entry_dir}")
+        return entry_dir
+
+    tmp_dir = os.path.join(cache_dir, f".tmp-{key}-{uuid.uuid4().hex}")
+    os.makedirs(tmp_dir)
+
+    try:
+        np.save(os.path.join(tmp_dir, EMBEDDINGS_FILE), embeddings)
+        faiss.write_index(index, os.path.join(tmp_dir, _index_file(index_spec)))
+        with open(os.path.join(tmp_dir, TEXTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(texts, f, ensure_ascii=False)
+
+        manifest = {
+            "format_version": CACHE_FORMAT_VERSION,
+            "key": key,
+            "model_name": model_name,
+            "count": int(embeddings.shape[0]),
+            "dimension": int(embeddings.shape[1]),
+            "created_at": time.time()
+        }
+        # The manifest is written last; its presence marks the entry as complete
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(entry_dir):
+            # Another process already built the same entry
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, entry_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if prune:
+        prune_index_cache(cache_dir, model_name, keep=key)
+
+    logger.info(f"Index cache entry written to {entry_dir}")
+    return entry_dir
+
+
+def _write_index_file(entry_dir: str, index: Any, index_spec: str) -> None:
+    tmp_path = os.path.join(entry_dir, f".tmp-{uuid.uuid4().hex}.faiss")
+    try:
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, os.path.join(entry_dir, _index_file(index_spec)))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def prune_index_cache(cache_dir: str, model_name: str, keep: str) -> None:
+    """
+    Remove cache entries for the given model except the one to keep.
+
+    Args:
+        cache_dir: Root directory of the cache
+        model_name: Only entries built with this model are removed
+        keep: Key of the entry that must be kept
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name == keep or name.startswith("."):
+            continue
+        manifest_path = os.path.join(cache_dir, name, MANIFEST_FILE)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except Exception:
+            continue
+        if manifest.get("model_name") == model_name:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+            logger.info(f"Removed stale index cache entry {name}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Prebuild the index cache from the processed bookings data."""
+    from src import config
+    from src.analytics.embedding_engine import BACKENDS, EmbeddingConfig
+    from src.analytics.faiss_indexes import INDEX_TYPES, IndexConfig
+    from src.analytics.summaries import build_summary_column
+    from src.analytics.vector_store import VectorStore
+    from src.data.storage import ANALYTICS_COLUMNS, read_bookings
+
+    parser = argparse.ArgumentParser(description="Prebuild the vector store index cache.")
+    parser.add_argument("--data-path", default=config.PROCESSED_DATA_PATH,
+                        help="Processed bookings Parquet or CSV file to index")
+    parser.add_argument("--cache-dir", default=config.INDEX_CACHE_DIR,
+                        help="Directory where cache entries are stored")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME,
+                        help="SentenceTransformer model used for the embeddings")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=None,
+                        help="Index type to build (defaults to HOTEL_ANALYTICS_INDEX_TYPE)")
+    parser.add_argument("--embedding-backend", choices=BACKENDS, default=None,
+                        help="Embedding backend (defaults to HOTEL_ANALYTICS_EMBEDDING_BACKEND)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Embedding worker processes, 0 for one per core "
+                             "(defaults to HOTEL_ANALYTICS_EMBEDDING_PROCESSES)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Texts per embedding forward pass (defaults to HOTEL_ANALYTICS_EMBEDDING_BATCH_SIZE)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild the entry even if it already exists")
+    args = parser.parse_args(argv)
+
+    start_time = time.time()
+    df = read_bookings(args.data_path, columns=None if config.LOAD_ALL_COLUMNS else ANALYTICS_COLUMNS)
+    df['summary'] = build_summary_column(df)
+
+    if args.force:
+        key = compute_cache_key(list(pd.unique(df['summary'])), args.model)
+        shutil.rmtree(_entry_dir(args.cache_dir, key), ignore_errors=True)
+
+    index_config = IndexConfig.from_settings(index_type=args.index_type)
+    embedding_config = EmbeddingConfig.from_settings(backend=args.embedding_backend, processes=args.processes,
+                                                     batch_size=args.batch_size)
+    store = VectorStore(df, text_column='summary', model_name=args.model, cache_dir=args.cache_dir,
+                        index_config=index_config, embedding_config=embedding_config)
+    logger.info(f"Index cache ready for {store.index.ntotal} texts in {time.time() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
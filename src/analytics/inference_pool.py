@@ -0,0 +1,310 @@
+"""
+Bounded worker pool with admission control for LLM inference.
+
+Answering a question runs the embedding model, the vector search and an LLM generation that
+can take seconds of CPU time. Running an unbounded number of those concurrently makes every
+request slow, so inference runs on a dedicated pool with a fixed number of concurrent slots
+and a bounded queue. Requests that do not fit in the queue are rejected immediately, and
+queued requests give up when their deadline passes.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PoolFullError(Exception):
+    """The queue is full; retry after retry_after seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """The request did not get a slot (or finish) before its deadline."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """
+    A request queued for a slot. The release that frees a slot hands it to the first waiter,
+    which is a blocked thread or, for acquire_async(), a future on an event loop.
+    """
+
+    def __init__(self, enqueued_at: float, deadline: float, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.enqueued_at = enqueued_at
+        self.deadline = deadline
+        # "granted" or "expired" once woken; set with the pool lock held
+        self.outcome: Optional[str] = None
+        self._loop = loop
+        self._event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def wake(self, outcome: str):
+        self.outcome = outcome
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        # The waiting coroutine may have stopped waiting (timeout or cancellation) already
+        if not self.future.done():
+            self.future.set_result(None)
+
+    def wait(self, timeout: float):
+        self._event.wait(max(timeout, 0))
+
+
+class InferencePool:
+    """
+    Runs inference calls with at most max_concurrency running at once and at most max_queue
+    waiting. Streaming requests, which run outside the pool's threads, hold a slot with
+    acquire() or acquire_async() and release(). Slots are handed out in arrival order.
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 16, timeout: float = 120.0,
+                 history_size: int = 1000):
+        """
+        Args:
+            max_concurrency: Maximum number of inference calls running at the same time
+            max_queue: Maximum number of requests waiting for a slot
+            timeout: Default per-request deadline in seconds, measured from submission
+            history_size: Number of recent requests kept for the wait time percentiles
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="inference")
+        self._lock = threading.RLock()
+        self._waiters = deque()
+        self._active = 0
+        self._queued = 0
+        self._counters = {"completed": 0, "failed": 0, "rejected": 0, "expired": 0}
+        self._waits = deque(maxlen=history_size)
+        # Moving average of how long a request holds a slot, for Retry-After estimates
+        self._avg_service = 1.0
+
+    def _retry_after(self) -> int:
+        # Time for the requests ahead to drain, assuming the recent average service time
+        backlog = (self._queued + self._active) / self.max_concurrency
+        return int(min(max(math.ceil(self._avg_service * backlog), 1), 300))
+
+    def _enqueue(self):
+        with self._lock:
+            # Only requests that cannot get a slot straight away count against the queue limit
+            if self._queued + self._active - self.max_concurrency >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise PoolFullError(self._retry_after())
+            self._queued += 1
+
+    def _dequeue_expired(self):
+        with self._lock:
+            self._queued -= 1
+            self._counters["expired"] += 1
+
+    def _expired(self) -> DeadlineExceededError:
+        return DeadlineExceededError("Timed out waiting for an inference slot", self._retry_after())
+
+    def _take_or_wait(self, enqueued_at: float, deadline: float,
+                      loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Waiter]:
+        """
+        Take a slot for an enqueued request if one is free and nobody is waiting for it, or
+        queue a waiter. Returns None when the slot was taken.
+        """
+        with self._lock:
+            if time.monotonic() > deadline:
+                self._queued -= 1
+                self._counters["expired"] += 1
+                raise self._expired()
+            if self._active < self.max_concurrency and not self._waiters:
+                self._queued -= 1
+                self._active += 1
+                self._waits.append(time.monotonic() - enqueued_at)
+                return None
+            waiter = _Waiter(enqueued_at, deadline, loop)
+            self._waiters.append(waiter)
+            return waiter
+
+    def _hand_out(self):
+        # Called with the lock held: give free slots to the first waiters. Waiters whose
+        # deadline has passed are woken with an error instead of taking a slot
+        now = time.monotonic()
+        while self._waiters and self._active < self.max_concurrency:
+            waiter = self._waiters.popleft()
+            self._queued -= 1
+            if now > waiter.deadline:
+                self._counters["expired"] += 1
+                waiter.wake("expired")
+            else:
+                self._active += 1
+                self._waits.append(now - waiter.enqueued_at)
+                waiter.wake("granted")
+
+    def _settle(self, waiter: _Waiter):
+        """
+        Called when a waiter stopped waiting: returns if it was given a slot, and raises
+        DeadlineExceededError otherwise.
+        """
+        with self._lock:
+            if waiter.outcome == "granted":
+                return
+            if waiter.outcome is None:
+                # Timed out before any slot was handed to it
+                self._waiters.remove(waiter)
+                self._queued -= 1
+                self._counters["expired"] += 1
+            raise self._expired()
+
+    def _abandon(self, waiter: _Waiter):
+        """A waiting coroutine was cancelled: give up its place, or its slot if it got one."""
+        with self._lock:
+            if waiter.outcome == "granted":
+                self._active -= 1
+                self._hand_out()
+            elif waiter.outcome is None:
+                self._waiters.remove(waiter)
+                self._queued -= 1
+                self._counters["expired"] += 1
+
+    def _acquire(self, enqueued_at: float, deadline: float):
+        waiter = self._take_or_wait(enqueued_at, deadline)
+        if waiter is not None:
+            waiter.wait(deadline - time.monotonic())
+            self._settle(waiter)
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a slot, blocking the calling thread. Pair with release().
+
+        Args:
+            timeout: Deadline in seconds; defaults to the pool timeout
+
+        Returns:
+            The time the slot was acquired, to pass to release()
+
+        Raises:
+            PoolFullError: If the queue is full
+            DeadlineExceededError: If no slot became free before the deadline
+        """
+        enqueued_at = time.monotonic()
+        self._enqueue()
+        self._acquire(enqueued_at, enqueued_at + (timeout or self.timeout))
+        return time.monotonic()
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> float:
+        """
+        Wait for a slot without blocking the event loop or a thread. Pair with release().
+        A coroutine cancelled while waiting gives up its place in the queue.
+
+        Args:
+            timeout: Deadline in seconds; defaults to the pool timeout
+
+        Returns:
+            The time the slot was acquired, to pass to release()
+
+        Raises:
+            PoolFullError: If the queue is full
+            DeadlineExceededError: If no slot became free before the deadline
+        """
+        enqueued_at = time.monotonic()
+        deadline = enqueued_at + (timeout or self.timeout)
+        self._enqueue()
+        waiter = self._take_or_wait(enqueued_at, deadline, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter.future, max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+            self._settle(waiter)
+        return time.monotonic()
+
+    def release(self, acquired_at: float, failed: bool = False):
+        """Give a slot back and record how long it was held."""
+        with self._lock:
+            self._active -= 1
+            self._counters["failed" if failed else "completed"] += 1
+            self._avg_service = 0.8 * self._avg_service + 0.2 * (time.monotonic() - acquired_at)
+            self._hand_out()
+
+    def submit(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) to run on the pool.
+
+        Raises:
+            PoolFullError: If the queue is full (raised immediately, nothing is queued)
+        """
+        enqueued_at = time.monotonic()
+        deadline = enqueued_at + (timeout or self.timeout)
+        self._enqueue()
+
+        def _task():
+            self._acquire(enqueued_at, deadline)
+            acquired_at = time.monotonic()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.release(acquired_at, failed=failed)
+
+        future = self._executor.submit(_task)
+        # A request cancelled before a worker picked it up never reaches _acquire
+        future.add_done_callback(lambda f: self._dequeue_expired() if f.cancelled() else None)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the pool and wait for the result without blocking the event loop.
+
+        Raises:
+            PoolFullError: If the queue is full
+            DeadlineExceededError: If the result is not ready before the deadline. A call that
+                had already started keeps running; its result is discarded.
+        """
+        timeout = timeout or self.timeout
+        future = self.submit(fn, *args, timeout=timeout, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("Inference did not finish before the deadline", self._retry_after())
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, slot usage, counters and queue wait percentiles."""
+        with self._lock:
+            waits_ms = np.array(self._waits) * 1000
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queued": self._queued,
+                "max_queue": self.max_queue,
+                **self._counters,
+                "queue_wait_ms": {
+                    "p50": round(float(np.percentile(waits_ms, 50)), 1) if len(waits_ms) else 0,
+                    "p95": round(float(np.percentile(waits_ms, 95)), 1) if len(waits_ms) else 0,
+                    "max": round(float(waits_ms.max()), 1) if len(waits_ms) else 0
+                },
+                "avg_service_seconds": round(self._avg_service, 3)
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -3,31 +3,366 @@ LLM-powered reasoning module for the Hotel Analytics system.
 Uses a lightweight open-source LLM model to provide context-aware answers.
 """
 
+import copy
 import os
+import queue
+import threading
+import time
+import numpy as np
 import torch
-from typing import List, Dict, Any, Optional, Tuple
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from transformers import (AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList,
+                          TextIteratorStreamer)
 from sentence_transformers import SentenceTransformer
+from src.analytics.metrics import stage_timer
+from src.analytics.prompting import PROMPT_PREFIX, PromptBuilder
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Weight formats for inference: full precision, dynamic int8 linear layers (CPU only) or bfloat16
+QUANTIZATION_MODES = ("none", "int8", "bf16")
+
+# Sampling settings shared by blocking and streaming generation
+GENERATION_KWARGS = {"max_new_tokens": 150, "do_sample": True, "temperature": 0.7, "top_p": 0.9}
+
+class _StreamControl(StoppingCriteria):
+    """
+    Stopping criterion that ends generation once the stop event is set, and records when
+    each new token was produced.
+    """
+    
+    def __init__(self, stop_event: threading.Event):
+        self.stop_event = stop_event
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.last_token_at = None
+        self.tokens = 0
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
+        # Called once per decoding step, after the new token has been appended
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.last_token_at = now
+        self.tokens += 1
+        return self.stop_event.is_set()
+    
+    def stats(self, cancelled: bool) -> Dict[str, Any]:
+        ttft = (self.first_token_at - self.started) if self.first_token_at else None
+        decode_seconds = (self.last_token_at - self.first_token_at) if self.first_token_at else 0.0
+        return {
+            "ttft_seconds": round(ttft, 3) if ttft is not None else None,
+            "tokens": self.tokens,
+            # The first token is produced by the prompt forward pass, the rest by decoding
+            "tokens_per_second": round((self.tokens - 1) / decode_seconds, 2) if decode_seconds > 0 else None,
+            "cancelled": cancelled
+        }
+
+def _to_legacy_cache(cache):
+    # Newer transformers return Cache objects; the scheduler edits the per-layer tensors
+    if hasattr(cache, "to_legacy_cache"):
+        return cache.to_legacy_cache()
+    if hasattr(cache, "layers"):
+        return tuple((layer.keys, layer.values) for layer in cache.layers)
+    return cache
+
+def _from_legacy_cache(cache):
+    try:
+        from transformers import DynamicCache
+    except ImportError:
+        return cache
+    if hasattr(DynamicCache, "from_legacy_cache"):
+        return DynamicCache.from_legacy_cache(cache)
+    return DynamicCache(cache)
+
+def _left_pad(tensor: torch.Tensor, width: int, dim: int) -> torch.Tensor:
+    missing = width - tensor.shape[dim]
+    if missing <= 0:
+        return tensor
+    shape = list(tensor.shape)
+    shape[dim] = missing
+    return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+class _Sequence:
+    """A generation request in the running batch."""
+    
+    def __init__(self, prompt_ids: List[int], max_new_tokens: int, future: Future):
+        self.prompt_ids = prompt_ids
+        self.max_new_tokens = max_new_tokens
+        self.future = future
+        self.generated: List[int] = []
+        self.submitted = time.perf_counter()
+
+class GenerationScheduler:
+    """
+    Continuous batching of generation requests.
+    
+    A single scheduler thread owns the decode loop. Prompts that arrive while a batch is
+    running are prefilled together and merged into it (left padded, with their KV caches
+    aligned), every decoding step runs one forward pass for all running sequences, and
+    sequences that finish are removed from the batch straight away so waiting prompts can
+    take their place.
+    
+    When a prefix is given, every prompt is prefix + submitted text. The prefix is run through
+    the model once (or its KV cache is passed in); each new row starts from a copy of its KV
+    cache, with the padding placed between the prefix and the submitted text.
+    """
+    
+    def __init__(self, model, tokenizer, max_batch_size: int = 8, max_new_tokens: int = 150,
+                 do_sample: bool = True, temperature: float = 0.7, top_p: float = 0.9,
+                 stop_at_eos: bool = True, prefix: Optional[str] = None,
+                 prefix_cache: Optional[Tuple[torch.Tensor, Any]] = None, history_size: int = 1000):
+        """
+        Start the scheduler thread.
+        
+        Args:
+            model: A causal language model that accepts position_ids and past_key_values
+            tokenizer: The model's tokenizer
+            max_batch_size: Maximum number of sequences decoded together
+            max_new_tokens: Default generation length limit
+            do_sample: Sample with temperature and top_p; otherwise decode greedily
+            temperature: Sampling temperature
+            top_p: Nucleus sampling probability mass
+            stop_at_eos: End a sequence at the EOS token (disable to benchmark fixed lengths)
+            prefix: Text that starts every prompt, prefilled only once
+            prefix_cache: The prefix's token ids and KV cache, if the caller already computed them
+                (e.g. LLMReasoner); the prefix is then not run through the model again
+            history_size: Number of recent requests kept for the latency percentiles
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.do_sample = do_sample
+        self.temperature = temperature
+        self.top_p = top_p
+        self.stop_at_eos = stop_at_eos
+        self.prefix = prefix
+        self._prefix_ids, self._prefix_cache = (None, None) if prefix_cache is None else \
+            (prefix_cache[0], _to_legacy_cache(prefix_cache[1]))
+        self.eos_token_id = tokenizer.eos_token_id
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._counters = {"requests": 0, "failed": 0, "steps": 0, "tokens": 0}
+        self._max_batch = 0
+        self._busy_seconds = 0.0
+        self._latencies = deque(maxlen=history_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="llm-scheduler", daemon=True)
+        self._thread.start()
+    
+    def submit(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        """
+        Queue a prompt and block until its completion has been generated.
+        
+        Args:
+            prompt: The prompt text (following the prefix, if there is one)
+            max_new_tokens: Generation length limit for this prompt
+        
+        Returns:
+            The generated text, without the prompt
+        """
+        if self._closed:
+            raise RuntimeError("GenerationScheduler is closed")
+        future: Future = Future()
+        prompt_ids = list(self.tokenizer(prompt, add_special_tokens=self.prefix is None)["input_ids"])
+        self._queue.put(_Sequence(prompt_ids, max_new_tokens or self.max_new_tokens, future))
+        return future.result()
+    
+    def _run(self):
+        rows: List[_Sequence] = []
+        state = None
+        stopping = False
+        while rows or not stopping:
+            # Block only when idle; otherwise admit whatever arrived during the last step
+            new = []
+            if not rows:
+                item = self._queue.get()
+                if item is None:
+                    return
+                new.append(item)
+            while not stopping and len(rows) + len(new) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Closing; finish the running sequences first
+                    stopping = True
+                else:
+                    new.append(item)
+            
+            started = time.perf_counter()
+            try:
+                with torch.inference_mode():
+                    if rows:
+                        state = self._decode(state)
+                        for sequence, token in zip(rows, state[2].tolist()):
+                            sequence.generated.append(token)
+                    if new:
+                        prefilled = self._prefill(new)
+                        for sequence, token in zip(new, prefilled[2].tolist()):
+                            sequence.generated.append(token)
+                        state = prefilled if state is None else self._merge(state, prefilled)
+                        rows.extend(new)
+                    # Every running sequence produced one token in this step
+                    self._record_step(len(rows), time.perf_counter() - started)
+                    state = self._retire(rows, state)
+            except Exception as e:
+                failed = rows + [sequence for sequence in new if sequence not in rows]
+                logger.error(f"Error in generation batch of {len(failed)}: {str(e)}")
+                for sequence in failed:
+                    if not sequence.future.done():
+                        sequence.future.set_exception(e)
+                with self._stats_lock:
+                    self._counters["failed"] += len(failed)
+                rows, state = [], None
+    
+    def _prefill(self, sequences: List[_Sequence]) -> Tuple[Any, torch.Tensor, torch.Tensor]:
+        # Left-pad the prompts so that every row's next token is in the last column
+        width = max(len(sequence.prompt_ids) for sequence in sequences)
+        input_ids = torch.full((len(sequences), width), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+        for i, sequence in enumerate(sequences):
+            length = len(sequence.prompt_ids)
+            input_ids[i, width - length:] = torch.tensor(sequence.prompt_ids, dtype=torch.long)
+            attention_mask[i, width - length:] = 1
+        device = self.model.device
+        input_ids, attention_mask = input_ids.to(device), attention_mask.to(device)
+        cache = None
+        prefix_cache = self._encode_prefix()
+        if prefix_cache is not None:
+            prefix_length = self._prefix_ids.shape[1]
+            attention_mask = torch.cat([attention_mask.new_ones((len(sequences), prefix_length)), attention_mask], dim=1)
+            cache = _from_legacy_cache(tuple(
+                tuple(t.expand(len(sequences), *t.shape[1:]).contiguous() for t in layer) for layer in prefix_cache
+            ))
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)[:, -width:]
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, position_ids=position_ids,
+                             past_key_values=cache, use_cache=True)
+        return _to_legacy_cache(outputs.past_key_values), attention_mask, self._sample(outputs.logits[:, -1, :])
+    
+    def _encode_prefix(self):
+        # Computed on the scheduler thread the first time it is needed, unless it was passed in
+        if self.prefix is not None and self._prefix_cache is None:
+            ids = torch.tensor([self.tokenizer(self.prefix)["input_ids"]], dtype=torch.long, device=self.model.device)
+            outputs = self.model(input_ids=ids, attention_mask=torch.ones_like(ids),
+                                 position_ids=torch.arange(ids.shape[1], device=ids.device)[None, :], use_cache=True)
+            self._prefix_ids, self._prefix_cache = ids, _to_legacy_cache(outputs.past_key_values)
+        return self._prefix_cache
+    
+    def _decode(self, state) -> Tuple[Any, torch.Tensor, torch.Tensor]:
+        # The attention mask always covers the cached positions; extend it by the fed token
+        cache, attention_mask, tokens = state
+        attention_mask = torch.cat([attention_mask, attention_mask.new_ones((attention_mask.shape[0], 1))], dim=1)
+        position_ids = attention_mask.sum(-1, keepdim=True) - 1
+        outputs = self.model(input_ids=tokens[:, None], attention_mask=attention_mask, position_ids=position_ids,
+                             past_key_values=_from_legacy_cache(cache), use_cache=True)
+        return _to_legacy_cache(outputs.past_key_values), attention_mask, self._sample(outputs.logits[:, -1, :])
+    
+    @staticmethod
+    def _merge(running, added) -> Tuple[Any, torch.Tensor, torch.Tensor]:
+        # Align both batches to the longer cache by left padding, then stack the rows
+        width = max(running[1].shape[1], added[1].shape[1])
+        cache = tuple(
+            tuple(torch.cat([_left_pad(a, width, dim=2), _left_pad(b, width, dim=2)]) for a, b in zip(layer_a, layer_b))
+            for layer_a, layer_b in zip(running[0], added[0])
+        )
+        attention_mask = torch.cat([_left_pad(running[1], width, dim=1), _left_pad(added[1], width, dim=1)])
+        return cache, attention_mask, torch.cat([running[2], added[2]])
+    
+    def _retire(self, rows: List[_Sequence], state):
+        keep = []
+        for i, sequence in enumerate(rows):
+            finished_at_eos = self.stop_at_eos and sequence.generated[-1] == self.eos_token_id
+            if finished_at_eos or len(sequence.generated) >= sequence.max_new_tokens:
+                text = self.tokenizer.decode(sequence.generated, skip_special_tokens=True)
+                sequence.future.set_result(text)
+                with self._stats_lock:
+                    self._counters["requests"] += 1
+                    self._latencies.append(time.perf_counter() - sequence.submitted)
+            else:
+                keep.append(i)
+        if len(keep) == len(rows):
+            return state
+        rows[:] = [rows[i] for i in keep]
+        if not keep:
+            return None
+        cache, attention_mask, tokens = state
+        index = torch.tensor(keep, device=attention_mask.device)
+        attention_mask = attention_mask.index_select(0, index)
+        # Drop the leading columns that only finished sequences attended to
+        first = int(torch.nonzero(attention_mask.any(dim=0))[0])
+        cache = tuple(tuple(t.index_select(0, index)[:, :, first:] for t in layer) for layer in cache)
+        return cache, attention_mask[:, first:], tokens.index_select(0, index)
+    
+    def _sample(self, logits: torch.Tensor) -> torch.Tensor:
+        logits = logits.float()
+        if not self.do_sample:
+            return logits.argmax(dim=-1)
+        probs = torch.softmax(logits / self.temperature, dim=-1)
+        sorted_probs, sorted_ids = probs.sort(dim=-1, descending=True)
+        # Keep the smallest set of tokens whose probability mass reaches top_p
+        sorted_probs[(sorted_probs.cumsum(dim=-1) - sorted_probs) > self.top_p] = 0
+        choice = torch.multinomial(sorted_probs, 1)
+        return sorted_ids.gather(-1, choice).squeeze(-1)
+    
+    def _record_step(self, batch_size: int, seconds: float):
+        with self._stats_lock:
+            self._counters["steps"] += 1
+            self._counters["tokens"] += batch_size
+            self._max_batch = max(self._max_batch, batch_size)
+            self._busy_seconds += seconds
+    
+    def stats(self) -> Dict[str, Any]:
+        """Aggregate throughput, batch sizes and per-request latency."""
+        with self._stats_lock:
+            latencies = np.array(self._latencies)
+            steps = self._counters["steps"]
+            return {
+                **self._counters,
+                "avg_batch_size": round(self._counters["tokens"] / steps, 2) if steps else 0,
+                "max_batch_size": self._max_batch,
+                "tokens_per_second": round(self._counters["tokens"] / self._busy_seconds, 2) if self._busy_seconds else 0,
+                "latency_seconds": {
+                    "p50": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else 0,
+                    "p95": round(float(np.percentile(latencies, 95)), 3) if len(latencies) else 0
+                },
+                "pending": self._queue.qsize()
+            }
+    
+    def close(self):
+        """Stop the scheduler after the queued and running requests have finished."""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=60)
+
 class LLMReasoner:
     """
     LLM-based reasoning component that enhances the RAG pipeline with generative capabilities.
     Uses a lightweight open-source model (Phi-2) for inference.
     """
     
-    def __init__(self, model_name: str = "microsoft/phi-2", device: str = None):
+    def __init__(self, model_name: str = "microsoft/phi-2", device: str = None, quantization: str = "none",
+                 context_token_budget: int = 384):
         """
         Initialize the LLM reasoner with the specified model.
         
         Args:
             model_name: The Hugging Face model identifier
             device: Device to run on ('cpu', 'cuda', 'mps'). If None, automatically detect.
+            quantization: One of QUANTIZATION_MODES. 'int8' quantizes the linear layers
+                dynamically and only applies on CPU; 'bf16' loads the weights in bfloat16.
+            context_token_budget: Maximum prompt tokens spent on retrieved context and metadata
         """
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode {quantization!r}, expected one of {QUANTIZATION_MODES}")
         self.model_name = model_name
         
         # Automatically detect the best available device if not specified
@@ -37,37 +372,97 @@ class LLMReasoner:
                 self.device = "mps"  # For Apple Silicon
         else:
             self.device = device
+        
+        if quantization == "int8" and self.device != "cpu":
+            logger.warning(f"int8 quantization is only supported on CPU, loading without it on {self.device}")
+            quantization = "none"
+        self.quantization = quantization
             
-        logger.info(f"Initializing LLM Reasoner with model {model_name} on {self.device}")
+        logger.info(f"Initializing LLM Reasoner with model {model_name} on {self.device} (quantization: {quantization})")
         
         try:
-            # Load the model with 8-bit quantization for efficiency
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model = self._load_model(model_name)
+            self.prompt_builder = PromptBuilder(self.tokenizer, max_context_tokens=context_token_budget)
             
-            # Use lower precision for efficiency
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                torch_dtype=torch.float16 if self.device != "cpu" else torch.float32,
-                device_map=self.device,
-                low_cpu_mem_usage=True
-            )
+            # Every prompt starts with the same instructions; their KV cache is computed once
+            self._prefix_ids, self._prefix_cache = self._encode_prefix()
             
-            # Create a text generation pipeline
-            self.generator = pipeline(
-                "text-generation",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                max_length=512,
-                do_sample=True,
-                temperature=0.7,
-                top_p=0.9
-            )
+            # Prompts are generated one at a time until enable_batching() is called
+            self.scheduler = None
             
             logger.info("LLM Reasoner initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing LLM: {str(e)}")
             raise
     
+    def _load_model(self, model_name: str):
+        """
+        Load the model weights in the configured precision.
+        """
+        if self.quantization == "bf16":
+            dtype = torch.bfloat16
+        else:
+            # Use lower precision for efficiency on accelerators
+            dtype = torch.float16 if self.device != "cpu" else torch.float32
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            torch_dtype=dtype,
+            device_map=self.device,
+            low_cpu_mem_usage=True
+        )
+        model.eval()
+        
+        if self.quantization == "int8":
+            # Linear layers hold nearly all of the weights; store them as int8 and quantize
+            # activations on the fly. Replacing the layers in place frees the float32 weights.
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return model
+    
+    def enable_batching(self, max_batch_size: int = 8):
+        """
+        Routes generate_answer() through a continuous batching scheduler, so concurrent
+        questions are decoded together instead of one after another.
+        
+        Args:
+            max_batch_size: Maximum number of answers generated together
+        """
+        if self.scheduler is None and max_batch_size > 1:
+            # The scheduler starts its rows from the prefix cache computed at load time
+            self.scheduler = GenerationScheduler(self.model, self.tokenizer, max_batch_size=max_batch_size,
+                                                 prefix=PROMPT_PREFIX,
+                                                 prefix_cache=(self._prefix_ids, self._prefix_cache),
+                                                 **GENERATION_KWARGS)
+    
+    def _encode_prefix(self):
+        """
+        Run the instruction prefix through the model once and keep its token ids and KV cache,
+        for single requests and for the batching scheduler alike.
+        """
+        ids = self.tokenizer(PROMPT_PREFIX, return_tensors="pt")["input_ids"].to(self.model.device)
+        with torch.no_grad():
+            cache = self.model(input_ids=ids, use_cache=True).past_key_values
+        return ids, cache
+    
+    def _prefixed_inputs(self, body: str) -> Dict[str, Any]:
+        """
+        Generation inputs for PROMPT_PREFIX + body that reuse the cached prefix.
+        """
+        body_ids = self.tokenizer(body, add_special_tokens=False, return_tensors="pt")["input_ids"]
+        input_ids = torch.cat([self._prefix_ids, body_ids.to(self.model.device)], dim=1)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            # generate() extends the cache in place, so each request gets its own copy
+            "past_key_values": copy.deepcopy(self._prefix_cache)
+        }
+    
+    def _build_prompt(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the full prompt for a question from the retrieved context and metadata.
+        """
+        return PROMPT_PREFIX + self.prompt_builder.build(question, context, metadata)
+    
     def generate_answer(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]] = None) -> str:
         """
         Generate an answer based on the question, retrieved context, and metadata.
@@ -80,38 +475,22 @@ class LLMReasoner:
         Returns:
             A natural language answer to the question
         """
-        # Format metadata if available
-        metadata_text = ""
-        if metadata:
-            metadata_text = "Additional data:\n"
-            for key, value in metadata.items():
-                metadata_text += f"- {key}: {value}\n"
-        
-        # Combine context passages
-        context_text = "\n".join([f"- {c}" for c in context])
-        
-        # Create a prompt for the model
-        prompt = f"""You are a hotel analytics assistant that provides accurate information about hotel bookings and data.
-Answer the following question based on the provided context and additional data.
-
-Question: {question}
-
-Context:
-{context_text}
-
-{metadata_text}
-
-Based on the above information, the answer is:"""
+        with stage_timer("prompt_build"):
+            body = self.prompt_builder.build(question, context, metadata)
         
         try:
-            # Generate the response
-            outputs = self.generator(prompt, max_new_tokens=150, num_return_sequences=1)
-            
-            # Extract the generated text
-            generated_text = outputs[0]['generated_text']
-            
-            # Extract just the answer part (after the prompt)
-            answer = generated_text[len(prompt):].strip()
+            if self.scheduler is not None:
+                answer = self.scheduler.submit(body).strip()
+            else:
+                # Generate the response, starting from the cached prefix
+                inputs = self._prefixed_inputs(body)
+                with torch.inference_mode():
+                    output = self.model.generate(**inputs, pad_token_id=self.tokenizer.eos_token_id,
+                                                 **GENERATION_KWARGS)
+                
+                # Extract just the answer part (after the prompt)
+                answer = self.tokenizer.decode(output[0, inputs["input_ids"].shape[1]:],
+                                               skip_special_tokens=True).strip()
             
             # If the answer is empty, return a fallback response
             if not answer:
@@ -122,6 +501,68 @@ Based on the above information, the answer is:"""
             logger.error(f"Error generating LLM response: {str(e)}")
             return f"I encountered an error while processing your question. Please try again."
     
+    def stream_answer(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]] = None,
+                      stop_event: Optional[threading.Event] = None,
+                      stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        Generate an answer incrementally, yielding text as tokens are produced.
+        
+        Generation runs on a background thread. It stops early when stop_event is set or when
+        the caller stops iterating (e.g. because the client disconnected). Streamed answers do
+        not go through the batching scheduler, so callers limit their concurrency separately.
+        
+        Args:
+            question: The user question
+            context: Retrieved passages or documents from the vector store
+            metadata: Additional structured data or metrics related to the question
+            stop_event: Event that cancels generation when set
+            stats: Optional dict that receives ttft_seconds, tokens, tokens_per_second and
+                cancelled once generation has finished
+        
+        Yields:
+            Pieces of the answer text
+        """
+        with stage_timer("prompt_build"):
+            body = self.prompt_builder.build(question, context, metadata)
+        stop_event = stop_event or threading.Event()
+        control = _StreamControl(stop_event)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        inputs = self._prefixed_inputs(body)
+        errors = []
+        
+        def _generate():
+            try:
+                with torch.inference_mode():
+                    self.model.generate(
+                        **inputs,
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([control]),
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        **GENERATION_KWARGS
+                    )
+            except Exception as e:
+                logger.error(f"Error generating LLM response: {str(e)}")
+                errors.append(e)
+                # Unblock the consumer
+                streamer.end()
+        
+        thread = threading.Thread(target=_generate, name="llm-stream", daemon=True)
+        thread.start()
+        completed = False
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+            if errors:
+                yield "I encountered an error while processing your question. Please try again."
+            completed = not stop_event.is_set()
+        finally:
+            # Also reached when the consumer closes the generator early
+            stop_event.set()
+            thread.join()
+            if stats is not None:
+                stats.update(control.stats(cancelled=not completed))
+    
     def __call__(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]] = None) -> str:
         """Convenience method to allow the class to be called directly."""
         return self.generate_answer(question, context, metadata) 
\ No newline at end of file
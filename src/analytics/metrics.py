@@ -0,0 +1,253 @@
+"""
+Process-wide metrics: counters, fixed-bucket histograms and callback gauges.
+
+Histograms keep one count per bucket, so memory does not grow with the number of requests.
+Percentiles are estimated from the buckets the way Prometheus' histogram_quantile does it.
+Everything registered in REGISTRY is rendered in the Prometheus text exposition format by
+the /metrics endpoint, and get_performance_metrics reads the same objects.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond index lookups to multi-minute generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 25.0, 60.0, 120.0)
+
+# Pipeline stages timed by STAGE_SECONDS
+STAGES = ("metric_extraction", "query_embedding", "faiss_search", "prompt_build",
+          "llm_generation", "report_generation", "analytics_query", "request_total")
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class _HistogramChild:
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Histogram:
+    """Observation counts in fixed buckets, with the sum, per label combination."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, _HistogramChild] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # Bucket i counts values in (buckets[i - 1], buckets[i]]; the last one is +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _HistogramChild(len(self.buckets))
+            child.counts[index] += 1
+            child.count += 1
+            child.sum += value
+            child.max = max(child.max, value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Optional[Dict[str, float]]:
+        """
+        Count, mean and estimated p50/p90/p99 for one label combination, or None if nothing
+        has been observed.
+        """
+        with self._lock:
+            child = self._children.get(self._key(labels))
+            if child is None or child.count == 0:
+                return None
+            counts, count, total, maximum = list(child.counts), child.count, child.sum, child.max
+        snapshot = {"count": count, "mean": round(total / count, 6)}
+        for name, quantile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            snapshot[name] = round(self._quantile(quantile, counts, count, maximum), 6)
+        return snapshot
+
+    def _quantile(self, quantile: float, counts: List[int], count: int, maximum: float) -> float:
+        # Linear interpolation inside the bucket that holds the rank, like histogram_quantile
+        rank = quantile * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                if index == len(self.buckets):
+                    return maximum
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = min(self.buckets[index], maximum)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return maximum
+
+    def collect(self) -> Iterator[str]:
+        with self._lock:
+            children = sorted((key, list(child.counts), child.count, child.sum)
+                              for key, child in self._children.items())
+        for key, counts, count, total in children:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class Gauge:
+    """
+    A value read from a callback when the metrics are collected. Counts kept elsewhere
+    (e.g. by the inference pool) are exposed the same way with type_name "counter".
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float], type_name: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.type_name = type_name
+
+    def collect(self) -> Iterator[str]:
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.error(f"Error collecting gauge {self.name}: {str(e)}")
+            return
+        if value is not None:
+            yield f"{self.name} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """Named metrics, rendered together in the Prometheus text format."""
+
+    def __init__(self, namespace: str = "hotel_analytics"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        with self._lock:
+            # Registering the same name again returns the existing metric
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], float],
+              type_name: str = "gauge") -> Gauge:
+        """Register a callback gauge, replacing an earlier one with the same name."""
+        gauge = Gauge(f"{self.namespace}_{name}", documentation, callback, type_name)
+        with self._lock:
+            self._metrics[gauge.name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "stage_duration_seconds", "Time spent in each stage of the question answering pipeline", labelnames=("stage",)
+)
+QUESTIONS = REGISTRY.counter("questions_total", "Questions answered, by outcome", labelnames=("outcome",))
+STREAMS = REGISTRY.counter("streams_total", "Streamed answers, by outcome", labelnames=("outcome",))
+STREAM_TTFT_SECONDS = REGISTRY.histogram(
+    "stream_time_to_first_token_seconds", "Time from a streamed question to its first answer text"
+)
+STREAM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "stream_tokens_per_second", "Decoding speed of streamed answers",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+
+def stage_timer(stage: str):
+    """Context manager that records the duration of a pipeline stage."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def stage_snapshots() -> Dict[str, Dict[str, float]]:
+    """Latency summaries of the stages that have been observed."""
+    snapshots = {stage: STAGE_SECONDS.snapshot(stage=stage) for stage in STAGES}
+    return {stage: snapshot for stage, snapshot in snapshots.items() if snapshot is not None}
@@ -0,0 +1,127 @@
+"""
+Process-wide registry of lazily loaded models.
+
+Models are loaded on first use (or by a background warmup) and shared by every component in
+the process, so the embedding model used by the vector store and by question matching is
+only loaded once. Heavy imports (torch, transformers, sentence-transformers) happen inside the
+loaders, not at module import time.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _load_sentence_transformer(name: str):
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(name)
+    # Run one encode so lazy kernel initialization does not land on the first request
+    model.encode(["warmup"])
+    return model
+
+
+class ModelRegistry:
+    """
+    Thread-safe registry that loads each model once and hands out the shared instance.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, loader: Optional[Callable[[str], Any]] = None) -> Any:
+        """
+        Return the model registered under name, loading it on first use.
+
+        Concurrent callers asking for the same model wait for a single load.
+
+        Args:
+            name: Registry key, usually the model identifier
+            loader: Function that loads the model given its name; defaults to SentenceTransformer
+
+        Returns:
+            The shared model instance
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._loading.setdefault(name, threading.Lock())
+        with load_lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            logger.info(f"Loading model {name}")
+            start_time = time.time()
+            try:
+                model = (loader or _load_sentence_transformer)(name)
+            except Exception as e:
+                self._errors[name] = str(e)
+                logger.error(f"Error loading model {name}: {str(e)}")
+                raise
+            self._load_seconds[name] = time.time() - start_time
+            self._errors.pop(name, None)
+            self._models[name] = model
+            logger.info(f"Model {name} loaded in {self._load_seconds[name]:.1f}s")
+            return model
+
+    def register(self, name: str, model: Any) -> None:
+        """Register an already constructed model, e.g. a stub in tests or benchmarks."""
+        self._models[name] = model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warmup(self, names: List[str], background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load the given embedding models, optionally on a daemon thread.
+
+        Args:
+            names: Models to load
+            background: Whether to return immediately and load on a background thread
+
+        Returns:
+            The warmup thread when background is True, otherwise None
+        """
+        def _run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    # Already logged; the model is loaded again on first use
+                    pass
+
+        if not background:
+            _run()
+            return None
+        thread = threading.Thread(target=_run, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict[str, Any]:
+        """Loaded models with their load times, plus models that failed to load."""
+        return {
+            "loaded": {name: round(self._load_seconds.get(name, 0.0), 2) for name in self._models},
+            "errors": dict(self._errors)
+        }
+
+
+# The process-wide registry
+registry = ModelRegistry()
+
+
+def get_embedding_model(name: Optional[str] = None):
+    """Return the shared SentenceTransformer, loading it on first use."""
+    return registry.get(name or config.EMBEDDING_MODEL_NAME)
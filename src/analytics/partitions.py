@@ -0,0 +1,115 @@
+"""
+Row partitions of the vector store by structured booking attributes.
+
+For each filterable column the row ids are grouped by value, so the rows a question is
+about (e.g. bookings from PRT arriving in July 2017) are found with a few dictionary lookups
+and array intersections instead of a scan. The vector store then searches only those rows.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Columns a retrieval can be filtered on
+FILTER_COLUMNS = ('country', 'arrival_date_year', 'arrival_date_month', 'hotel')
+
+
+def _group_rows(values: pd.Series, offset: int = 0) -> Dict[Any, np.ndarray]:
+    groups = values.groupby(values.to_numpy(), sort=False).indices
+    return {value: rows.astype(np.int64) + offset for value, rows in groups.items()}
+
+
+class RowPartitions:
+    """
+    Sorted row ids per value of each filter column.
+    """
+
+    def __init__(self, data: pd.DataFrame, columns: Sequence[str] = FILTER_COLUMNS):
+        self.columns = tuple(column for column in columns if column in data.columns)
+        self.size = len(data)
+        self._rows = {column: _group_rows(data[column].reset_index(drop=True)) for column in self.columns}
+
+    def to_arrays(self) -> Dict[str, Tuple[List[Any], np.ndarray, np.ndarray]]:
+        """
+        The partitions as flat arrays, for storing them on disk.
+
+        Returns:
+            Dict[str, Tuple]: Column -> (values, row ids of all values concatenated, offsets),
+                where the rows of values[i] are rows[offsets[i]:offsets[i + 1]]
+        """
+        arrays = {}
+        for column in self.columns:
+            partition = self._rows[column]
+            values = [value.item() if isinstance(value, np.generic) else value for value in partition]
+            sizes = [len(ids) for ids in partition.values()]
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=offsets[1:])
+            rows = np.concatenate(list(partition.values())) if sizes else np.empty(0, dtype=np.int64)
+            arrays[column] = (values, rows, offsets)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, size: int, arrays: Dict[str, Tuple[List[Any], np.ndarray, np.ndarray]]) -> "RowPartitions":
+        """
+        Rebuild partitions from to_arrays() output. The row ids are views into the given
+        arrays, so memory-mapped arrays stay shared.
+
+        Parameters:
+            size (int): Number of rows covered
+            arrays (Dict[str, Tuple]): Output of to_arrays()
+
+        Returns:
+            RowPartitions: The partitions
+        """
+        partitions = cls.__new__(cls)
+        partitions.columns = tuple(arrays)
+        partitions.size = size
+        partitions._rows = {
+            column: {value: rows[offsets[i]:offsets[i + 1]] for i, value in enumerate(values)}
+            for column, (values, rows, offsets) in arrays.items()
+        }
+        return partitions
+
+    def add_rows(self, rows: pd.DataFrame) -> "RowPartitions":
+        """
+        Return partitions that also cover rows appended after the existing ones.
+
+        Parameters:
+            rows (pd.DataFrame): The appended rows
+
+        Returns:
+            RowPartitions: Partitions over the existing and the appended rows
+        """
+        merged = RowPartitions.__new__(RowPartitions)
+        merged.columns = self.columns
+        merged.size = self.size + len(rows)
+        merged._rows = {}
+        for column in self.columns:
+            partition = dict(self._rows[column])
+            for value, ids in _group_rows(rows[column].reset_index(drop=True), offset=self.size).items():
+                existing = partition.get(value)
+                partition[value] = ids if existing is None else np.concatenate([existing, ids])
+            merged._rows[column] = partition
+        return merged
+
+    def select(self, filters: Optional[Dict[str, Iterable[Any]]]) -> Optional[np.ndarray]:
+        """
+        Row ids matching the filters: any of the listed values of a column, in every
+        filtered column. Columns that are not partitioned are ignored.
+
+        Parameters:
+            filters (Dict[str, Iterable[Any]]): Column -> accepted values
+
+        Returns:
+            Optional[np.ndarray]: Sorted row ids, or None when nothing is filtered
+        """
+        selected = None
+        for column, values in (filters or {}).items():
+            partition = self._rows.get(column)
+            if partition is None:
+                continue
+            parts = [partition[value] for value in values if value in partition]
+            ids = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            selected = ids if selected is None else np.intersect1d(selected, ids, assume_unique=True)
+        return selected
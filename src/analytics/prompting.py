@@ -0,0 +1,110 @@
+"""
+Prompt construction for the LLM reasoner.
+
+Every prompt starts with the same instruction preamble (PROMPT_PREFIX), so its KV cache can
+be computed once and reused. The rest of the prompt holds the question and as much of the
+retrieved evidence as fits a token budget: extracted metrics first (they answer most
+questions directly), then the retrieved summaries in retrieval order, then the relevant
+booking records in a compact one-line form.
+"""
+
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROMPT_PREFIX = (
+    "You are a hotel analytics assistant that provides accurate information about hotel bookings and data.\n"
+    "Answer the following question based on the provided context and additional data.\n\n"
+)
+
+PROMPT_SUFFIX = "Based on the above information, the answer is:"
+
+# Booking columns shown for a relevant record; the summaries already describe the rest
+RECORD_FIELDS = [
+    'hotel', 'country', 'arrival_date_month', 'arrival_date_year', 'total_nights', 'adr',
+    'is_canceled', 'adults', 'children', 'market_segment', 'distribution_channel'
+]
+
+
+def render_record(record: Dict[str, Any]) -> str:
+    """
+    Render a booking record as one compact line of key=value pairs.
+
+    Args:
+        record: A booking row as a dict
+
+    Returns:
+        The rendered record, with missing values skipped and floats rounded
+    """
+    parts = []
+    for field in RECORD_FIELDS:
+        value = record.get(field)
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            continue
+        if isinstance(value, float):
+            value = round(value, 2)
+        parts.append(f"{field}={value}")
+    return ", ".join(parts)
+
+
+class PromptBuilder:
+    """
+    Builds the question-specific part of the prompt within a token budget.
+    """
+
+    def __init__(self, tokenizer, max_context_tokens: int = 384):
+        """
+        Args:
+            tokenizer: The LLM's tokenizer, used to count tokens
+            max_context_tokens: Budget for the context and additional data lines
+        """
+        self.tokenizer = tokenizer
+        self.max_context_tokens = max_context_tokens
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def build(self, question: str, context: List[str], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the prompt text that follows PROMPT_PREFIX.
+
+        Args:
+            question: The user question
+            context: Retrieved passages, most relevant first
+            metadata: Extracted metrics, plus the relevant booking rows under "relevant_records"
+
+        Returns:
+            The question, the evidence that fits the budget and the answer cue
+        """
+        metadata = dict(metadata or {})
+        records = metadata.pop("relevant_records", None) or []
+        candidates = (
+            [("data", f"{key}: {value}") for key, value in metadata.items()]
+            + [("context", passage) for passage in context]
+            + [("data", f"booking record: {render_record(record)}") for record in records]
+        )
+
+        kept = {"context": [], "data": []}
+        budget = self.max_context_tokens
+        for section, line in candidates:
+            line = f"- {line}\n"
+            cost = self.count_tokens(line)
+            # Skip what does not fit; a shorter line further down may still fit
+            if cost > budget:
+                continue
+            budget -= cost
+            kept[section].append(line)
+        dropped = len(candidates) - len(kept["context"]) - len(kept["data"])
+        if dropped:
+            logger.debug(f"Dropped {dropped} of {len(candidates)} prompt lines over the token budget")
+
+        prompt = f"Question: {question}\n\n"
+        if kept["context"]:
+            prompt += "Context:\n" + "".join(kept["context"]) + "\n"
+        if kept["data"]:
+            prompt += "Additional data:\n" + "".join(kept["data"]) + "\n"
+        return prompt + PROMPT_SUFFIX
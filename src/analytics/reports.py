@@ -1,47 +1,80 @@
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 from src.analytics.vector_store import VectorStore
+from src.analytics.summaries import build_summary_column
+from src.analytics.dimension_index import DimensionIndex
+from src.analytics.cubes import AnalyticsCubes, default_cubes
+from src.analytics.growable import GrowableFrame
+from src.analytics.metrics import (QUESTIONS, STAGE_SECONDS, STREAM_TOKENS_PER_SECOND, STREAM_TTFT_SECONDS,
+                                   STREAMS, stage_snapshots, stage_timer)
+from src.analytics.answer_cache import SemanticAnswerCache
+from src.analytics.faiss_indexes import IndexConfig
+from src.analytics.shared_artifacts import load_shared_artifacts
+from src.analytics.model_registry import get_embedding_model
+from src.data.storage import ANALYTICS_COLUMNS, read_bookings, resolve_bookings_path
+from src.data.preprocessing import RAW_DTYPES, clean_bookings
+from src import config
+import hashlib
 import logging
+import re
+import threading
 import time
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Words that change what a question asks for even when it is otherwise very similar
+_SIGNATURE_TERMS = re.compile(r"\b(highest|lowest|most|least|top|bottom|max\w*|min\w*|average|mean|median|total|not)\b")
+_NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+# Attempts to read the context of a question while no data is published; see _retrieve_context
+CONSISTENT_READ_ATTEMPTS = 3
+
+def compute_data_version(df: pd.DataFrame) -> str:
+    """
+    Computes a content fingerprint of the bookings data.
+    
+    The same data always produces the same version, so the version (and the ETags derived
+    from it) is stable across restarts and across workers.
+    
+    Parameters:
+        df (pd.DataFrame): The bookings data
+        
+    Returns:
+        str: A short hex digest identifying the data
+    """
+    digest = hashlib.sha1()
+    digest.update("\0".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
 class HotelAnalytics:
     def __init__(self):
         try:
-            # Load the processed CSV file using a relative path
-            # Get the current file's directory
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.abspath(os.path.join(current_dir, '../..'))
-            file_path = os.path.join(project_root, 'src', 'data', 'processed', 'hotel_bookings_processed.csv')
-            
-            logger.info(f"Loading data from: {file_path}")
-            self.df = pd.read_csv(file_path)
+            # Guards swaps of the data and everything derived from it
+            self._data_lock = threading.RLock()
+            self._report_lock = threading.Lock()
+            # Serializes writers (reloads and ingestion); readers never take it
+            self._write_lock = threading.Lock()
+            self._report_cache = None
+            self.data_version = None
+            # Holds the ingested rows; see ingest_bookings
+            self._data_buffer = None
             
-            # Create a summary column to be indexed by the vector store.
-            # This provides context for the LLM to generate better answers
-            self.df['summary'] = self.df.apply(
-                lambda row: (f"Booking from {row['country']} in {row['arrival_date_month']} {row['arrival_date_year']} "
-                            f"with daily rate ${row['adr']} for {row['total_nights']} nights. "
-                            f"Total price: ${row['total_price']}. "
-                            f"Booking was {'canceled' if row['is_canceled'] == 1 else 'not canceled'}. "
-                            f"Customer type: {row['customer_type']}. "
-                            f"Room type: {row['reserved_room_type']}. "
-                            f"Lead time: {row['lead_time']} days."), 
-                axis=1
+            # Answers are cached per data version; see src/analytics/answer_cache.py
+            self.answer_cache = SemanticAnswerCache(
+                max_entries=config.ANSWER_CACHE_SIZE,
+                ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+                similarity_threshold=config.ANSWER_CACHE_SIMILARITY
             )
             
-            # Initialize the FAISS-based vector store using the 'summary' column
-            self.vector_store = VectorStore(self.df, text_column='summary')
+            self._load_data()
             
-            # Initialize the SentenceTransformer for predefined question matching
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            # Predefined questions for the legacy matcher. The shared SentenceTransformer
+            # and the question embeddings are only loaded when the legacy path is used.
             self.questions = [
                 "Show me total revenue for July 2017",
                 "Which locations had the highest booking cancellations?",
@@ -54,40 +87,292 @@ class HotelAnalytics:
                 "What is the distribution of customer types?",
                 "How many bookings include children or babies?"
             ]
-            self.embeddings = self.model.encode(self.questions)
-            
-            # Keep a performance metrics log
-            self.metrics = {
-                "query_times": [],
-                "avg_response_time": 0,
-                "successful_queries": 0,
-                "failed_queries": 0
-            }
+            self._question_embeddings = None
             
             logger.info("HotelAnalytics initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing HotelAnalytics: {str(e)}")
             raise
     
+    def _load_data(self):
+        """
+        Loads the bookings data and builds the summaries and the vector store, then swaps
+        them in and invalidates everything derived from the previous data.
+        """
+        # Load the processed data (path is configurable, see src/config.py). Parquet is
+        # preferred, with only the analytics columns read; the CSV is used as a fallback.
+        file_path = config.PROCESSED_DATA_PATH
+        index_config = IndexConfig.from_settings()
+        
+        # In shared mode the data, summaries, embeddings and index are mapped from a snapshot
+        # that all workers share, instead of being loaded into this process
+        artifacts = None
+        if config.SHARED_ARTIFACTS_DIR:
+            try:
+                source_path = resolve_bookings_path(file_path)
+            except FileNotFoundError:
+                source_path = None
+            artifacts = load_shared_artifacts(config.SHARED_ARTIFACTS_DIR, index_config.spec,
+                                              config.EMBEDDING_MODEL_NAME, source_path=source_path)
+            if artifacts is None:
+                logger.warning("Shared artifacts are not usable, loading a private copy of the data")
+        
+        if artifacts is not None:
+            df = artifacts.data
+            data_version = artifacts.manifest["data_version"]
+            vector_store = VectorStore.from_artifacts(artifacts, config.EMBEDDING_MODEL_NAME, index_config)
+        else:
+            logger.info(f"Loading data from: {file_path}")
+            df = read_bookings(file_path, columns=None if config.LOAD_ALL_COLUMNS else ANALYTICS_COLUMNS)
+            data_version = compute_data_version(df)
+            
+            # Create a summary column to be indexed by the vector store.
+            # This provides context for the LLM to generate better answers
+            df['summary'] = build_summary_column(df)
+            
+            # Initialize the FAISS-based vector store using the 'summary' column.
+            # Embeddings and the index are reused from the on-disk cache when the data is unchanged.
+            vector_store = VectorStore(
+                df,
+                text_column='summary',
+                model_name=config.EMBEDDING_MODEL_NAME,
+                cache_dir=config.INDEX_CACHE_DIR or None,
+                index_config=index_config
+            )
+        dimension_index = DimensionIndex(df)
+        cubes = AnalyticsCubes(df, default_cubes(config.CUBE_MAX_DIMENSIONS))
+        if config.QUERY_BATCH_WINDOW_MS > 0:
+            vector_store.enable_batching(
+                window_ms=config.QUERY_BATCH_WINDOW_MS,
+                max_batch_size=config.QUERY_BATCH_MAX_SIZE
+            )
+        
+        with self._data_lock:
+            previous_store = getattr(self, "vector_store", None)
+            self.df = df
+            self.vector_store = vector_store
+            self.dimension_index = dimension_index
+            self.cubes = cubes
+            self._data_buffer = None
+            self._set_data_version(data_version)
+        
+        if previous_store is not None and previous_store.batcher is not None:
+            previous_store.batcher.close()
+    
+    def reload_data(self) -> str:
+        """
+        Reloads the processed bookings data from disk.
+        
+        Cached results computed from the previous data (such as the analytics report) are
+        invalidated.
+        
+        Returns:
+            str: The new data version
+        """
+        with self._write_lock:
+            self._load_data()
+            return self.data_version
+    
+    def ingest_bookings(self, bookings) -> Dict[str, Any]:
+        """
+        Appends a batch of raw bookings without reloading the data or rebuilding the index.
+        
+        The preprocessing rules are applied to the batch only, and summaries and embeddings
+        are computed for the new rows only. The rows are then appended to the vector index and
+        to the data, and the dimension aggregates are updated. All of them are published at
+        once, so questions and reports see either the previous or the new data, never a mix
+        (see _retrieve_context). The cost of a batch does not grow with the existing data.
+        Ingested bookings are held in memory; they are not written to the processed files.
+        
+        Parameters:
+            bookings (List[Dict[str, Any]] or pd.DataFrame): Raw bookings, with the same
+                columns as the raw export
+            
+        Returns:
+            Dict[str, Any]: The number of received and added bookings and the new data version
+            
+        Raises:
+            ValueError: If required columns are missing or values have the wrong type
+        """
+        batch = pd.DataFrame(bookings)
+        received = len(batch)
+        
+        with self._write_lock:
+            df = self.df
+            # Missing values in these columns are filled by the preprocessing rules
+            for column in ('children', 'country', 'agent', 'company'):
+                if column not in batch.columns:
+                    batch[column] = np.nan
+            derived = ('total_nights', 'total_price', 'summary')
+            required = {'stays_in_weekend_nights', 'stays_in_week_nights', 'adr'}
+            required |= {column for column in df.columns if column not in derived}
+            missing = sorted(required - set(batch.columns))
+            if missing:
+                raise ValueError(f"Bookings are missing required columns: {missing}")
+            try:
+                batch = batch.astype({c: t for c, t in RAW_DTYPES.items() if c in batch.columns})
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid booking values: {str(e)}")
+            
+            new_rows = clean_bookings(batch)
+            new_rows = new_rows[[column for column in df.columns if column != 'summary']].reset_index(drop=True)
+            if new_rows.empty:
+                return {"received": received, "added": 0, "data_version": self.data_version,
+                        "total_bookings": len(df)}
+            
+            # Keep categorical columns categorical: new values are added after the existing
+            # categories, so the codes of the existing rows stay valid
+            for column in new_rows.columns:
+                if isinstance(df[column].dtype, pd.CategoricalDtype):
+                    categories = df[column].cat.categories
+                    new_values = pd.Index(new_rows[column].dropna().unique()).difference(categories)
+                    if len(new_values):
+                        categories = categories.append(new_values)
+                    new_rows[column] = pd.Categorical(new_rows[column], categories=categories)
+            new_rows['summary'] = build_summary_column(new_rows)
+            
+            # Shared-mode data has no summary column; the vector store holds the texts.
+            # Only the new rows are written; the existing ones are not copied.
+            if self._data_buffer is None:
+                self._data_buffer = GrowableFrame(df)
+            data = self._data_buffer.extend(df, new_rows[df.columns])
+            dimension_index = self.dimension_index.add_rows(new_rows)
+            cubes = self.cubes.add_rows(new_rows, data)
+            digest = hashlib.sha1(self.data_version.encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(new_rows, index=False).to_numpy().tobytes())
+            data_version = digest.hexdigest()[:16]
+            
+            # Embeds the new rows; the vector store only changes when the rows are committed,
+            # together with everything else
+            pending = self.vector_store.prepare_rows(new_rows, data)
+            with self._data_lock:
+                self.vector_store.commit_rows(pending)
+                self.df = data
+                self.dimension_index = dimension_index
+                self.cubes = cubes
+                self._set_data_version(data_version)
+        
+        logger.info(f"Ingested {len(new_rows)} of {received} bookings")
+        return {"received": received, "added": len(new_rows), "data_version": data_version,
+                "total_bookings": len(data)}
+    
+    def _set_data_version(self, data_version: str):
+        """
+        Records a new data version and drops caches derived from older versions.
+        Must be called with the data lock held.
+        """
+        if data_version != self.data_version:
+            logger.info(f"Data version is now {data_version}")
+        self.data_version = data_version
+        self._report_cache = None
+        self.answer_cache.invalidate(data_version)
+    
+    @property
+    def model(self):
+        """
+        The shared SentenceTransformer model, loaded on first use.
+        """
+        return get_embedding_model(config.EMBEDDING_MODEL_NAME)
+    
+    @property
+    def embeddings(self):
+        """
+        Embeddings of the predefined questions, computed on first use.
+        """
+        if self._question_embeddings is None:
+            self._question_embeddings = self.model.encode(self.questions)
+        return self._question_embeddings
+    
     def generate_report(self) -> Dict[str, Any]:
         """
         Generates a comprehensive analytics report from the hotel booking data.
         
+        The report is computed once per data version and served from memory afterwards.
+        
+        Returns:
+            Dict[str, Any]: A dictionary containing various analytics metrics
+        """
+        return self.get_report()[0]
+    
+    def get_report(self) -> Tuple[Dict[str, Any], str]:
+        """
+        Returns the analytics report together with the data version it was computed from.
+        
+        Returns:
+            Tuple[Dict[str, Any], str]: The report and its data version
+        """
+        with self._data_lock:
+            df, data_version = self.df, self.data_version
+            cached = self._report_cache
+        if cached is not None and cached[0] == data_version:
+            return cached[1], data_version
+        
+        # Only one thread computes the report; the others wait for its result
+        with self._report_lock:
+            cached = self._report_cache
+            if cached is not None and cached[0] == data_version:
+                return cached[1], data_version
+            with stage_timer("report_generation"):
+                report = self._compute_report(df)
+            with self._data_lock:
+                # Do not cache errors, or a report for data that was replaced meanwhile
+                if "error" not in report and self.data_version == data_version:
+                    self._report_cache = (data_version, report)
+            return report, data_version
+    
+    def query_analytics(self, filters: Optional[Dict[str, Any]] = None, group_by: Optional[List[str]] = None,
+                        metrics: Optional[List[str]] = None, order_by: Optional[str] = None,
+                        descending: bool = True, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Computes metrics for the filtered bookings, grouped by the given dimensions.
+        
+        Answered from the pre-aggregated cubes when one covers the filter and group-by
+        dimensions, and by scanning the bookings otherwise (see src/analytics/cubes.py).
+        
+        Parameters:
+            filters (Dict[str, Any], optional): Dimension -> allowed value or list of values
+            group_by (List[str], optional): Dimensions to group by
+            metrics (List[str], optional): Metrics to return (all by default)
+            order_by (str, optional): Metric or group-by dimension to sort by
+            descending (bool): Sort order for order_by
+            limit (int, optional): Maximum number of rows to return
+            
+        Returns:
+            Dict[str, Any]: The result rows, with the data version they were computed from
+            
+        Raises:
+            ValueError: If a dimension, metric or ordering is unknown
+        """
+        with self._data_lock:
+            cubes, data_version = self.cubes, self.data_version
+        with stage_timer("analytics_query"):
+            result = cubes.query(filters=filters, group_by=group_by, metrics=metrics,
+                                 order_by=order_by, descending=descending, limit=limit)
+        result["data_version"] = data_version
+        return result
+    
+    def _compute_report(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Computes the analytics report by scanning the given bookings data.
+        
+        Parameters:
+            df (pd.DataFrame): The bookings data
+            
         Returns:
             Dict[str, Any]: A dictionary containing various analytics metrics
         """
         try:
             # Total bookings and average daily rate
-            total_bookings = len(self.df)
-            average_daily_rate = self.df['adr'].mean()
+            total_bookings = len(df)
+            average_daily_rate = df['adr'].mean()
             
             # Cancellation rate (assuming 'is_canceled' exists as 0 or 1)
-            cancellation_rate = (self.df['is_canceled'].mean() * 100) if 'is_canceled' in self.df.columns else None
+            cancellation_rate = (df['is_canceled'].mean() * 100) if 'is_canceled' in df.columns else None
             
             # Revenue trends over time: group by arrival year and month, summing total_price
-            if 'arrival_date_year' in self.df.columns and 'arrival_date_month' in self.df.columns:
+            if 'arrival_date_year' in df.columns and 'arrival_date_month' in df.columns:
                 revenue_trends = (
-                    self.df.groupby(['arrival_date_year', 'arrival_date_month'])['total_price']
+                    df.groupby(['arrival_date_year', 'arrival_date_month'], observed=True)['total_price']
                     .sum()
                     .reset_index()
                     .to_dict(orient='records')
@@ -96,24 +381,29 @@ class HotelAnalytics:
                 revenue_trends = "Arrival date information not available."
             
             # Geographical distribution: count bookings by country
-            geographical_distribution = self.df['country'].value_counts().to_dict() if 'country' in self.df.columns else {}
+            if 'country' in df.columns:
+                # Categorical columns also count categories that have no bookings
+                country_counts = df['country'].value_counts()
+                geographical_distribution = country_counts[country_counts > 0].to_dict()
+            else:
+                geographical_distribution = {}
             
             # Booking lead time statistics (assuming 'lead_time' exists)
-            if 'lead_time' in self.df.columns:
+            if 'lead_time' in df.columns:
                 lead_time_stats = {
-                    "min": int(self.df['lead_time'].min()),
-                    "max": int(self.df['lead_time'].max()),
-                    "mean": round(self.df['lead_time'].mean(), 2),
-                    "median": int(self.df['lead_time'].median())
+                    "min": int(df['lead_time'].min()),
+                    "max": int(df['lead_time'].max()),
+                    "mean": round(df['lead_time'].mean(), 2),
+                    "median": int(df['lead_time'].median())
                 }
             else:
                 lead_time_stats = "Lead time information not available."
             
             # Other analytics
-            most_common_customer_type = self.df['customer_type'].mode()[0] if 'customer_type' in self.df.columns else "N/A"
-            most_booked_room_type = self.df['reserved_room_type'].mode()[0] if 'reserved_room_type' in self.df.columns else "N/A"
-            if 'stays_in_weekend_nights' in self.df.columns and 'stays_in_week_nights' in self.df.columns:
-                average_length_of_stay = (self.df['stays_in_weekend_nights'] + self.df['stays_in_week_nights']).mean()
+            most_common_customer_type = df['customer_type'].mode()[0] if 'customer_type' in df.columns else "N/A"
+            most_booked_room_type = df['reserved_room_type'].mode()[0] if 'reserved_room_type' in df.columns else "N/A"
+            if 'stays_in_weekend_nights' in df.columns and 'stays_in_week_nights' in df.columns:
+                average_length_of_stay = (df['stays_in_weekend_nights'] + df['stays_in_week_nights']).mean()
             else:
                 average_length_of_stay = "N/A"
             
@@ -144,20 +434,26 @@ class HotelAnalytics:
         Returns:
             Dict[str, Any]: A dictionary containing the answer and other metadata
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            # First, extract specific metrics or structured data that might help answer the question
-            metadata = self._extract_relevant_metrics(question)
+            # Serve repeated and near-identical questions from the answer cache
+            result, question_embedding, signature = self._lookup_answer(question)
             
-            # Use the LLM-powered RAG to generate an answer
-            result = self.vector_store.generate_answer(question, metadata)
+            if result is None:
+                # Extract the metrics and the records that help answer the question, from one
+                # version of the data
+                data_version, vector_store, prepared = self._retrieve_context(question, question_embedding)
+                
+                # Use the LLM-powered RAG to generate an answer
+                result = vector_store.generate_answer(question, prepared=prepared)
+                if question_embedding is not None:
+                    self.answer_cache.put(question, question_embedding, signature, dict(result), data_version)
             
             # Track performance metrics
-            query_time = time.time() - start_time
-            self.metrics["query_times"].append(query_time)
-            self.metrics["avg_response_time"] = sum(self.metrics["query_times"]) / len(self.metrics["query_times"])
-            self.metrics["successful_queries"] += 1
+            query_time = time.perf_counter() - start_time
+            STAGE_SECONDS.observe(query_time, stage="request_total")
+            QUESTIONS.inc(outcome="success")
             
             # Add performance data to result
             result["query_time_seconds"] = round(query_time, 3)
@@ -165,7 +461,7 @@ class HotelAnalytics:
             return result
         except Exception as e:
             logger.error(f"Error answering question: {str(e)}")
-            self.metrics["failed_queries"] += 1
+            QUESTIONS.inc(outcome="failed")
             
             # Fallback to the original method for robustness
             try:
@@ -174,10 +470,154 @@ class HotelAnalytics:
             except:
                 return {"answer": f"I encountered an error while processing your question: {str(e)}"}
     
+    def stream_answer(self, question: str, stop_event: Optional[threading.Event] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Answers a question like answer_question, but produces the answer incrementally.
+        
+        Parameters:
+            question (str): The question to answer
+            stop_event (threading.Event): Cancels generation when set, e.g. when the client
+                disconnects. Closing the iterator cancels it as well.
+            
+        Yields:
+            Tuple[str, Any]: Events: ("context", confidence and retrieved contexts), then
+            ("token", text) for each piece of the answer, then ("done", the full answer with
+            timing statistics), or ("error", details)
+        """
+        start_time = time.perf_counter()
+        stop_event = stop_event or threading.Event()
+        generation_stats: Dict[str, Any] = {}
+        first_token_time = None
+        pieces = None
+        cancelled = True
+        
+        try:
+            cached, question_embedding, signature = self._lookup_answer(question)
+            if cached is not None:
+                info = {key: value for key, value in cached.items() if key != "answer"}
+                pieces = iter([cached["answer"]])
+            else:
+                data_version, vector_store, prepared = self._retrieve_context(question, question_embedding)
+                info, pieces = vector_store.stream_answer(question, stop_event=stop_event,
+                                                          stats=generation_stats, prepared=prepared)
+            yield "context", info
+            
+            answer_parts = []
+            generation_start = time.perf_counter()
+            for piece in pieces:
+                if first_token_time is None:
+                    first_token_time = time.perf_counter()
+                answer_parts.append(piece)
+                yield "token", piece
+            answer = "".join(answer_parts).strip()
+            cancelled = stop_event.is_set() or generation_stats.get("cancelled", False)
+            if cached is None and not cancelled:
+                STAGE_SECONDS.observe(time.perf_counter() - generation_start, stage="llm_generation")
+            
+            if cached is None and question_embedding is not None and not cancelled:
+                self.answer_cache.put(question, question_embedding, signature, {"answer": answer, **info}, data_version)
+            
+            query_time = time.perf_counter() - start_time
+            STAGE_SECONDS.observe(query_time, stage="request_total")
+            QUESTIONS.inc(outcome="success")
+            yield "done", {
+                "answer": answer,
+                **info,
+                "query_time_seconds": round(query_time, 3),
+                "time_to_first_token_seconds": round(first_token_time - start_time, 3) if first_token_time else None,
+                "tokens": generation_stats.get("tokens"),
+                "tokens_per_second": generation_stats.get("tokens_per_second")
+            }
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            QUESTIONS.inc(outcome="failed")
+            cancelled = False
+            yield "error", {"detail": str(e)}
+        finally:
+            # Stops generation if the consumer went away before the answer was complete
+            stop_event.set()
+            if pieces is not None and hasattr(pieces, "close"):
+                pieces.close()
+            STREAMS.inc(outcome="cancelled" if cancelled else "completed")
+            if first_token_time is not None:
+                STREAM_TTFT_SECONDS.observe(first_token_time - start_time)
+            if generation_stats.get("tokens_per_second"):
+                STREAM_TOKENS_PER_SECOND.observe(generation_stats["tokens_per_second"])
+    
+    def _retrieve_context(self, question: str, question_embedding: Optional[np.ndarray] = None):
+        """
+        Extracts the metrics and retrieval filters for a question and retrieves its context,
+        all from the same version of the data.
+        
+        Ingestion publishes new rows while questions are being answered, so the work is done
+        optimistically and repeated when the data version changed in the meantime; the last
+        of CONSISTENT_READ_ATTEMPTS attempts holds writers off.
+        
+        Parameters:
+            question (str): The question being asked
+            question_embedding (np.ndarray): The question's embedding, if already computed
+                (e.g. for the answer cache); it is not encoded again
+            
+        Returns:
+            Tuple: The data version, the vector store to generate the answer with, and the
+            retrieved context (see VectorStore.prepare_answer)
+        """
+        def retrieve():
+            with self._data_lock:
+                data_version, vector_store = self.data_version, self.vector_store
+            with stage_timer("metric_extraction"):
+                metadata = self._extract_relevant_metrics(question)
+                filters = self._extract_retrieval_filters(question)
+            prepared = vector_store.prepare_answer(question, metadata, filters=filters,
+                                                   query_embedding=question_embedding)
+            # Writers publish under the data lock, so an unchanged version means nothing
+            # above saw a newer data
+            with self._data_lock:
+                unchanged = self.data_version == data_version
+            return unchanged, (data_version, vector_store, prepared)
+        
+        for _ in range(CONSISTENT_READ_ATTEMPTS - 1):
+            unchanged, retrieved = retrieve()
+            if unchanged:
+                return retrieved
+        with self._write_lock:
+            return retrieve()[1]
+    
+    def _lookup_answer(self, question: str) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray], frozenset]:
+        """
+        Looks the question up in the answer cache, by exact question first and then by
+        embedding similarity among questions with the same signature.
+        
+        Parameters:
+            question (str): The question being asked
+            
+        Returns:
+            Tuple: The cached result (None on a miss), and the question embedding and
+            signature to cache a new answer under (the embedding is None when not needed)
+        """
+        if self.answer_cache.max_entries <= 0:
+            return None, None, frozenset()
+        result = self.answer_cache.get(question)
+        if result is not None:
+            return {**result, "cache": {"hit": "exact"}}, None, frozenset()
+        
+        # The dimension values, numbers and comparison words the question mentions
+        question_lower = question.lower()
+        signature = frozenset(self.dimension_index.matcher.find(question_lower)) \
+            | frozenset(_SIGNATURE_TERMS.findall(question_lower)) | frozenset(_NUMBERS.findall(question_lower))
+        embedding = np.asarray(self.vector_store.model.encode([question]))[0]
+        similar = self.answer_cache.get_similar(embedding, signature)
+        if similar is not None:
+            result, cached_question, similarity = similar
+            return {**result, "cache": {"hit": "semantic", "question": cached_question,
+                                        "similarity": round(similarity, 4)}}, None, signature
+        return None, embedding, signature
+    
     def _extract_relevant_metrics(self, question: str) -> Dict[str, Any]:
         """
         Extracts metrics from the data that are relevant to the question.
         This provides additional structured context for the LLM.
+        Uses the precomputed dimension index, so no table scans happen per question.
         
         Parameters:
             question (str): The question being asked
@@ -185,41 +625,23 @@ class HotelAnalytics:
         Returns:
             Dict[str, Any]: A dictionary of relevant metrics
         """
-        metrics = {}
-        
-        # Check for keywords in the question and extract relevant metrics
-        question_lower = question.lower()
+        # Aggregates are precomputed per country, month and year when the data is loaded
+        return self.dimension_index.extract_metrics(question)
+    
+    def _extract_retrieval_filters(self, question: str) -> Optional[Dict[str, List[Any]]]:
+        """
+        Extracts the countries, arrival months and arrival years a question names, so that
+        retrieval only searches the matching bookings.
         
-        # Revenue related
-        if any(term in question_lower for term in ["revenue", "income", "earnings", "money"]):
-            metrics["total_revenue"] = round(self.df["total_price"].sum(), 2)
-            
-        # Time period related
-        for month in ["january", "february", "march", "april", "may", "june", 
-                    "july", "august", "september", "october", "november", "december"]:
-            if month in question_lower:
-                metrics[f"{month}_bookings"] = len(self.df[self.df["arrival_date_month"].str.lower() == month.capitalize()])
-                
-        for year in ["2015", "2016", "2017", "2018", "2019"]:
-            if year in question_lower:
-                metrics[f"year_{year}_bookings"] = len(self.df[self.df["arrival_date_year"] == int(year)])
-                
-        # Country related
-        for country in self.df["country"].unique():
-            country_lower = str(country).lower()
-            if country_lower in question_lower:
-                country_data = self.df[self.df["country"] == country]
-                metrics[f"{country}_bookings"] = len(country_data)
-                metrics[f"{country}_revenue"] = round(country_data["total_price"].sum(), 2)
-                metrics[f"{country}_cancellation_rate"] = round(country_data["is_canceled"].mean() * 100, 2)
-                
-        # Add some general metrics if the question is generic
-        if len(metrics) < 2:
-            metrics["total_bookings"] = len(self.df)
-            metrics["average_daily_rate"] = round(self.df["adr"].mean(), 2)
-            metrics["cancellation_rate"] = round(self.df["is_canceled"].mean() * 100, 2)
+        Parameters:
+            question (str): The question being asked
             
-        return metrics
+        Returns:
+            Optional[Dict[str, List[Any]]]: Column -> values, or None when filtering is disabled
+        """
+        if not config.FILTERED_RETRIEVAL:
+            return None
+        return self.dimension_index.extract_filters(question)
     
     def _legacy_answer_question(self, question: str) -> Dict[str, Any]:
         """
@@ -230,6 +652,7 @@ class HotelAnalytics:
         context = " ".join([item['text'] for item in retrieved])
         
         # Also, perform predefined question matching using cosine similarity.
+        from sklearn.metrics.pairwise import cosine_similarity
         question_embedding = self.model.encode([question])
         similarities = cosine_similarity(question_embedding, self.embeddings)[0]
         most_similar_idx = np.argmax(similarities)
@@ -264,9 +687,32 @@ class HotelAnalytics:
         """
         Returns performance metrics about the Q&A system
         """
-        return {
-            "avg_response_time_seconds": round(self.metrics["avg_response_time"], 3),
-            "successful_queries": self.metrics["successful_queries"],
-            "failed_queries": self.metrics["failed_queries"],
-            "total_queries": self.metrics["successful_queries"] + self.metrics["failed_queries"]
+        successful = int(QUESTIONS.value(outcome="success"))
+        failed = int(QUESTIONS.value(outcome="failed"))
+        latency = stage_snapshots()
+        performance = {
+            "avg_response_time_seconds": round(latency["request_total"]["mean"], 3) if "request_total" in latency else 0,
+            "successful_queries": successful,
+            "failed_queries": failed,
+            "total_queries": successful + failed,
+            # Count, mean and p50/p90/p99 in seconds per pipeline stage
+            "latency_seconds": latency
         }
+        if self.vector_store.batcher is not None:
+            performance["query_batching"] = self.vector_store.batcher.stats()
+        scheduler = getattr(self.vector_store.llm_reasoner, "scheduler", None)
+        if scheduler is not None:
+            performance["llm_batching"] = scheduler.stats()
+        performance["answer_cache"] = self.answer_cache.stats()
+        completed, cancelled = STREAMS.value(outcome="completed"), STREAMS.value(outcome="cancelled")
+        if completed or cancelled:
+            ttft = STREAM_TTFT_SECONDS.snapshot()
+            tokens_per_second = STREAM_TOKENS_PER_SECOND.snapshot()
+            performance["streaming"] = {
+                "streams": int(completed + cancelled),
+                "cancelled": int(cancelled),
+                "avg_time_to_first_token_seconds": round(ttft["mean"], 3) if ttft else None,
+                "p90_time_to_first_token_seconds": round(ttft["p90"], 3) if ttft else None,
+                "avg_tokens_per_second": round(tokens_per_second["mean"], 2) if tokens_per_second else None
+            }
+        return performance
@@ -0,0 +1,137 @@
+"""
+Background sampling of system and process resource usage.
+
+Measuring CPU usage takes an interval: psutil.cpu_percent(interval=0.1) blocks its caller for
+100 ms. Health checks run often, so instead a daemon thread samples CPU, memory, disk and the
+process's resident memory at a fixed interval into a fixed-size ring buffer, and health
+checks read the latest sample and a summary of the recent ones without waiting.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sampled values, summarized by ResourceSampler.summary
+FIELDS = ("cpu_usage_percent", "memory_usage_percent", "disk_usage_percent", "process_rss_mb",
+          "process_cpu_percent")
+
+
+class ResourceSampler:
+    """
+    Samples resource usage on a daemon thread and keeps the last history_size samples.
+    """
+
+    def __init__(self, interval: float = 1.0, history_size: int = 60, disk_path: str = "/"):
+        """
+        Args:
+            interval: Seconds between samples
+            history_size: Number of samples kept; older ones are dropped
+            disk_path: Path whose file system usage is sampled
+        """
+        self.interval = interval
+        self.disk_path = disk_path
+        self._samples = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process = psutil.Process()
+        # The first cpu_percent(None) call only sets the reference point for the next one
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+
+    def sample(self) -> Dict[str, Any]:
+        """
+        Take one sample now and add it to the history. Does not block: CPU usage is measured
+        since the previous sample.
+
+        Returns:
+            The sample
+        """
+        sample = {
+            "timestamp": time.time(),
+            "cpu_usage_percent": psutil.cpu_percent(interval=None),
+            "memory_usage_percent": psutil.virtual_memory().percent,
+            "disk_usage_percent": psutil.disk_usage(self.disk_path).percent,
+            "process_rss_mb": round(self._process.memory_info().rss / 1e6, 1),
+            "process_cpu_percent": self._process.cpu_percent(interval=None)
+        }
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"Error sampling resource usage: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the sampling thread, if it is not running yet."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sampling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def latest(self) -> Dict[str, Any]:
+        """The most recent sample; one is taken now if there is none yet."""
+        with self._lock:
+            if self._samples:
+                return self._samples[-1]
+        return self.sample()
+
+    def history(self, seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        The kept samples, oldest first.
+
+        Args:
+            seconds: Only return samples taken within this many seconds; all when None
+
+        Returns:
+            The samples
+        """
+        with self._lock:
+            samples = list(self._samples)
+        if seconds is not None:
+            since = time.time() - seconds
+            samples = [sample for sample in samples if sample["timestamp"] >= since]
+        return samples
+
+    def summary(self, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Minimum, mean and maximum of every field over the recent samples.
+
+        Args:
+            seconds: Window to summarize; all kept samples when None
+
+        Returns:
+            {"samples": count, "window_seconds": span, field: {"min", "mean", "max"}, ...}
+        """
+        samples = self.history(seconds)
+        summary: Dict[str, Any] = {
+            "samples": len(samples),
+            "window_seconds": round(samples[-1]["timestamp"] - samples[0]["timestamp"], 1) if samples else 0.0
+        }
+        for field in FIELDS:
+            values = [sample[field] for sample in samples]
+            if values:
+                summary[field] = {"min": min(values), "mean": round(sum(values) / len(values), 1),
+                                  "max": max(values)}
+        return summary
@@ -0,0 +1,387 @@
+"""
+Memory-mapped data, embeddings and index shared by all API worker processes.
+
+Every uvicorn worker normally builds its own HotelAnalytics: it loads the bookings, renders
+the summaries, loads the embeddings and the FAISS index, and keeps a private copy of all of
+them, so memory grows linearly with the number of workers. In shared mode one builder
+process writes these artifacts once to a snapshot directory, and the workers map the files
+read-only instead of loading them. The mapped pages are the operating system's page cache,
+so every worker shares the same physical memory:
+
+- bookings.arrow:       the bookings as an uncompressed Arrow IPC file, converted to a
+                        DataFrame whose columns point into the mapping
+- texts.arrow:          the distinct summary texts, read one at a time from the mapping
+- *.npy:                embeddings, row -> text ids, text -> rows map and the retrieval
+                        partitions, loaded with numpy's mmap_mode="r"
+- index-<spec>.faiss:   the FAISS index; the inverted lists of IVF indexes and the vectors of
+                        flat and HNSW indexes are mapped (see index_mmap_flags)
+
+A snapshot is written to a temporary directory and renamed into place, then the CURRENT file
+is switched to it, so workers never see a partial snapshot and a rebuild does not disturb
+workers that already mapped the previous one. Ingested bookings are added to private copies
+in the worker that receives them (copy-on-write); they are not written to the snapshot.
+
+Build a snapshot (after preprocessing, and again whenever the data changes) with:
+    python -m src.analytics.shared_artifacts
+and start the workers with HOTEL_ANALYTICS_SHARED_ARTIFACTS_DIR pointing at the same directory.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import faiss
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.analytics.partitions import RowPartitions
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump whenever the snapshot layout changes so older snapshots are ignored
+FORMAT_VERSION = 1
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+BOOKINGS_FILE = "bookings.arrow"
+TEXTS_FILE = "texts.arrow"
+EMBEDDINGS_FILE = "embeddings.npy"
+TEXT_IDS_FILE = "text_ids.npy"
+ROW_ORDER_FILE = "row_order.npy"
+ROW_OFFSETS_FILE = "row_offsets.npy"
+
+# Read the index in place from the file instead of copying it into memory. IO_FLAG_MMAP maps
+# the inverted lists of IVF indexes; IO_FLAG_MMAP_IFC (faiss >= 1.8) maps flat code arrays
+IVF_MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+CODES_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+
+
+def index_mmap_flags(index_spec: str) -> int:
+    """
+    The faiss.read_index flags that map an index of the given spec from its file.
+
+    For IVF indexes (ivf_flat, ivf_pq) the inverted lists, i.e. the codes and ids of all
+    vectors, are mapped; the coarse quantizer and PQ tables are small and stay private. For
+    flat and HNSW indexes the vectors are mapped, but the HNSW graph is read into private
+    memory, and with faiss versions before 1.8 (no IO_FLAG_MMAP_IFC) so are the vectors.
+    """
+    return IVF_MMAP_FLAGS if index_spec.startswith("ivf") else CODES_MMAP_FLAGS
+
+
+def copy_mapped_index(index: Any, index_path: str) -> Any:
+    """
+    A private, writable copy of an index read with index_mmap_flags, to add vectors to.
+
+    Mapped IVF inverted lists can be neither serialized nor cloned, so IVF indexes are read
+    again from their file without mapping; other indexes are copied in memory.
+    """
+    if faiss.try_extract_index_ivf(index) is not None:
+        return faiss.read_index(index_path)
+    return faiss.deserialize_index(faiss.serialize_index(index))
+
+
+def _index_file(index_spec: str) -> str:
+    return f"index-{index_spec}.faiss"
+
+
+def _partition_files(column: str):
+    return f"partition-{column}-rows.npy", f"partition-{column}-offsets.npy"
+
+
+def _source_stamp(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class SharedTexts(Sequence[str]):
+    """
+    The distinct texts of a snapshot, read from a memory-mapped Arrow array on access.
+
+    Texts appended after loading (ingested bookings) are kept in a private list.
+    """
+
+    def __init__(self, array: pa.Array):
+        self._array = array
+        self._base = len(array)
+        self._extra: List[str] = []
+
+    def __len__(self) -> int:
+        return self._base + len(self._extra)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if position < self._base:
+            return self._array[position].as_py()
+        return self._extra[position - self._base]
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk_start in range(0, self._base, 65536):
+            yield from self._array.slice(chunk_start, 65536).to_pylist()
+        yield from self._extra
+
+    def extend(self, texts: Sequence[str]):
+        self._extra.extend(texts)
+
+
+@dataclass
+class SharedArtifacts:
+    """
+    A loaded snapshot. All arrays are read-only memory mappings.
+
+    Attributes:
+        manifest: Snapshot metadata (see write_shared_artifacts)
+        data: The bookings, without the text column
+        texts: The distinct texts
+        text_ids: Text id of every row
+        row_order: Row ids grouped by text id (see VectorStore.row_ids)
+        row_offsets: Start of each text's rows in row_order
+        embeddings: One embedding per distinct text
+        index: The FAISS index over the embeddings
+        index_path: The file the index is mapped from
+        partitions: Row ids per value of the retrieval filter columns
+    """
+    manifest: Dict[str, Any]
+    data: pd.DataFrame
+    texts: SharedTexts
+    text_ids: np.ndarray
+    row_order: np.ndarray
+    row_offsets: np.ndarray
+    embeddings: np.ndarray
+    index: Any
+    index_path: str
+    partitions: RowPartitions
+
+
+def _write_arrow(path: str, table: pa.Table):
+    # Uncompressed and in a single record batch, so columns map directly onto the file
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+
+
+def _read_arrow(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def write_shared_artifacts(root: str, store: Any, data_version: str, source_path: str,
+                           keep: int = 2) -> str:
+    """
+    Write a snapshot of a vector store and its bookings and make it the current one.
+
+    Args:
+        root: Directory holding the snapshots
+        store: The VectorStore to snapshot; its data is stored without the text column
+        data_version: Version of the bookings data (see compute_data_version)
+        source_path: The processed bookings file the data was loaded from; workers ignore
+            the snapshot once this file changes
+        keep: Number of most recent snapshots to keep, the new one included
+
+    Returns:
+        The path of the written snapshot
+    """
+    os.makedirs(root, exist_ok=True)
+    # Names sort by creation time
+    name = f"snapshot-{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    tmp_dir = os.path.join(root, f".tmp-{name}")
+    os.makedirs(tmp_dir)
+
+    try:
+        data = store.data.drop(columns=[store.text_column])
+        _write_arrow(os.path.join(tmp_dir, BOOKINGS_FILE), pa.Table.from_pandas(data, preserve_index=False))
+        texts = pa.array(list(store.texts), type=pa.large_string())
+        _write_arrow(os.path.join(tmp_dir, TEXTS_FILE), pa.table({"text": texts}))
+        np.save(os.path.join(tmp_dir, EMBEDDINGS_FILE), np.ascontiguousarray(store.embeddings, dtype="float32"))
+        np.save(os.path.join(tmp_dir, TEXT_IDS_FILE), np.asarray(store.text_ids))
+        row_order, row_offsets = store.row_map()
+        np.save(os.path.join(tmp_dir, ROW_ORDER_FILE), np.asarray(row_order))
+        np.save(os.path.join(tmp_dir, ROW_OFFSETS_FILE), np.asarray(row_offsets))
+        faiss.write_index(store.index, os.path.join(tmp_dir, _index_file(store.index_config.spec)))
+
+        partition_values = {}
+        for column, (values, rows, offsets) in store.partitions.to_arrays().items():
+            rows_file, offsets_file = _partition_files(column)
+            np.save(os.path.join(tmp_dir, rows_file), rows)
+            np.save(os.path.join(tmp_dir, offsets_file), offsets)
+            partition_values[column] = values
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "data_version": data_version,
+            "model_name": store.model_name,
+            "text_column": store.text_column,
+            "index_spec": store.index_config.spec,
+            "rows": int(len(data)),
+            "texts": int(len(texts)),
+            "dimension": int(store.dimension),
+            "partitions": partition_values,
+            "source": _source_stamp(source_path),
+            "created_at": time.time()
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_dir, os.path.join(root, name))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Switch workers to the new snapshot; the pointer file is replaced atomically
+    pointer_tmp = os.path.join(root, f".{CURRENT_FILE}-{uuid.uuid4().hex}")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(root, CURRENT_FILE))
+
+    _prune(root, keep, current=name)
+    logger.info(f"Shared artifacts for {len(data)} rows and {len(texts)} texts written to {name}")
+    return os.path.join(root, name)
+
+
+def _prune(root: str, keep: int, current: str):
+    # Workers that mapped an older snapshot keep their mappings after the files are removed
+    snapshots = sorted(name for name in os.listdir(root) if name.startswith("snapshot-") and name != current)
+    for name in snapshots[:max(len(snapshots) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        logger.info(f"Removed old shared artifacts snapshot {name}")
+
+
+def current_snapshot(root: str) -> Optional[str]:
+    """The path of the current snapshot in root, or None when there is none."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(root, name)
+    return path if os.path.exists(os.path.join(path, MANIFEST_FILE)) else None
+
+
+def load_shared_artifacts(root: str, index_spec: str, model_name: str,
+                          source_path: Optional[str] = None) -> Optional[SharedArtifacts]:
+    """
+    Map the current snapshot, if there is a usable one.
+
+    Args:
+        root: Directory holding the snapshots
+        index_spec: Index configuration the worker expects (IndexConfig.spec)
+        model_name: Embedding model the worker uses for queries
+        source_path: The processed bookings file; a snapshot built from an older version of
+            it is not used. Not checked when None or when the file does not exist
+
+    Returns:
+        The mapped artifacts, or None when there is no snapshot or it does not match the
+        configuration or the data file
+    """
+    snapshot = current_snapshot(root)
+    if snapshot is None:
+        logger.warning(f"No shared artifacts snapshot in {root}")
+        return None
+
+    try:
+        with open(os.path.join(snapshot, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            logger.warning(f"Ignoring shared artifacts snapshot {snapshot} with an incompatible format")
+            return None
+        if manifest["model_name"] != model_name or manifest["index_spec"] != index_spec:
+            logger.warning(f"Ignoring shared artifacts snapshot {snapshot}: built for {manifest['model_name']} "
+                           f"with a {manifest['index_spec']} index, expected {model_name} with {index_spec}")
+            return None
+        if source_path is not None and os.path.exists(source_path):
+            stamp = {key: value for key, value in _source_stamp(source_path).items() if key != "path"}
+            if any(manifest["source"].get(key) != value for key, value in stamp.items()):
+                logger.warning(f"Ignoring shared artifacts snapshot {snapshot}: {source_path} changed since it was built")
+                return None
+
+        mapped = lambda name: np.load(os.path.join(snapshot, name), mmap_mode="r")
+        # The DataFrame's columns are views into the mapped file (except columns with nulls)
+        data = _read_arrow(os.path.join(snapshot, BOOKINGS_FILE)).to_pandas(split_blocks=True)
+        texts = SharedTexts(_read_arrow(os.path.join(snapshot, TEXTS_FILE)).column("text").chunk(0))
+        index_path = os.path.join(snapshot, _index_file(index_spec))
+        index = faiss.read_index(index_path, index_mmap_flags(index_spec))
+        arrays = {}
+        for column, values in manifest["partitions"].items():
+            rows_file, offsets_file = _partition_files(column)
+            arrays[column] = (values, mapped(rows_file), mapped(offsets_file))
+
+        artifacts = SharedArtifacts(
+            manifest=manifest,
+            data=data,
+            texts=texts,
+            text_ids=mapped(TEXT_IDS_FILE),
+            row_order=mapped(ROW_ORDER_FILE),
+            row_offsets=mapped(ROW_OFFSETS_FILE),
+            embeddings=mapped(EMBEDDINGS_FILE),
+            index=index,
+            index_path=index_path,
+            partitions=RowPartitions.from_arrays(manifest["rows"], arrays)
+        )
+        if len(data) != manifest["rows"] or index.ntotal != manifest["texts"] or len(texts) != manifest["texts"]:
+            logger.warning(f"Shared artifacts snapshot {snapshot} is inconsistent, ignoring it")
+            return None
+        logger.info(f"Mapped shared artifacts snapshot {os.path.basename(snapshot)} "
+                    f"({manifest['rows']} rows, {manifest['texts']} texts)")
+        return artifacts
+    except Exception as e:
+        logger.warning(f"Failed to load shared artifacts snapshot {snapshot}: {str(e)}")
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Build a shared artifacts snapshot from the processed bookings data."""
+    from src import config
+    from src.analytics.embedding_engine import BACKENDS, EmbeddingConfig
+    from src.analytics.faiss_indexes import INDEX_TYPES, IndexConfig
+    from src.analytics.reports import compute_data_version
+    from src.analytics.summaries import build_summary_column
+    from src.analytics.vector_store import VectorStore
+    from src.data.storage import ANALYTICS_COLUMNS, read_bookings, resolve_bookings_path
+
+    parser = argparse.ArgumentParser(description="Build the memory-mapped artifacts shared by API workers.")
+    parser.add_argument("--data-path", default=config.PROCESSED_DATA_PATH,
+                        help="Processed bookings Parquet or CSV file")
+    parser.add_argument("--output-dir", default=config.SHARED_ARTIFACTS_DIR,
+                        help="Snapshot directory (defaults to HOTEL_ANALYTICS_SHARED_ARTIFACTS_DIR)")
+    parser.add_argument("--cache-dir", default=config.INDEX_CACHE_DIR,
+                        help="Index cache to reuse embeddings from; empty to always encode")
+    parser.add_argument("--model", default=config.EMBEDDING_MODEL_NAME,
+                        help="SentenceTransformer model used for the embeddings")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=None,
+                        help="Index type to build (defaults to HOTEL_ANALYTICS_INDEX_TYPE)")
+    parser.add_argument("--embedding-backend", choices=BACKENDS, default=None,
+                        help="Embedding backend (defaults to HOTEL_ANALYTICS_EMBEDDING_BACKEND)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Embedding worker processes, 0 for one per core "
+                             "(defaults to HOTEL_ANALYTICS_EMBEDDING_PROCESSES)")
+    parser.add_argument("--keep", type=int, default=2, help="Number of snapshots to keep")
+    args = parser.parse_args(argv)
+    if not args.output_dir:
+        parser.error("--output-dir or HOTEL_ANALYTICS_SHARED_ARTIFACTS_DIR is required")
+
+    start_time = time.time()
+    source_path = resolve_bookings_path(args.data_path)
+    df = read_bookings(source_path, columns=None if config.LOAD_ALL_COLUMNS else ANALYTICS_COLUMNS)
+    data_version = compute_data_version(df)
+    df['summary'] = build_summary_column(df)
+
+    store = VectorStore(
+        df, text_column='summary', model_name=args.model, cache_dir=args.cache_dir or None,
+        index_config=IndexConfig.from_settings(index_type=args.index_type),
+        embedding_config=EmbeddingConfig.from_settings(backend=args.embedding_backend, processes=args.processes)
+    )
+    write_shared_artifacts(args.output_dir, store, data_version, source_path, keep=args.keep)
+    logger.info(f"Shared artifacts built in {time.time() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Column-wise generation of the booking summaries indexed by the vector store.
+
+The summary template is rendered over whole columns instead of row by row: every column is
+factorized, its distinct values are formatted once with ``str()`` (exactly what the f-string
+in the row-wise version does), and the formatted pieces are gathered and joined element-wise
+with Arrow compute kernels. Booking columns have few distinct values relative to the number
+of rows, so the Python-level work is proportional to the number of distinct values, not rows.
+"""
+
+import string
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+SUMMARY_TEMPLATE = (
+    "Booking from {country} in {arrival_date_month} {arrival_date_year} "
+    "with daily rate ${adr} for {total_nights} nights. "
+    "Total price: ${total_price}. "
+    "Booking was {cancellation_status}. "
+    "Customer type: {customer_type}. "
+    "Room type: {reserved_room_type}. "
+    "Lead time: {lead_time} days."
+)
+
+# Fields that are derived from other columns rather than read directly
+DERIVED_FIELDS: Dict[str, Callable[[pd.DataFrame], np.ndarray]] = {
+    "cancellation_status": lambda df: np.where(df['is_canceled'].to_numpy() == 1, 'canceled', 'not canceled'),
+}
+
+# Rows rendered per chunk; bounds the size of the intermediate string arrays
+DEFAULT_CHUNK_SIZE = 500_000
+
+
+def compile_template(template: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Split a format template into (literal, field) pairs.
+
+    Args:
+        template: A str.format style template with plain field names
+
+    Returns:
+        A list of (literal text, field name or None) pairs in template order
+    """
+    parts = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Format specs and conversions are not supported: {field}")
+        parts.append((literal, field))
+    return parts
+
+
+def _format_values(values: pd.Series) -> pa.Array:
+    """
+    Format a column with str(), formatting each distinct value only once.
+    """
+    arr = values.to_numpy()
+    if arr.dtype.kind == 'f' and np.any((arr == 0) & np.signbit(arr)):
+        # factorize treats 0.0 and -0.0 as equal but str() does not
+        return pa.array([str(v) for v in arr.tolist()], type=pa.string())
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    # tolist() turns numpy scalars into Python scalars, matching what the f-string sees
+    formatted = pa.array([str(v) for v in np.asarray(uniques, dtype=object).tolist()], type=pa.string())
+    return formatted.take(pa.array(codes))
+
+
+def _render_chunk(df: pd.DataFrame, parts: List[Tuple[str, Optional[str]]],
+                  derived: Dict[str, Callable[[pd.DataFrame], np.ndarray]]) -> np.ndarray:
+    pieces = []
+    for literal, field in parts:
+        if literal:
+            pieces.append(pa.scalar(literal, type=pa.string()))
+        if field is not None:
+            values = pd.Series(derived[field](df)) if field in derived else df[field]
+            pieces.append(_format_values(values))
+    # The last argument is the separator
+    joined = pc.binary_join_element_wise(*pieces, "")
+    return joined.to_numpy(zero_copy_only=False)
+
+
+def render_template(df: pd.DataFrame, template: str,
+                    derived: Optional[Dict[str, Callable[[pd.DataFrame], np.ndarray]]] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.Series:
+    """
+    Render a template for every row of a DataFrame using column-wise operations.
+
+    Produces the same text as formatting each row with an f-string.
+
+    Args:
+        df: The data to render
+        template: A str.format style template whose fields are column or derived field names
+        derived: Optional mapping of field name to a function computing that field for a frame
+        chunk_size: Number of rows rendered at once
+
+    Returns:
+        A Series of rendered strings aligned with df's index
+    """
+    parts = compile_template(template)
+    derived = derived or {}
+    chunks = [
+        _render_chunk(df.iloc[start:start + chunk_size], parts, derived)
+        for start in range(0, len(df), chunk_size)
+    ]
+    values = np.concatenate(chunks) if chunks else np.array([], dtype=object)
+    return pd.Series(values, index=df.index, dtype=object)
+
+
+def build_summary_column(df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.Series:
+    """
+    Builds the natural language booking summaries that are indexed by the vector store.
+
+    Args:
+        df: The processed bookings data
+        chunk_size: Number of rows rendered at once
+
+    Returns:
+        One summary string per booking
+    """
+    return render_template(df, SUMMARY_TEMPLATE, DERIVED_FIELDS, chunk_size=chunk_size)
+
+
+def build_summary_column_rowwise(df: pd.DataFrame) -> pd.Series:
+    """
+    Row-wise reference implementation of build_summary_column.
+
+    Kept for parity tests and benchmarks; it creates a Series per row and is much slower.
+    """
+    return df.apply(
+        lambda row: (f"Booking from {row['country']} in {row['arrival_date_month']} {row['arrival_date_year']} "
+                     f"with daily rate ${row['adr']} for {row['total_nights']} nights. "
+                     f"Total price: ${row['total_price']}. "
+                     f"Booking was {'canceled' if row['is_canceled'] == 1 else 'not canceled'}. "
+                     f"Customer type: {row['customer_type']}. "
+                     f"Room type: {row['reserved_room_type']}. "
+                     f"Lead time: {row['lead_time']} days."),
+        axis=1
+    )
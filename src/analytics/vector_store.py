@@ -1,79 +1,489 @@
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import pandas as pd
 from typing import List, Dict, Any, Optional
 import logging
+import threading
+from dataclasses import dataclass
+from src.analytics.index_cache import compute_cache_key, load_index_cache, save_index_cache
+from src.analytics.faiss_indexes import IndexConfig, build_index, search_subset, set_search_params
+from src.analytics.partitions import RowPartitions
+from src.analytics.growable import GrowableArray, GrowableFrame
+from src.analytics.shared_artifacts import SharedArtifacts, copy_mapped_index
+from src.analytics.embedding_engine import EmbeddingConfig, EmbeddingEngine
+from src.analytics.model_registry import registry, get_embedding_model
+from src.analytics.batching import QueryBatcher
+from src.analytics.locks import ReadWriteLock
+from src.analytics.metrics import stage_timer
+from src import config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Registry keys of LLM reasoners are this prefix followed by the model name
+LLM_KEY_PREFIX = "llm:"
+
+def _row_map(text_ids: np.ndarray, n_texts: int):
+    """
+    Groups row ids by text id: the rows of text t are order[offsets[t]:offsets[t + 1]], in
+    ascending order.
+    """
+    order = np.argsort(text_ids, kind="stable")
+    offsets = np.zeros(n_texts + 1, dtype=np.int64)
+    np.cumsum(np.bincount(text_ids, minlength=n_texts), out=offsets[1:])
+    return order, offsets
+
+# The row map is rebuilt once rows appended since the last build exceed this share of it
+ROW_MAP_REBUILD_FRACTION = 0.125
+
+@dataclass
+class PendingRows:
+    """
+    Rows prepared by VectorStore.prepare_rows, not visible to queries until commit_rows.
+    """
+    base_rows: int
+    new_texts: List[str]
+    new_embeddings: Optional[np.ndarray]
+    embeddings: np.ndarray
+    text_ids: np.ndarray
+    extra_rows: Dict[int, np.ndarray]
+    row_map: Optional[tuple]
+    partitions: RowPartitions
+    data: pd.DataFrame
+    index: Optional[Any]
+
 class VectorStore:
-    def __init__(self, data: pd.DataFrame, text_column: str, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(self, data: pd.DataFrame, text_column: str, model_name: str = 'all-MiniLM-L6-v2',
+                 cache_dir: Optional[str] = None, index_config: Optional[IndexConfig] = None,
+                 embedding_config: Optional[EmbeddingConfig] = None):
         """
         Initializes the vector store with data embeddings.
+        
+        Rows with identical texts share one embedding: only the unique texts are encoded and
+        indexed, and each unique text maps back to the rows it came from.
 
         Parameters:
         - data (pd.DataFrame): The DataFrame containing the data to index.
         - text_column (str): The column name in the DataFrame containing text to embed.
         - model_name (str): The SentenceTransformer model to use for embedding generation.
+        - cache_dir (str): Optional directory for the on-disk embedding/index cache. When a cache
+          entry matching the texts and model exists it is loaded instead of re-encoding.
+        - index_config (IndexConfig): The FAISS index type and its build/search parameters.
+          Defaults to an exact flat index.
+        - embedding_config (EmbeddingConfig): Backend, worker processes and batch size used to
+          encode the texts when they are not cached. Defaults to the deployment settings.
         """
-        # Initialize the SentenceTransformer model
-        self.model = SentenceTransformer(model_name)
+        # The SentenceTransformer model is shared through the model registry and only
+        # loaded when it is first needed (a cache hit does not need it until the first query)
+        self.model_name = model_name
         
-        # Store the DataFrame and extract the texts from the specified column
+        # Store the DataFrame and extract the unique texts from the specified column.
+        # text_ids maps every row to its unique text; the index holds one vector per text.
         self.data = data
-        self.texts = data[text_column].tolist()
+        self.text_column = text_column
+        text_ids, unique_texts = pd.factorize(data[text_column], sort=False)
+        self.texts = list(unique_texts)
+        self.text_ids = text_ids.astype(np.int64)
+        self._row_order, self._row_offsets = _row_map(self.text_ids, len(self.texts))
+        self._init_append_state()
+        logger.info(f"Indexing {len(self.texts)} unique texts for {len(self.text_ids)} rows")
+        
+        # Searches hold the read lock; appends to the index hold the write lock
+        self._lock = ReadWriteLock()
+        self._add_lock = threading.Lock()
+        
+        self.index_config = index_config or IndexConfig()
+        self.embedding_config = embedding_config or EmbeddingConfig.from_settings()
         
-        # Generate embeddings for all texts and convert them to float32 (required by FAISS)
-        self.embeddings = self.model.encode(self.texts)
-        self.embeddings = np.array(self.embeddings).astype("float32")
+        # Try the on-disk cache before paying for a full encode
+        cache_key = compute_cache_key(self.texts, model_name) if cache_dir else None
+        cached = load_index_cache(cache_dir, cache_key, self.index_config.spec) if cache_dir else None
         
-        # Determine the dimension of the embeddings
+        if cached is not None:
+            logger.info(f"Loaded {len(cached['embeddings'])} embeddings from index cache {cache_key[:12]}")
+            self.embeddings = cached["embeddings"]
+        else:
+            self._encode_texts()
         self.dimension = self.embeddings.shape[1]
         
-        # Create a FAISS index (using L2 distance)
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.index.add(self.embeddings)
+        if cached is not None and cached["index"] is not None:
+            self.index = cached["index"]
+        else:
+            # Create the FAISS index (training it first for IVF/PQ types)
+            self.index = build_index(self.embeddings, self.index_config)
+            if cache_dir:
+                try:
+                    save_index_cache(cache_dir, cache_key, model_name, self.texts, self.embeddings,
+                                     self.index, index_spec=self.index_config.spec)
+                except Exception as e:
+                    # A read-only or full disk should not prevent the service from starting
+                    logger.warning(f"Could not write index cache: {str(e)}")
+        
+        # Row ids per country, arrival year/month and hotel, for filtered searches
+        self._init_search(RowPartitions(data), index_mapped=False)
+    
+    @classmethod
+    def from_artifacts(cls, artifacts: SharedArtifacts, model_name: str,
+                       index_config: Optional[IndexConfig] = None) -> "VectorStore":
+        """
+        Creates a vector store over a memory-mapped shared artifacts snapshot (see
+        src/analytics/shared_artifacts.py), without encoding or indexing anything. The texts,
+        embeddings, index and row maps stay mapped until rows are added.
+
+        Parameters:
+        - artifacts (SharedArtifacts): The mapped snapshot.
+        - model_name (str): The SentenceTransformer model used to encode queries.
+        - index_config (IndexConfig): The index configuration the snapshot was built with;
+          its search parameters are applied. Defaults to an exact flat index.
+        """
+        store = cls.__new__(cls)
+        store.model_name = model_name
+        store.data = artifacts.data
+        store.text_column = artifacts.manifest["text_column"]
+        store.texts = artifacts.texts
+        store.text_ids = artifacts.text_ids
+        store._row_order, store._row_offsets = artifacts.row_order, artifacts.row_offsets
+        store._init_append_state()
+        store._lock = ReadWriteLock()
+        store._add_lock = threading.Lock()
+        store.index_config = index_config or IndexConfig()
+        store.embedding_config = EmbeddingConfig.from_settings()
+        store.embeddings = artifacts.embeddings
+        store.dimension = artifacts.embeddings.shape[1]
+        store.index = artifacts.index
+        store._index_path = artifacts.index_path
+        store._init_search(artifacts.partitions, index_mapped=True)
+        logger.info(f"Vector store mapped {len(store.texts)} unique texts for {len(store.text_ids)} rows")
+        return store
+    
+    def _init_append_state(self):
+        """
+        Sets up the state add_rows() keeps between appends. The buffers and the text lookup
+        are created on the first append, so a store that never grows does not pay for them.
+        """
+        # Rows appended since the row map was built, per text id (see row_ids())
+        self._extra_rows: Dict[int, np.ndarray] = {}
+        self._extra_row_count = 0
+        self._text_lookup: Optional[Dict[str, int]] = None
+        self._embedding_buffer: Optional[GrowableArray] = None
+        self._text_id_buffer: Optional[GrowableArray] = None
+        self._data_buffer: Optional[GrowableFrame] = None
+    
+    def _init_search(self, partitions: RowPartitions, index_mapped: bool):
+        """
+        Sets up the query-time state shared by both constructors.
+        """
+        # Search parameters are not part of the cache key, so always apply the configured ones
+        self.set_search_params(nprobe=self.index_config.nprobe, ef_search=self.index_config.ef_search)
+        
+        self.partitions = partitions
+        self.filter_exact_max_rows = config.FILTERED_SEARCH_EXACT_MAX_ROWS
+        # A memory-mapped index is read-only; add_rows() switches to a private copy
+        self._index_mapped = index_mapped
+        
+        # Queries are executed directly until enable_batching() is called
+        self.batcher = None
         
         # Initialize LLM reasoner to None (will be loaded on demand to save resources)
         self.llm_reasoner = None
     
-    def query(self, query_text: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    @property
+    def model(self):
+        """
+        The shared SentenceTransformer model, loaded on first use.
+        """
+        return get_embedding_model(self.model_name)
+    
+    def _encode_texts(self):
+        """
+        Encodes all texts with the bulk embedding engine.
+        """
+        # Generate embeddings for all texts as float32 (required by FAISS), sharded across
+        # worker processes when configured
+        engine = EmbeddingEngine(self.model_name, self.embedding_config)
+        self.embeddings = engine.encode(self.texts)
+    
+    def row_ids(self, text_id: int) -> np.ndarray:
+        """
+        Returns the ids of the rows whose text is the unique text text_id, in ascending order.
+        """
+        offsets = self._row_offsets
+        rows = self._row_order[offsets[text_id]:offsets[text_id + 1]] if text_id + 1 < len(offsets) \
+            else self._row_order[:0]
+        # Appended rows come after all rows in the row map, so the result stays sorted
+        extra = self._extra_rows.get(text_id)
+        return rows if extra is None else np.concatenate([rows, extra])
+    
+    def row_map(self):
+        """
+        Returns (order, offsets): all row ids grouped by text id, where the rows of text t are
+        order[offsets[t]:offsets[t + 1]], in ascending order.
+        """
+        if not self._extra_rows:
+            return self._row_order, self._row_offsets
+        return _row_map(np.asarray(self.text_ids), len(self.texts))
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """
+        Tunes the query-time recall/latency trade-off of approximate indexes.
+
+        Parameters:
+        - nprobe (int): Number of IVF cells visited per query (IVF index types only).
+        - ef_search (int): Candidate list size per query (HNSW only).
+        """
+        set_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+    
+    def enable_batching(self, window_ms: float = 5.0, max_batch_size: int = 32):
+        """
+        Routes query() calls through a micro-batching dispatcher, so concurrent queries are
+        encoded and searched together.
+
+        Parameters:
+        - window_ms (float): How long to wait for more queries after the first one arrives.
+        - max_batch_size (int): Maximum number of queries executed in one batch.
+        """
+        if self.batcher is None:
+            self.batcher = QueryBatcher(self.query_batch, window_ms=window_ms, max_batch_size=max_batch_size)
+    
+    def query(self, query_text: str, top_k: int = 3,
+              filters: Optional[Dict[str, List[Any]]] = None,
+              query_embedding: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
         """
         Queries the FAISS index with the given query text and returns the top_k similar texts.
 
         Parameters:
         - query_text (str): The query string to search for.
         - top_k (int): The number of top similar results to return.
+        - filters (Dict): Optional column -> accepted values (country, arrival_date_year,
+          arrival_date_month, hotel). Only the matching rows are searched; when no row
+          matches, the whole index is searched.
+        - query_embedding (np.ndarray): The query's embedding, when the caller already
+          encoded it (e.g. for the answer cache); it is not encoded again.
+
+        Returns:
+        - List[Dict]: A list of dictionaries, each containing the retrieved text, its distance,
+          the first matching row with that text ("index"), the number of matching rows with
+          that text ("bookings") and the unique text id ("text_id"; see row_ids()).
+        """
+        if self.batcher is not None:
+            return self.batcher.submit(query_text, top_k, filters, embedding=query_embedding)
+        return self.query_batch([query_text], top_k, [filters], query_embeddings=[query_embedding])[0]
+    
+    def query_batch(self, query_texts: List[str], top_k: int = 3,
+                    filters: Optional[List[Optional[Dict[str, List[Any]]]]] = None,
+                    query_embeddings: Optional[List[Optional[np.ndarray]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Queries the FAISS index for several query texts with a single encode and search call.
 
+        Parameters:
+        - query_texts (List[str]): The query strings to search for.
+        - top_k (int): The number of top similar results to return per query.
+        - filters (List[Dict]): Optional filters per query, as in query().
+        - query_embeddings (List[np.ndarray]): Optional precomputed embedding per query (None
+          for the queries that still need encoding).
+
+        Returns:
+        - List[List[Dict]]: One result list per query, in the same format as query().
+        """
+        # Generate the embeddings for all query texts that have none yet at once
+        missing = list(range(len(query_texts))) if query_embeddings is None else \
+            [i for i, embedding in enumerate(query_embeddings) if embedding is None]
+        if len(missing) == len(query_texts):
+            with stage_timer("query_embedding"):
+                query_embeddings = self.model.encode(query_texts)
+        elif missing:
+            query_embeddings = list(query_embeddings)
+            with stage_timer("query_embedding"):
+                encoded = self.model.encode([query_texts[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                query_embeddings[i] = embedding
+        query_embeddings = np.array(query_embeddings).astype("float32")
+        
+        with self._lock.read():
+            # Search the FAISS index for the top_k nearest neighbors of every query
+            with stage_timer("faiss_search"):
+                subsets = [self.partitions.select(f) for f in filters] if filters else [None] * len(query_texts)
+                distances, indices = self._search(query_embeddings, top_k, subsets)
+            
+            # Prepare the results lists with text and distance.
+            # Approximate indexes return -1 when fewer than top_k neighbours were found.
+            return [
+                [
+                    self._result(int(idx), float(dist), subset)
+                    for idx, dist in zip(text_indices, text_distances)
+                    if idx >= 0
+                ]
+                for text_indices, text_distances, subset in zip(indices, distances, subsets)
+            ]
+    
+    def _result(self, text_id: int, distance: float, subset: Optional[np.ndarray]) -> Dict[str, Any]:
+        rows = self.row_ids(text_id)
+        if subset is not None and len(subset):
+            # Only the rows that match the query's filters
+            rows = rows[np.isin(rows, subset, assume_unique=True)]
+        return {"text": self.texts[text_id], "distance": distance, "index": int(rows[0]),
+                "bookings": len(rows), "text_id": text_id}
+    
+    def _search(self, query_embeddings: np.ndarray, top_k: int, subsets: List[Optional[np.ndarray]]):
+        """
+        Searches the whole index for unfiltered queries and only the texts of the matching
+        rows for filtered ones. Must be called with the read lock held.
+        """
+        filtered = [i for i, ids in enumerate(subsets) if ids is not None and len(ids)]
+        if not filtered:
+            return self.index.search(query_embeddings, top_k)
+        
+        distances = np.full((len(query_embeddings), top_k), np.inf, dtype="float32")
+        indices = np.full((len(query_embeddings), top_k), -1, dtype="int64")
+        unfiltered = sorted(set(range(len(query_embeddings))) - set(filtered))
+        if unfiltered:
+            distances[unfiltered], indices[unfiltered] = self.index.search(query_embeddings[unfiltered], top_k)
+        for i in filtered:
+            distances[i:i + 1], indices[i:i + 1] = search_subset(
+                self.index, self.embeddings, query_embeddings[i:i + 1], top_k,
+                np.unique(self.text_ids[subsets[i]]), exact_max_rows=self.filter_exact_max_rows
+            )
+        return distances, indices
+    
+    def add_rows(self, rows: pd.DataFrame, data: Optional[pd.DataFrame] = None):
+        """
+        Appends rows to the store without rebuilding the index. Only texts that are not
+        indexed yet are encoded; trained index types (IVF) assign the new vectors to their
+        existing cells. Equivalent to prepare_rows() followed by commit_rows().
+        
+        Queries running concurrently see the store either before or after the append.
+        
+        Parameters:
+        - rows (pd.DataFrame): The new rows, including the text column.
+        - data (pd.DataFrame): The full DataFrame after the append (the existing rows followed by
+          the new ones), if the caller already built it. Defaults to appending the rows.
+        """
+        with self._add_lock:
+            pending = self.prepare_rows(rows, data)
+            if pending is not None:
+                self.commit_rows(pending)
+    
+    def prepare_rows(self, rows: pd.DataFrame, data: Optional[pd.DataFrame] = None) -> Optional[PendingRows]:
+        """
+        Does the work of appending rows (encoding the new texts and extending the row maps,
+        embeddings and partitions) without changing what queries see, so the caller can
+        publish the rows together with its own data with commit_rows().
+        
+        The cost is proportional to the appended rows: embeddings, text ids and data are kept
+        in buffers that grow by doubling (see src/analytics/growable.py), and appended rows
+        are kept next to the row map, which is only rebuilt once they make up
+        ROW_MAP_REBUILD_FRACTION of it. Calls must be serialized with commit_rows(), e.g.
+        under one lock held across both.
+        
+        Parameters:
+        - rows (pd.DataFrame): The new rows, including the text column.
+        - data (pd.DataFrame): The full DataFrame after the append, as in add_rows().
+        
         Returns:
-        - List[Dict]: A list of dictionaries, each containing the retrieved text and its distance.
+        - PendingRows: The prepared append, or None when there are no rows.
         """
-        # Generate the embedding for the query text
-        query_embedding = self.model.encode([query_text])
-        query_embedding = np.array(query_embedding).astype("float32")
+        texts = rows[self.text_column].tolist()
+        if not texts:
+            return None
+        
+        base_rows, base_texts = len(self.text_ids), len(self.texts)
+        if self._text_lookup is None:
+            # Built once; appended texts are added to it by commit_rows()
+            self._text_lookup = {text: text_id for text_id, text in enumerate(self.texts)}
+            self._embedding_buffer = GrowableArray(self.embeddings)
+            self._text_id_buffer = GrowableArray(self.text_ids)
+        if data is None:
+            if self._data_buffer is None:
+                self._data_buffer = GrowableFrame(self.data)
+            data = self._data_buffer.extend(self.data, rows)
+        
+        # Rows whose text is already indexed reuse its vector
+        new_ids: Dict[str, int] = {}
+        batch_ids = np.empty(len(texts), dtype=np.int64)
+        for position, text in enumerate(texts):
+            text_id = self._text_lookup.get(text)
+            if text_id is None:
+                text_id = new_ids.setdefault(text, base_texts + len(new_ids))
+            batch_ids[position] = text_id
+        new_texts = list(new_ids)
+        text_ids = self._text_id_buffer.extend(base_rows, batch_ids)
         
-        # Search the FAISS index for the top_k nearest neighbors
-        distances, indices = self.index.search(query_embedding, top_k)
+        new_embeddings = np.array(self.model.encode(new_texts)).astype("float32") if new_texts else None
+        embeddings = self._embedding_buffer.extend(len(self.embeddings), new_embeddings) if new_texts \
+            else self.embeddings
         
-        # Prepare the results list with text and distance
-        results = [
-            {"text": self.texts[idx], "distance": float(dist), "index": int(idx)}
-            for idx, dist in zip(indices[0], distances[0])
-        ]
-        return results
+        # Group the new row ids by text id and append them to the text's earlier extra rows
+        order = np.argsort(batch_ids, kind="stable")
+        group_ids, starts = np.unique(batch_ids[order], return_index=True)
+        extra_rows = {}
+        for text_id, group in zip(group_ids.tolist(), np.split(order + base_rows, starts[1:])):
+            existing = self._extra_rows.get(text_id)
+            extra_rows[text_id] = group if existing is None else np.concatenate([existing, group])
+        row_map = None
+        if self._extra_row_count + len(texts) > ROW_MAP_REBUILD_FRACTION * len(self._row_order):
+            row_map = _row_map(text_ids, base_texts + len(new_texts))
+        
+        index = None
+        if new_texts and self._index_mapped:
+            # Copy-on-write: the first append copies the mapped index into private memory
+            index = copy_mapped_index(self.index, self._index_path)
+            set_search_params(index, nprobe=self.index_config.nprobe, ef_search=self.index_config.ef_search)
+            index.add(new_embeddings)
+        
+        return PendingRows(base_rows=base_rows, new_texts=new_texts, new_embeddings=new_embeddings,
+                           embeddings=embeddings, text_ids=text_ids, extra_rows=extra_rows, row_map=row_map,
+                           partitions=self.partitions.add_rows(rows), data=data, index=index)
     
+    def commit_rows(self, pending: PendingRows):
+        """
+        Makes rows prepared with prepare_rows() visible to queries, at once.
+        
+        Raises:
+        - RuntimeError: If other rows were added since the rows were prepared.
+        """
+        if pending.base_rows != len(self.text_ids):
+            raise RuntimeError("Rows were added to the vector store after these rows were prepared")
+        with self._lock.write():
+            if pending.index is not None:
+                self.index, self._index_mapped = pending.index, False
+            elif pending.new_texts:
+                self.index.add(pending.new_embeddings)
+            self.texts.extend(pending.new_texts)
+            self.embeddings = pending.embeddings
+            self.text_ids = pending.text_ids
+            if pending.row_map is not None:
+                self._row_order, self._row_offsets = pending.row_map
+                self._extra_rows, self._extra_row_count = {}, 0
+            else:
+                self._extra_rows.update(pending.extra_rows)
+                self._extra_row_count += len(pending.text_ids) - pending.base_rows
+            self.partitions = pending.partitions
+            self.data = pending.data
+        for text_id, text in enumerate(pending.new_texts, start=len(self.texts) - len(pending.new_texts)):
+            self._text_lookup[text] = text_id
+        logger.info(f"Added {len(pending.text_ids) - pending.base_rows} rows with {len(pending.new_texts)} new "
+                    f"texts to the vector store ({self.index.ntotal} texts for {len(self.text_ids)} rows)")
+    
+    @staticmethod
+    def _create_llm_reasoner(name: str):
+        # Import here to avoid circular imports and to defer the torch import until a
+        # reasoner is actually built (a model registered in advance needs neither)
+        from src.analytics.llm import LLMReasoner
+        # The model comes from the registry key ("llm:<model>"), so the two always agree
+        model_name = name[len(LLM_KEY_PREFIX):] if name.startswith(LLM_KEY_PREFIX) else name
+        return LLMReasoner(model_name=model_name,
+                           quantization=config.LLM_QUANTIZATION,
+                           context_token_budget=config.LLM_PROMPT_TOKEN_BUDGET)
+
     def _load_llm_reasoner(self):
         """
         Lazily loads the LLM reasoner when needed.
         """
         if self.llm_reasoner is None:
             try:
-                # Import here to avoid circular imports
-                from src.analytics.llm import LLMReasoner
-                self.llm_reasoner = LLMReasoner()
+                self.llm_reasoner = registry.get(f"{LLM_KEY_PREFIX}{config.LLM_MODEL_NAME}", loader=self._create_llm_reasoner)
+                self.llm_reasoner.enable_batching(config.LLM_BATCH_MAX_SIZE)
                 logger.info("LLM reasoner loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading LLM reasoner: {str(e)}")
@@ -83,19 +493,20 @@ class VectorStore:
                     "Here's the retrieved information instead: " + "; ".join(context)
                 )
     
-    def generate_answer(self, query_text: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def prepare_answer(self, query_text: str, metadata: Optional[Dict[str, Any]] = None,
+                       filters: Optional[Dict[str, List[Any]]] = None,
+                       query_embedding: Optional[np.ndarray] = None):
         """
-        Generates an answer to the query using RAG (Retrieval-Augmented Generation).
-        
-        Parameters:
-        - query_text (str): The query string to answer.
-        - metadata (Dict): Additional structured data relevant to the query.
-        
+        Retrieves the context for a query (from the rows matching the filters, if any)
+        and loads the LLM reasoner. The result can be passed to generate_answer() and
+        stream_answer() as prepared, e.g. by a caller that checks it was retrieved from the
+        same data as its metadata.
+
         Returns:
-        - Dict: A dictionary with the answer and confidence score.
+        - Tuple: (retrieved texts, confidence score, metadata including the relevant records).
         """
         # Retrieve relevant contexts
-        retrieval_results = self.query(query_text, top_k=5)
+        retrieval_results = self.query(query_text, top_k=5, filters=filters, query_embedding=query_embedding)
         retrieved_texts = [result["text"] for result in retrieval_results]
         
         # Calculate a simple confidence score based on retrieval distances
@@ -112,19 +523,79 @@ class VectorStore:
         # Get indices of retrieved documents to fetch additional metadata
         doc_indices = [result["index"] for result in retrieval_results]
         
-        # Extract relevant rows from the original DataFrame
+        # Extract relevant rows from the original DataFrame (rows are only ever appended, so
+        # the row ids stay valid however many rows were added since the search)
         relevant_data = self.data.iloc[doc_indices].to_dict('records') if doc_indices else []
         
         # Add relevant_data to metadata if provided
         if metadata is None:
             metadata = {}
         metadata["relevant_records"] = relevant_data[:2]  # Limit to first 2 records to avoid overloading
+        return retrieved_texts, float(confidence), metadata
+    
+    def generate_answer(self, query_text: str, metadata: Optional[Dict[str, Any]] = None,
+                        filters: Optional[Dict[str, List[Any]]] = None,
+                        query_embedding: Optional[np.ndarray] = None,
+                        prepared: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Generates an answer to the query using RAG (Retrieval-Augmented Generation).
+        
+        Parameters:
+        - query_text (str): The query string to answer.
+        - metadata (Dict): Additional structured data relevant to the query.
+        - filters (Dict): Restricts retrieval to matching rows, as in query().
+        - query_embedding (np.ndarray): The query's embedding, if already computed.
+        - prepared (tuple): The result of prepare_answer() for this query, if already
+          retrieved; metadata, filters and query_embedding are then not used.
+        
+        Returns:
+        - Dict: A dictionary with the answer and confidence score.
+        """
+        if prepared is None:
+            prepared = self.prepare_answer(query_text, metadata, filters, query_embedding)
+        retrieved_texts, confidence, metadata = prepared
         
         # Generate answer using LLM
-        answer = self.llm_reasoner(query_text, retrieved_texts, metadata)
+        with stage_timer("llm_generation"):
+            answer = self.llm_reasoner(query_text, retrieved_texts, metadata)
         
         return {
             "answer": answer,
-            "confidence": float(confidence),
+            "confidence": confidence,
             "retrieved_contexts": retrieved_texts[:3]  # Return top 3 contexts for reference
         }
+    
+    def stream_answer(self, query_text: str, metadata: Optional[Dict[str, Any]] = None,
+                      stop_event: Optional[threading.Event] = None,
+                      stats: Optional[Dict[str, Any]] = None,
+                      filters: Optional[Dict[str, List[Any]]] = None,
+                      query_embedding: Optional[np.ndarray] = None,
+                      prepared: Optional[tuple] = None):
+        """
+        Like generate_answer, but the answer text is produced incrementally.
+        
+        Parameters:
+        - query_text (str): The query string to answer.
+        - metadata (Dict): Additional structured data relevant to the query.
+        - stop_event (threading.Event): Cancels generation when set.
+        - stats (Dict): Receives the generation statistics (time to first token, tokens/sec).
+        - filters (Dict): Restricts retrieval to matching rows, as in query().
+        - query_embedding (np.ndarray): The query's embedding, if already computed.
+        - prepared (tuple): The result of prepare_answer() for this query, if already
+          retrieved; metadata, filters and query_embedding are then not used.
+        
+        Returns:
+        - Tuple: (dict with the confidence and retrieved contexts, iterator over answer pieces).
+          When the LLM is unavailable the iterator yields the whole fallback answer at once.
+        """
+        if prepared is None:
+            prepared = self.prepare_answer(query_text, metadata, filters, query_embedding)
+        retrieved_texts, confidence, metadata = prepared
+        info = {"confidence": confidence, "retrieved_contexts": retrieved_texts[:3]}
+        
+        if hasattr(self.llm_reasoner, "stream_answer"):
+            pieces = self.llm_reasoner.stream_answer(query_text, retrieved_texts, metadata,
+                                                     stop_event=stop_event, stats=stats)
+        else:
+            pieces = iter([self.llm_reasoner(query_text, retrieved_texts, metadata)])
+        return info, pieces
@@ -1,77 +1,467 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from typing import Any, Dict, List, Optional, Union
 from src.analytics.reports import HotelAnalytics
+from src.analytics.inference_pool import DeadlineExceededError, InferencePool, PoolFullError
+from src.analytics.metrics import REGISTRY
+from src.analytics.model_registry import registry
+from src.analytics.resource_sampler import ResourceSampler
+from src.analytics.shared_artifacts import current_snapshot
+from src.data.storage import resolve_bookings_path
+from src import config
+import asyncio
+import json
+import os
+import threading
 import time
-import psutil
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-analytics = HotelAnalytics()
+# The analytics engine is built lazily (or by the background warmup) so that importing this
+# module and starting a worker is cheap. Requests that arrive before it is ready wait for it.
+_analytics = None
+_analytics_lock = threading.Lock()
+_warmup_state = {"started_at": None, "finished_at": None, "error": None}
+
+def get_analytics_engine() -> HotelAnalytics:
+    """
+    Returns the process-wide HotelAnalytics instance, building it on first use.
+    """
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                _analytics = HotelAnalytics()
+    return _analytics
+
+def _warmup():
+    """
+    Loads the data, index and models in the background after startup.
+    """
+    _warmup_state["started_at"] = time.time()
+    try:
+        analytics = get_analytics_engine()
+        registry.warmup([config.EMBEDDING_MODEL_NAME], background=False)
+        if config.WARMUP_LLM:
+            analytics.vector_store._load_llm_reasoner()
+    except Exception as e:
+        logger.error(f"Error during warmup: {str(e)}")
+        _warmup_state["error"] = str(e)
+    finally:
+        _warmup_state["finished_at"] = time.time()
+
+# CPU, memory and disk usage are sampled in the background so /health never waits for them
+resource_sampler = ResourceSampler(
+    interval=config.RESOURCE_SAMPLE_INTERVAL_SECONDS,
+    history_size=config.RESOURCE_HISTORY_SIZE
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    resource_sampler.start()
+    threading.Thread(target=_warmup, name="analytics-warmup", daemon=True).start()
+    yield
+    resource_sampler.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+# Answering runs on a dedicated bounded pool so that a burst of questions queues (or is turned
+# away) instead of slowing every request down
+inference_pool = InferencePool(
+    max_concurrency=config.INFERENCE_MAX_CONCURRENCY,
+    max_queue=config.INFERENCE_MAX_QUEUE,
+    timeout=config.INFERENCE_TIMEOUT_SECONDS
+)
+# Streamed answers are generated one by one rather than in the /ask batch, so they have their
+# own, smaller pool
+stream_pool = InferencePool(
+    max_concurrency=config.STREAM_MAX_CONCURRENCY,
+    max_queue=config.INFERENCE_MAX_QUEUE,
+    timeout=config.INFERENCE_TIMEOUT_SECONDS
+)
+
+REGISTRY.gauge("inference_active", "Questions currently being answered",
+               lambda: inference_pool.stats()["active"])
+REGISTRY.gauge("inference_queued", "Questions waiting for an inference slot",
+               lambda: inference_pool.stats()["queued"])
+REGISTRY.gauge("inference_rejected_total", "Questions rejected because the queue was full",
+               lambda: inference_pool.stats()["rejected"], type_name="counter")
+REGISTRY.gauge("inference_expired_total", "Questions that missed their deadline while queued",
+               lambda: inference_pool.stats()["expired"], type_name="counter")
+REGISTRY.gauge("stream_active", "Answers currently being streamed",
+               lambda: stream_pool.stats()["active"])
+REGISTRY.gauge("stream_queued", "Streamed questions waiting for a slot",
+               lambda: stream_pool.stats()["queued"])
+
+def _overloaded(e: Exception) -> HTTPException:
+    """
+    Maps an admission error to 429 (queue full) or 503 (deadline passed) with Retry-After.
+    """
+    status_code = 429 if isinstance(e, PoolFullError) else 503
+    return HTTPException(status_code=status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
 class Question(BaseModel):
     text: str
 
+class BookingBatch(BaseModel):
+    # Raw bookings with the columns of the raw export (see src/data/preprocessing.py)
+    bookings: List[Dict[str, Any]]
+
+class AnalyticsQuery(BaseModel):
+    # Dimensions and metrics are listed in src/analytics/cubes.py
+    filters: Dict[str, Union[List[Union[str, int]], str, int]] = {}
+    group_by: List[str] = []
+    metrics: Optional[List[str]] = None
+    order_by: Optional[str] = None
+    descending: bool = True
+    limit: Optional[int] = None
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Hotel Analytics API!"}
 
+# (data version, serialized report) so repeated requests skip JSON encoding
+_report_body_cache = (None, None)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Checks an If-None-Match header against an ETag (weak comparison, as in RFC 7232).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+@app.get("/analytics")
 @app.post("/analytics")
-def get_analytics():
+def get_analytics(request: Request):
+    """
+    Returns the analytics report. The report is computed once per data version; the
+    response carries an ETag so clients can send conditional requests with If-None-Match.
+    """
     try:
-        return analytics.generate_report()
+        report, data_version = get_analytics_engine().get_report()
+        if "error" in report:
+            return report
+        
+        etag = f'"{data_version}"'
+        headers = {"ETag": etag, "X-Data-Version": data_version, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        global _report_body_cache
+        cached_version, body = _report_body_cache
+        if cached_version != data_version:
+            body = json.dumps(jsonable_encoder(report)).encode("utf-8")
+            _report_body_cache = (data_version, body)
+        return Response(content=body, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error in analytics endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analytics/query")
+def query_analytics(query: AnalyticsQuery):
+    """
+    Returns metrics for the filtered bookings grouped by the requested dimensions, computed
+    from the pre-aggregated cubes where possible.
+    """
+    try:
+        return get_analytics_engine().query_analytics(
+            filters=query.filters,
+            group_by=query.group_by,
+            metrics=query.metrics,
+            order_by=query.order_by,
+            descending=query.descending,
+            limit=query.limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in analytics query endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/data/reload")
+def reload_data():
+    """
+    Reloads the processed bookings data from disk and invalidates cached results.
+    """
+    try:
+        data_version = get_analytics_engine().reload_data()
+        return {"status": "reloaded", "data_version": data_version}
+    except Exception as e:
+        logger.error(f"Error reloading data: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/bookings")
+def ingest_bookings(batch: BookingBatch):
+    """
+    Appends new raw bookings to the data, the aggregates and the vector index without a reload.
+    """
+    try:
+        return get_analytics_engine().ingest_bookings(batch.bookings)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ingesting bookings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _answer(text: str) -> Dict[str, Any]:
+    return get_analytics_engine().answer_question(text)
+
 @app.post("/ask")
-def ask_question(question: Question):
+async def ask_question(question: Question):
+    """
+    Answers a question on the inference pool. Returns 429 when the queue is full and 503 when
+    the request's deadline passes, both with a Retry-After header.
+    """
     try:
-        return analytics.answer_question(question.text)
+        return await inference_pool.run(_answer, question.text)
+    except (PoolFullError, DeadlineExceededError) as e:
+        logger.warning(f"Rejected question: {str(e)}")
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Error in ask endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _produce_events(events, stop_event: threading.Event, loop: asyncio.AbstractEventLoop,
+                    queue: asyncio.Queue, acquired_at: float):
+    """
+    Runs a stream_answer generator in a worker thread until it ends or stop_event is set,
+    handing its events to queue and then None. The inference pool slot is released here,
+    once generation has actually stopped, whether or not the response body is ever read.
+    """
+    def _put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # The event loop is shutting down; nobody reads the events any more
+            stop_event.set()
+    
+    failed = True
+    try:
+        for item in events:
+            _put(item)
+            if stop_event.is_set():
+                break
+        failed = False
+    finally:
+        # Closing stops generation (if it is still running) and records the stream's metrics
+        events.close()
+        stream_pool.release(acquired_at, failed=failed)
+        _put(None)
+
+@app.post("/ask/stream")
+async def ask_question_stream(question: Question, request: Request):
+    """
+    Answers a question as server-sent events, sending answer text as soon as it is generated.
+    Generation is cancelled when the client disconnects. The stream holds a stream pool slot
+    until generation ends; admission errors are returned as for /ask.
+    """
+    try:
+        acquired_at = await stream_pool.acquire_async()
+    except (PoolFullError, DeadlineExceededError) as e:
+        logger.warning(f"Rejected streamed question: {str(e)}")
+        raise _overloaded(e)
+    try:
+        analytics = await run_in_threadpool(get_analytics_engine)
+        stop_event = threading.Event()
+        events = analytics.stream_answer(question.text, stop_event=stop_event)
+    except Exception as e:
+        stream_pool.release(acquired_at, failed=True)
+        logger.error(f"Error in ask stream endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Generation starts now and owns the slot from here on
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    loop.run_in_executor(None, _produce_events, events, stop_event, loop, queue, acquired_at)
+    
+    async def event_stream():
+        try:
+            while True:
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, cancelling answer generation")
+                    break
+                item = await queue.get()
+                if item is None:
+                    break
+                name, data = item
+                yield f"event: {name}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+        finally:
+            stop_event.set()
+    
+    # Also stops generation when the body iterator was abandoned without reaching its finally.
+    # If neither runs (the client left before the body started), generation ends at its
+    # length limit and the slot is released all the same
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                             background=BackgroundTask(stop_event.set))
+
+@app.get("/health/live")
+def liveness_check():
+    """
+    Liveness probe: the process is up and serving requests. Does no work.
+    """
+    return {"status": "alive", "timestamp": time.time()}
+
+@app.get("/health/ready")
+def readiness_check():
+    """
+    Readiness probe: reports which components are loaded. Returns 503 until the
+    analytics engine, the vector index and the embedding model are all loaded.
+    """
+    analytics = _analytics
+    models = registry.status()
+    components = {
+        "analytics_engine": "loaded" if analytics is not None else "loading",
+        "vector_index": "loaded" if analytics is not None and analytics.vector_store.index.ntotal > 0 else "loading",
+        "embedding_model": "loaded" if registry.is_loaded(config.EMBEDDING_MODEL_NAME) else "loading",
+        "llm_service": "loaded" if registry.is_loaded(f"llm:{config.LLM_MODEL_NAME}") else "not_loaded"
+    }
+    # The LLM is loaded on demand and has a fallback, so it does not gate readiness
+    ready = all(components[name] == "loaded" for name in ("analytics_engine", "vector_index", "embedding_model"))
+    if _warmup_state["error"] or models["errors"]:
+        components["errors"] = {"warmup": _warmup_state["error"], **models["errors"]}
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "timestamp": time.time(),
+        "components": components,
+        "model_load_seconds": models["loaded"]
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+@app.get("/metrics")
+def metrics():
+    """
+    Metrics in the Prometheus text exposition format: per-stage latency histograms, question
+    and stream counters, and the inference pool state.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _probe_database(analytics: Optional[HotelAnalytics]) -> Dict[str, Any]:
+    """
+    Check the data source that is actually loaded: the Parquet or CSV file that
+    resolve_bookings_path picks, or the current snapshot in shared mode.
+    """
+    try:
+        data_path = resolve_bookings_path(config.PROCESSED_DATA_PATH)
+        readable = os.access(data_path, os.R_OK)
+    except FileNotFoundError:
+        data_path, readable = config.PROCESSED_DATA_PATH, False
+    probe: Dict[str, Any] = {"path": data_path}
+    if config.SHARED_ARTIFACTS_DIR:
+        snapshot = current_snapshot(config.SHARED_ARTIFACTS_DIR)
+        probe["snapshot"] = snapshot
+        readable = readable or snapshot is not None
+    if analytics is not None:
+        probe["data_version"] = analytics.data_version
+    probe["status"] = "healthy" if readable else "unhealthy"
+    return probe
+
+def _probe_components() -> Dict[str, Dict[str, Any]]:
+    """
+    Cheap checks of each component, without loading anything or running a model.
+    """
+    analytics = _analytics
+    model_errors = registry.status()["errors"]
+    components = {}
+
+    if analytics is None:
+        components["analytics_engine"] = {"status": "loading"}
+    else:
+        rows = len(analytics.df)
+        components["analytics_engine"] = {"status": "healthy" if rows > 0 else "degraded", "rows": rows}
+
+    components["database"] = _probe_database(analytics)
+
+    if analytics is None:
+        components["vector_index"] = {"status": "loading"}
+    else:
+        index = analytics.vector_store.index
+        components["vector_index"] = {"status": "healthy" if index.ntotal > 0 else "degraded",
+                                      "vectors": int(index.ntotal), "dimension": int(index.d)}
+
+    embedding_name = config.EMBEDDING_MODEL_NAME
+    if registry.is_loaded(embedding_name):
+        components["embedding_model"] = {"status": "healthy", "model": embedding_name}
+    elif embedding_name in model_errors:
+        components["embedding_model"] = {"status": "unhealthy", "model": embedding_name,
+                                         "error": model_errors[embedding_name]}
+    else:
+        components["embedding_model"] = {"status": "loading", "model": embedding_name}
+
+    # The LLM is loaded on the first question; when loading failed answers use a fallback
+    llm_name = f"llm:{config.LLM_MODEL_NAME}"
+    if registry.is_loaded(llm_name):
+        llm_status = "healthy"
+    elif analytics is not None and analytics.vector_store.llm_reasoner is not None:
+        llm_status = "unavailable"
+    else:
+        llm_status = "not_loaded"
+    components["llm_service"] = {"status": llm_status, "model": config.LLM_MODEL_NAME}
+    if llm_name in model_errors:
+        components["llm_service"]["error"] = model_errors[llm_name]
+    return components
+
 @app.get("/health")
-def health_check():
+def health_check(samples: bool = False):
     """
     Health check endpoint to verify the system is functioning correctly.
-    Checks system resources, API status, and returns performance metrics.
+    Returns the latest resource sample from the background sampler with a summary of the
+    recent ones, component probes and performance metrics. Does not block.
+    
+    Args:
+        samples: Include the individual recent resource samples
     
     Returns:
         Dict: System health information
     """
     try:
-        # System metrics
-        cpu_usage = psutil.cpu_percent(interval=0.1)
-        memory_usage = psutil.virtual_memory().percent
-        disk_usage = psutil.disk_usage('/').percent
-        
-        # API status
-        status = "healthy"
+        latest = resource_sampler.latest()
+        components = _probe_components()
         
-        # Check if analytics module is working
-        analytics_working = hasattr(analytics, "df") and len(analytics.df) > 0
+        # Degraded when a component is broken; the LLM has a fallback and is reported only
+        states = [probe["status"] for name, probe in components.items() if name != "llm_service"]
+        if any(state in ("unhealthy", "degraded") for state in states):
+            status = "degraded"
+        elif "loading" in states:
+            status = "starting"
+        else:
+            status = "healthy"
         
         # Get performance metrics
-        performance = analytics.get_performance_metrics() if hasattr(analytics, "get_performance_metrics") else {}
+        analytics = _analytics
+        performance = analytics.get_performance_metrics() if analytics is not None else {}
+        performance["inference_pool"] = inference_pool.stats()
+        performance["stream_pool"] = stream_pool.stats()
+        
+        system = {
+            "cpu_usage_percent": latest["cpu_usage_percent"],
+            "memory_usage_percent": latest["memory_usage_percent"],
+            "disk_usage_percent": latest["disk_usage_percent"],
+            "process_rss_mb": latest["process_rss_mb"],
+            "process_cpu_percent": latest["process_cpu_percent"],
+            "sampled_at": latest["timestamp"],
+            "history": resource_sampler.summary()
+        }
+        if samples:
+            system["samples"] = resource_sampler.history()
         
         return {
             "status": status,
             "timestamp": time.time(),
-            "system": {
-                "cpu_usage_percent": cpu_usage,
-                "memory_usage_percent": memory_usage,
-                "disk_usage_percent": disk_usage
-            },
-            "components": {
-                "analytics_engine": "healthy" if analytics_working else "degraded",
-                "database": "healthy",  # Placeholder for actual DB check
-                "llm_service": "healthy"  # Placeholder for actual LLM check
-            },
+            "system": system,
+            "components": {name: probe["status"] for name, probe in components.items()},
+            "component_details": components,
             "performance": performance
         }
     except Exception as e:
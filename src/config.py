@@ -0,0 +1,93 @@
+"""
+Shared configuration for the Hotel Analytics system.
+Values can be overridden with environment variables so that deployments do not need code changes.
+"""
+
+import os
+
+# Project layout
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DATA_DIR = os.path.join(PROJECT_ROOT, 'src', 'data')
+RAW_DATA_PATH = os.environ.get(
+    "HOTEL_ANALYTICS_RAW_DATA_PATH",
+    os.path.join(DATA_DIR, 'raw', 'hotel_bookings.csv')
+)
+PROCESSED_DATA_PATH = os.environ.get(
+    "HOTEL_ANALYTICS_DATA_PATH",
+    os.path.join(DATA_DIR, 'processed', 'hotel_bookings_processed.parquet')
+)
+
+# Load every column of the processed data instead of only the ones the analytics use
+LOAD_ALL_COLUMNS = os.environ.get("HOTEL_ANALYTICS_LOAD_ALL_COLUMNS", "0") == "1"
+
+# Embedding model shared by the vector store and question matching
+EMBEDDING_MODEL_NAME = os.environ.get("HOTEL_ANALYTICS_EMBEDDING_MODEL", 'all-MiniLM-L6-v2')
+
+# Generative model used by the LLM reasoner
+LLM_MODEL_NAME = os.environ.get("HOTEL_ANALYTICS_LLM_MODEL", "microsoft/phi-2")
+
+# LLM weight format: "none" (float32 on CPU), "int8" (dynamic int8 linear layers, CPU only)
+# or "bf16"
+LLM_QUANTIZATION = os.environ.get("HOTEL_ANALYTICS_LLM_QUANTIZATION", "none")
+
+# Prompt tokens spent on retrieved summaries, metrics and booking records per question
+LLM_PROMPT_TOKEN_BUDGET = int(os.environ.get("HOTEL_ANALYTICS_LLM_PROMPT_TOKEN_BUDGET", "384"))
+
+# Maximum number of answers the LLM decodes together (1 disables batching)
+LLM_BATCH_MAX_SIZE = int(os.environ.get("HOTEL_ANALYTICS_LLM_BATCH_MAX_SIZE", "8"))
+
+# Bulk embedding for index builds (see src/analytics/embedding_engine.py): backend ("torch" or
+# "onnx"), worker processes (0 = one per core), texts per forward pass and an optional ONNX file
+EMBEDDING_BACKEND = os.environ.get("HOTEL_ANALYTICS_EMBEDDING_BACKEND", "torch")
+EMBEDDING_PROCESSES = int(os.environ.get("HOTEL_ANALYTICS_EMBEDDING_PROCESSES", "1"))
+EMBEDDING_BATCH_SIZE = int(os.environ.get("HOTEL_ANALYTICS_EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_ONNX_FILE = os.environ.get("HOTEL_ANALYTICS_EMBEDDING_ONNX_FILE", "")
+
+# Load the LLM during background warmup instead of on the first /ask request
+WARMUP_LLM = os.environ.get("HOTEL_ANALYTICS_WARMUP_LLM", "0") == "1"
+
+# On-disk cache for embeddings and FAISS indexes (set to an empty string to disable)
+INDEX_CACHE_DIR = os.environ.get("HOTEL_ANALYTICS_INDEX_CACHE_DIR", os.path.join(DATA_DIR, 'cache'))
+
+# Vector index type and tuning (see src/analytics/faiss_indexes.py)
+VECTOR_INDEX_TYPE = os.environ.get("HOTEL_ANALYTICS_INDEX_TYPE", "flat")
+VECTOR_INDEX_NLIST = int(os.environ.get("HOTEL_ANALYTICS_INDEX_NLIST", "0"))
+VECTOR_INDEX_NPROBE = int(os.environ.get("HOTEL_ANALYTICS_INDEX_NPROBE", "8"))
+VECTOR_INDEX_PQ_M = int(os.environ.get("HOTEL_ANALYTICS_INDEX_PQ_M", "48"))
+VECTOR_INDEX_HNSW_M = int(os.environ.get("HOTEL_ANALYTICS_INDEX_HNSW_M", "32"))
+VECTOR_INDEX_EF_SEARCH = int(os.environ.get("HOTEL_ANALYTICS_INDEX_EF_SEARCH", "64"))
+
+# Restrict retrieval to the bookings matching the countries, months and years a question names.
+# Matching slices up to this many rows are searched exactly; larger ones through the index
+FILTERED_RETRIEVAL = os.environ.get("HOTEL_ANALYTICS_FILTERED_RETRIEVAL", "1") == "1"
+FILTERED_SEARCH_EXACT_MAX_ROWS = int(os.environ.get("HOTEL_ANALYTICS_FILTERED_SEARCH_EXACT_MAX_ROWS", "20000"))
+
+# Micro-batching of concurrent vector store queries (window of 0 disables batching)
+QUERY_BATCH_WINDOW_MS = float(os.environ.get("HOTEL_ANALYTICS_QUERY_BATCH_WINDOW_MS", "5"))
+QUERY_BATCH_MAX_SIZE = int(os.environ.get("HOTEL_ANALYTICS_QUERY_BATCH_MAX_SIZE", "32"))
+
+# Answer cache for /ask (a size of 0 disables it)
+ANSWER_CACHE_SIZE = int(os.environ.get("HOTEL_ANALYTICS_ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("HOTEL_ANALYTICS_ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_SIMILARITY = float(os.environ.get("HOTEL_ANALYTICS_ANSWER_CACHE_SIMILARITY", "0.95"))
+
+# Inference pool for /ask: concurrent generations, waiting requests and the per-request deadline
+# in seconds (also used for /ask/stream). Concurrent /ask questions are decoded as one batch, so
+# the concurrency matches the LLM batch size by default
+INFERENCE_MAX_CONCURRENCY = int(os.environ.get("HOTEL_ANALYTICS_INFERENCE_MAX_CONCURRENCY", str(LLM_BATCH_MAX_SIZE)))
+INFERENCE_MAX_QUEUE = int(os.environ.get("HOTEL_ANALYTICS_INFERENCE_MAX_QUEUE", "16"))
+INFERENCE_TIMEOUT_SECONDS = float(os.environ.get("HOTEL_ANALYTICS_INFERENCE_TIMEOUT_SECONDS", "120"))
+# Concurrent /ask/stream answers. Streams are not batched: each one runs its own generation
+# alongside the batch, so they get a separate, smaller limit
+STREAM_MAX_CONCURRENCY = int(os.environ.get("HOTEL_ANALYTICS_STREAM_MAX_CONCURRENCY", "2"))
+
+# Analytics cubes for /analytics/query: year and month crossed with up to this many other dimensions
+CUBE_MAX_DIMENSIONS = int(os.environ.get("HOTEL_ANALYTICS_CUBE_MAX_DIMENSIONS", "2"))
+
+# Background resource sampling for /health: seconds between samples and samples kept
+RESOURCE_SAMPLE_INTERVAL_SECONDS = float(os.environ.get("HOTEL_ANALYTICS_RESOURCE_SAMPLE_INTERVAL_SECONDS", "1"))
+RESOURCE_HISTORY_SIZE = int(os.environ.get("HOTEL_ANALYTICS_RESOURCE_HISTORY_SIZE", "60"))
+
+# Snapshot directory of memory-mapped data, embeddings and index shared by all workers
+# (built with `python -m src.analytics.shared_artifacts`); empty to have every worker load its own copy
+SHARED_ARTIFACTS_DIR = os.environ.get("HOTEL_ANALYTICS_SHARED_ARTIFACTS_DIR", "")
@@ -1,18 +1,107 @@
-import pandas as pd
-import numpy as np
+"""
+Preprocessing of the raw hotel bookings export.
+
+The raw CSV is streamed in chunks. The chunks are cleaned in a process pool with a bounded
+number of chunks in flight, and the results are appended to the processed CSV and Parquet
+files in their original order. Peak memory depends on the chunk size and the number of
+workers rather than on the size of the export.
+
+Usage:
+    python -m src.data.preprocessing --raw-path exports/bookings.csv --workers 8
+"""
+
+import argparse
+import logging
 import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
 
-def preprocess_data():
-    # Path to the raw CSV file
-    raw_file_path = "C:\\Users\\maith\\OneDrive - Manipal University Jaipur\\Desktop\\hotel analytics\\src\\data\\raw\\hotel_bookings.csv"
-    # Read the raw data
-    try:
-        df = pd.read_csv(raw_file_path)
-        print("Raw data loaded successfully.")
-    except Exception as e:
-        print("Error loading raw data:", e)
-        return
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import config
+from src.data.storage import CSV_EXTENSION, PARQUET_EXTENSION
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
+# Column types of the raw export. Declaring them keeps every chunk consistent, instead of
+# relying on per-chunk type inference.
+RAW_DTYPES = {
+    'hotel': 'object',
+    'is_canceled': 'int64',
+    'lead_time': 'int64',
+    'arrival_date_year': 'int64',
+    'arrival_date_month': 'object',
+    'arrival_date_week_number': 'int64',
+    'arrival_date_day_of_month': 'int64',
+    'stays_in_weekend_nights': 'int64',
+    'stays_in_week_nights': 'int64',
+    'adults': 'int64',
+    'children': 'float64',
+    'babies': 'int64',
+    'meal': 'object',
+    'country': 'object',
+    'market_segment': 'object',
+    'distribution_channel': 'object',
+    'is_repeated_guest': 'int64',
+    'previous_cancellations': 'int64',
+    'previous_bookings_not_canceled': 'int64',
+    'reserved_room_type': 'object',
+    'assigned_room_type': 'object',
+    'booking_changes': 'int64',
+    'deposit_type': 'object',
+    'agent': 'float64',
+    'company': 'float64',
+    'days_in_waiting_list': 'int64',
+    'customer_type': 'object',
+    'adr': 'float64',
+    'required_car_parking_spaces': 'int64',
+    'total_of_special_requests': 'int64',
+    'reservation_status': 'object',
+    'reservation_status_date': 'object',
+}
+
+# Column types after cleaning
+PROCESSED_DTYPES = {
+    **RAW_DTYPES,
+    'children': 'int64',
+    'agent': 'int64',
+    'company': 'int64',
+    'total_nights': 'int64',
+    'total_price': 'float64',
+}
+
+# Arrow schema shared by every Parquet row group; string columns are dictionary-encoded by
+# the Parquet writer and read back as categoricals (see src/data/storage.py)
+PROCESSED_SCHEMA = pa.schema([
+    (name, pa.string() if dtype == 'object' else pa.from_numpy_dtype(np.dtype(dtype)))
+    for name, dtype in PROCESSED_DTYPES.items()
+])
+
+DEFAULT_CHUNK_SIZE = 100_000
+FORMATS = ("csv", "parquet")
+
+
+def clean_bookings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the cleaning rules to a block of raw bookings.
+
+    Missing values are filled, counts are cast to integers, total_nights and total_price are
+    derived, and bookings with a non-positive daily rate or no nights are dropped. Every rule
+    works row by row, so cleaning chunks gives the same rows as cleaning the whole file.
+
+    Args:
+        df: Raw bookings
+
+    Returns:
+        The cleaned bookings
+    """
     # Handle missing values
     # Filling missing values for columns that require it
     df['children'] = df['children'].fillna(0)
@@ -34,15 +123,139 @@ def preprocess_data():
     # Remove rows with non-positive values for adr or total_nights
     df = df[df['adr'] > 0]
     df = df[df['total_nights'] > 0]
+    return df
+
+
+def process_chunk(df: pd.DataFrame, formats: Sequence[str]) -> Tuple[int, int, Optional[str], Optional[pa.Table]]:
+    """
+    Clean one raw chunk and serialize it for the writers, in a worker process.
+
+    Returns:
+        (raw rows, cleaned rows, CSV text without header, Arrow table)
+    """
+    rows_in = len(df)
+    # Columns in the fixed output order; columns the schema does not know are dropped
+    df = clean_bookings(df)[list(PROCESSED_DTYPES)]
+    csv_text = df.to_csv(index=False, header=False) if "csv" in formats else None
+    table = pa.Table.from_pandas(df, schema=PROCESSED_SCHEMA, preserve_index=False) if "parquet" in formats else None
+    return rows_in, len(df), csv_text, table
+
+
+class _ChunkWriter:
+    """Appends processed chunks to temporary output files and publishes them on close."""
+
+    def __init__(self, output_path: str, formats: Sequence[str]):
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        self.paths = {}
+        self._csv = None
+        self._parquet = None
+        suffix = f".tmp-{os.getpid()}"
+        if "csv" in formats:
+            self.paths["csv"] = output_path + CSV_EXTENSION
+            self._csv = open(self.paths["csv"] + suffix, "w", encoding="utf-8", newline="")
+            self._csv.write(",".join(PROCESSED_DTYPES) + "\n")
+        if "parquet" in formats:
+            self.paths["parquet"] = output_path + PARQUET_EXTENSION
+            self._parquet = pq.ParquetWriter(self.paths["parquet"] + suffix, PROCESSED_SCHEMA, compression="zstd")
+        self._suffix = suffix
+
+    def write(self, csv_text: Optional[str], table: Optional[pa.Table]):
+        if self._csv is not None and csv_text:
+            self._csv.write(csv_text)
+        if self._parquet is not None and table is not None and table.num_rows:
+            self._parquet.write_table(table)
+
+    def close(self, publish: bool = True):
+        if self._csv is not None:
+            self._csv.close()
+        if self._parquet is not None:
+            self._parquet.close()
+        for path in self.paths.values():
+            if publish:
+                os.replace(path + self._suffix, path)
+            elif os.path.exists(path + self._suffix):
+                os.remove(path + self._suffix)
+
+
+def preprocess_data(raw_path: Optional[str] = None, output_path: Optional[str] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, workers: Optional[int] = None,
+                    formats: Sequence[str] = FORMATS) -> Dict[str, Any]:
+    """
+    Clean the raw bookings export and write the processed CSV and/or Parquet files.
+
+    Args:
+        raw_path: Raw bookings CSV; defaults to config.RAW_DATA_PATH
+        output_path: Output path without extension; defaults to config.PROCESSED_DATA_PATH
+            without its extension
+        chunk_size: Raw rows per chunk
+        workers: Worker processes; defaults to the number of CPUs, 1 cleans in this process
+        formats: Output formats, any of "csv" and "parquet"
+
+    Returns:
+        Row counts, elapsed time and the written files
+    """
+    raw_path = raw_path or config.RAW_DATA_PATH
+    output_path = output_path or os.path.splitext(config.PROCESSED_DATA_PATH)[0]
+    workers = workers or os.cpu_count() or 1
+    # Enough chunks in flight to keep every worker busy while results are written in order
+    max_in_flight = 2 * workers
+
+    logger.info(f"Preprocessing {raw_path} in chunks of {chunk_size} rows with {workers} workers")
+    start_time = time.time()
+    rows_in = rows_out = 0
+    writer = _ChunkWriter(output_path, formats)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending: "deque[Future]" = deque()
+
+    def _drain(limit: int):
+        nonlocal rows_in, rows_out
+        while len(pending) > limit:
+            chunk_in, chunk_out, csv_text, table = pending.popleft().result()
+            writer.write(csv_text, table)
+            rows_in += chunk_in
+            rows_out += chunk_out
+
+    try:
+        reader = pd.read_csv(raw_path, dtype=RAW_DTYPES, chunksize=chunk_size)
+        for chunk in reader:
+            if rows_in == 0 and not pending:
+                extra = [c for c in chunk.columns if c not in RAW_DTYPES]
+                if extra:
+                    logger.warning(f"Ignoring columns not in the bookings schema: {extra}")
+            if executor is None:
+                future: Future = Future()
+                future.set_result(process_chunk(chunk, formats))
+            else:
+                future = executor.submit(process_chunk, chunk, formats)
+            pending.append(future)
+            _drain(max_in_flight)
+        _drain(0)
+    except Exception:
+        writer.close(publish=False)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    writer.close()
+
+    elapsed = time.time() - start_time
+    logger.info(f"Processed {rows_in} raw bookings into {rows_out} rows in {elapsed:.1f}s")
+    for path in writer.paths.values():
+        logger.info(f"Processed file saved to: {path}")
+    return {"rows_in": rows_in, "rows_out": rows_out, "seconds": round(elapsed, 2), "files": dict(writer.paths)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean the raw hotel bookings export.")
+    parser.add_argument("--raw-path", default=config.RAW_DATA_PATH, help="Raw bookings CSV")
+    parser.add_argument("--output", default=os.path.splitext(config.PROCESSED_DATA_PATH)[0],
+                        help="Output path without extension (.csv and .parquet are appended)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Raw rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS), help="Output formats")
+    args = parser.parse_args()
+    preprocess_data(args.raw_path, args.output, args.chunk_size, args.workers, args.formats)
 
-    # Define the path for saving the processed data
-    processed_file_path = "C:\\Users\\maith\\OneDrive - Manipal University Jaipur\\Desktop\\hotel analytics\\src\\data\\processed\\hotel_bookings_processed.csv"
-    os.makedirs(os.path.dirname(processed_file_path), exist_ok=True)
-    
-    # Save the cleaned data to CSV
-    df.to_csv(processed_file_path, index=False)
-    print("Data preprocessing completed. Processed file saved to:")
-    print(processed_file_path)
 
 if __name__ == "__main__":
-    preprocess_data()
+    main()
@@ -0,0 +1,129 @@
+"""
+Columnar storage for the processed bookings data.
+
+The preprocessing pipeline writes the processed bookings as Parquet, with the low-cardinality
+string columns dictionary-encoded, next to the CSV. Loading Parquet skips text parsing, keeps
+the dtypes and only reads the requested columns; the CSV is still used when no Parquet file
+exists.
+"""
+
+import logging
+import os
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# String columns with few distinct values, stored dictionary-encoded and loaded as categoricals
+CATEGORICAL_COLUMNS = [
+    'hotel', 'arrival_date_month', 'meal', 'country', 'market_segment', 'distribution_channel',
+    'reserved_room_type', 'assigned_room_type', 'deposit_type', 'customer_type', 'reservation_status'
+]
+
+# Columns used by the summaries, the report, metric extraction and the answer context
+ANALYTICS_COLUMNS = [
+    'hotel', 'is_canceled', 'lead_time', 'arrival_date_year', 'arrival_date_month',
+    'stays_in_weekend_nights', 'stays_in_week_nights', 'adults', 'children', 'babies',
+    'country', 'market_segment', 'distribution_channel', 'reserved_room_type', 'customer_type',
+    'adr', 'total_nights', 'total_price'
+]
+
+PARQUET_EXTENSION = ".parquet"
+CSV_EXTENSION = ".csv"
+
+
+def to_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the known low-cardinality string columns to the categorical dtype.
+
+    Args:
+        df: Bookings data
+
+    Returns:
+        The same DataFrame, with the categorical columns converted in place
+    """
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+
+def write_bookings(df: pd.DataFrame, path: str) -> None:
+    """
+    Write bookings data as Parquet with dictionary-encoded categoricals.
+
+    The file is written to a temporary name first and renamed, so readers never see a
+    partially written file.
+
+    Args:
+        df: Bookings data
+        path: Destination .parquet file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table = pa.Table.from_pandas(to_categoricals(df.copy()), preserve_index=False)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def resolve_bookings_path(path: str) -> str:
+    """
+    Return the file to load for a processed bookings path.
+
+    A missing Parquet file falls back to the CSV with the same name, and vice versa.
+    """
+    if os.path.exists(path):
+        return path
+    stem, extension = os.path.splitext(path)
+    alternative = stem + (CSV_EXTENSION if extension == PARQUET_EXTENSION else PARQUET_EXTENSION)
+    if os.path.exists(alternative):
+        logger.info(f"{path} not found, loading {alternative} instead")
+        return alternative
+    raise FileNotFoundError(f"Processed bookings data not found at {path}")
+
+
+def read_bookings(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load processed bookings data from Parquet or CSV.
+
+    Parquet files are memory-mapped and only the requested columns are read. Either way the
+    categorical columns come back with the categorical dtype.
+
+    Args:
+        path: Parquet or CSV file (see resolve_bookings_path for the fallback)
+        columns: Columns to load; all columns when None. Columns missing from the file are skipped
+
+    Returns:
+        The bookings DataFrame
+    """
+    path = resolve_bookings_path(path)
+    if path.endswith(PARQUET_EXTENSION):
+        names = pq.read_schema(path).names
+        selected = [c for c in columns if c in names] if columns is not None else names
+        table = pq.read_table(
+            path,
+            columns=selected,
+            memory_map=True,
+            read_dictionary=[c for c in CATEGORICAL_COLUMNS if c in selected]
+        )
+        # Convert column by column, freeing the Arrow buffers as they are converted, and hand
+        # the freed memory back so the loaded frame is the only copy that stays resident
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+        pa.default_memory_pool().release_unused()
+        return to_categoricals(df)
+
+    wanted = set(columns) if columns is not None else None
+    df = pd.read_csv(
+        path,
+        usecols=(lambda c: c in wanted) if wanted is not None else None,
+        dtype={c: 'category' for c in CATEGORICAL_COLUMNS}
+    )
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
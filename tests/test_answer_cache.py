@@ -0,0 +1,36 @@
+import time
+import numpy as np
+from src.analytics.answer_cache import SemanticAnswerCache
+
+def vector(*values):
+    return np.array(values, dtype="float32")
+
+def test_exact_and_similar_lookups():
+    cache = SemanticAnswerCache(max_entries=4, similarity_threshold=0.9)
+    cache.invalidate("v1")
+    cache.put("What is the cancellation rate?", vector(1, 0, 0), frozenset(), {"answer": "37%"}, "v1")
+    assert cache.get("what is the  cancellation rate") == {"answer": "37%"}
+    result, question, similarity = cache.get_similar(vector(0.99, 0.1, 0), frozenset())
+    assert result == {"answer": "37%"} and question == "What is the cancellation rate?"
+    # Dissimilar questions, and similar ones asking about other values, miss
+    assert cache.get_similar(vector(0, 1, 0), frozenset()) is None
+    assert cache.get_similar(vector(1, 0, 0), frozenset({"2016"})) is None
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 2)
+
+def test_eviction_expiry_and_invalidation():
+    cache = SemanticAnswerCache(max_entries=2, ttl_seconds=0.05)
+    cache.invalidate("v1")
+    for i, question in enumerate(["a", "b", "c"]):
+        cache.put(question, vector(i + 1, 1), frozenset(), {"answer": question}, "v1")
+    assert cache.get("a") is None and cache.get("c") == {"answer": "c"}
+    assert cache.stats()["evictions"] == 1
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    # Answers for an older data version or fallback answers are not cached
+    cache.put("d", vector(1, 0), frozenset(), {"answer": "d"}, "v0")
+    cache.put("e", vector(1, 0), frozenset(), {"answer": "I encountered an error while processing"}, "v1")
+    cache.put("f", vector(1, 0), frozenset(), {"answer": "f"}, "v1")
+    cache.invalidate("v2")
+    assert cache.stats()["entries"] == 0
+    assert cache.get("d") is None and cache.get("e") is None and cache.get("f") is None
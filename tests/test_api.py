@@ -1,9 +1,27 @@
+import asyncio
+import threading
+import time
 import pytest
 from fastapi.testclient import TestClient
-from src.api.main import app
+from src import config
+from src.analytics.reports import CONSISTENT_READ_ATTEMPTS
+from src.analytics.inference_pool import InferencePool
+from src.api.main import app, _probe_database, _produce_events, _warmup_state, get_analytics_engine, stream_pool
 
 client = TestClient(app)
 
+BOOKING = {
+    "hotel": "City Hotel", "is_canceled": 0, "lead_time": 10, "arrival_date_year": 2017,
+    "arrival_date_month": "July", "arrival_date_week_number": 27, "arrival_date_day_of_month": 3,
+    "stays_in_weekend_nights": 1, "stays_in_week_nights": 2, "adults": 2, "children": 0, "babies": 0,
+    "meal": "BB", "country": "PRT", "market_segment": "Online TA", "distribution_channel": "TA/TO",
+    "is_repeated_guest": 0, "previous_cancellations": 0, "previous_bookings_not_canceled": 0,
+    "reserved_room_type": "A", "assigned_room_type": "A", "booking_changes": 0,
+    "deposit_type": "No Deposit", "agent": 9, "company": None, "days_in_waiting_list": 0,
+    "customer_type": "Transient", "adr": 100.0, "required_car_parking_spaces": 0,
+    "total_of_special_requests": 1, "reservation_status": "Check-Out", "reservation_status_date": "2017-07-06"
+}
+
 def test_analytics_endpoint():
     response = client.post("/analytics")
     assert response.status_code == 200
@@ -12,6 +30,15 @@ def test_analytics_endpoint():
     assert "total_bookings" in data
     assert "average_daily_rate" in data
 
+def test_analytics_query_endpoint():
+    response = client.post("/analytics/query", json={"group_by": ["hotel"], "metrics": ["bookings"]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"].startswith("cube:")
+    assert {row["hotel"] for row in data["rows"]} == {"City Hotel", "Resort Hotel"}
+    response = client.post("/analytics/query", json={"group_by": ["weather"]})
+    assert response.status_code == 400
+
 def test_ask_endpoint_known_question():
     # Using a question we expect to match our predefined ones
     response = client.post("/ask", json={"text": "Show me total revenue for July 2017"})
@@ -27,3 +54,125 @@ def test_ask_endpoint_unknown_question():
     data = response.json()
     # Expect a fallback answer if similarity is low
     assert "Based on our data:" in data["answer"]
+
+def test_liveness_endpoint():
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive"
+
+def test_health_endpoint_does_not_block():
+    started = time.perf_counter()
+    response = client.get("/health")
+    assert time.perf_counter() - started < 0.1
+    data = response.json()
+    assert data["status"] in ("healthy", "starting")
+    assert set(data["components"]) == {"analytics_engine", "database", "vector_index", "embedding_model",
+                                       "llm_service"}
+    assert data["system"]["history"]["samples"] >= 1
+
+def test_database_probe_follows_the_loaded_source(tmp_path, monkeypatch):
+    # Only the CSV exists: resolve_bookings_path falls back to it, so the data loads fine
+    (tmp_path / "processed.csv").write_text("hotel\nCity Hotel\n")
+    monkeypatch.setattr(config, "PROCESSED_DATA_PATH", str(tmp_path / "processed.parquet"))
+    monkeypatch.setattr(config, "SHARED_ARTIFACTS_DIR", "")
+    probe = _probe_database(None)
+    assert probe["status"] == "healthy" and probe["path"].endswith("processed.csv")
+
+    # Shared mode without the source file is served from the current snapshot
+    (tmp_path / "processed.csv").unlink()
+    assert _probe_database(None)["status"] == "unhealthy"
+    shared = tmp_path / "shared"
+    (shared / "snapshot-1").mkdir(parents=True)
+    (shared / "snapshot-1" / "manifest.json").write_text("{}")
+    (shared / "CURRENT").write_text("snapshot-1")
+    monkeypatch.setattr(config, "SHARED_ARTIFACTS_DIR", str(shared))
+    probe = _probe_database(None)
+    assert probe["status"] == "healthy" and probe["snapshot"].endswith("snapshot-1")
+
+def test_readiness_endpoint_reports_components():
+    # Entering the client runs the lifespan, which starts the background warmup
+    started = time.time()
+    with TestClient(app) as live_client:
+        # Wait until this warmup has finished, whether or not it succeeded
+        while (_warmup_state["finished_at"] or 0) < started and time.time() < started + 600:
+            time.sleep(0.5)
+        response = live_client.get("/health/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["components"]["analytics_engine"] == "loaded"
+    assert data["components"]["embedding_model"] == "loaded"
+
+def test_analytics_conditional_request():
+    response = client.post("/analytics")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    # The report is unchanged, so a conditional request is answered without a body
+    cached = client.post("/analytics", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+def test_ingest_bookings_updates_report():
+    before = client.post("/analytics")
+    response = client.post("/bookings", json={"bookings": [BOOKING]})
+    assert response.status_code == 200
+    assert response.json()["added"] == 1
+    after = client.post("/analytics")
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.json()["total_bookings"] == before.json()["total_bookings"] + 1
+    assert client.post("/bookings", json={"bookings": [{"adr": 10}]}).status_code == 400
+
+def test_answer_context_is_retrieved_from_one_data_version(monkeypatch):
+    analytics = get_analytics_engine()
+    prepare_answer = analytics.vector_store.prepare_answer
+    versions = []
+    def ingest_while_retrieving(*args, **kwargs):
+        versions.append(analytics.data_version)
+        # Bookings arrive during every retrieval, until writers are held off
+        if not analytics._write_lock.locked():
+            analytics.ingest_bookings([BOOKING])
+        return prepare_answer(*args, **kwargs)
+    monkeypatch.setattr(analytics.vector_store, "prepare_answer", ingest_while_retrieving)
+    data_version, _, _ = analytics._retrieve_context("What was the revenue in July 2017?")
+    assert len(versions) == CONSISTENT_READ_ATTEMPTS
+    assert data_version == versions[-1] == analytics.data_version
+    assert len(set(versions)) == CONSISTENT_READ_ATTEMPTS
+
+def test_ask_stream_endpoint_sends_events():
+    response = client.post("/ask/stream", json={"text": "Show me total revenue for July 2017"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events[0] == "context"
+    assert events[-1] == "done"
+    assert stream_pool.stats()["active"] == 0
+
+def test_stream_slot_is_released_once_generation_stops(monkeypatch):
+    pool = InferencePool(max_concurrency=1, max_queue=1, timeout=5)
+    monkeypatch.setattr("src.api.main.stream_pool", pool)
+    held_while_generating = []
+    def events():
+        try:
+            for i in range(1000):
+                time.sleep(0.001)
+                yield "token", i
+        finally:
+            held_while_generating.append(pool.stats()["active"])
+
+    async def _scenario():
+        loop, queue, stop_event = asyncio.get_running_loop(), asyncio.Queue(), threading.Event()
+        producer = loop.run_in_executor(None, _produce_events, events(), stop_event, loop, queue,
+                                        await pool.acquire_async())
+        assert (await queue.get())[0] == "token"
+        # The client goes away without reading the rest of the body
+        stop_event.set()
+        await asyncio.wait_for(producer, timeout=5)
+        await asyncio.sleep(0)
+        rest = [queue.get_nowait() for _ in range(queue.qsize())]
+        assert rest[-1] is None and len(rest) < 10
+
+    asyncio.run(_scenario())
+    assert held_while_generating == [1]
+    stats = pool.stats()
+    assert (stats["active"], stats["completed"]) == (0, 1)
+    pool.shutdown()
@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.analytics.batching import QueryBatcher
+
+def _echo_batch(texts, top_k):
+    return [[{"text": text, "rank": rank} for rank in range(top_k)] for text in texts]
+
+def test_concurrent_queries_are_batched_and_fanned_out():
+    batcher = QueryBatcher(_echo_batch, window_ms=50, max_batch_size=8)
+    try:
+        with ThreadPoolExecutor(16) as executor:
+            results = list(executor.map(lambda i: batcher.submit(f"q{i}", 1 + i % 3), range(16)))
+        for i, result in enumerate(results):
+            assert [r["text"] for r in result] == [f"q{i}"] * (1 + i % 3)
+        stats = batcher.stats()
+        assert stats["requests"] == 16
+        assert stats["batches"] < 16
+        assert stats["max_batch_size"] <= 8
+    finally:
+        batcher.close()
+
+def test_batch_errors_reach_every_caller():
+    def failing(texts, top_k):
+        raise ValueError("boom")
+    batcher = QueryBatcher(failing, window_ms=1)
+    try:
+        with pytest.raises(ValueError):
+            batcher.submit("q", 1)
+    finally:
+        batcher.close()
+
+def test_filters_are_passed_per_query():
+    calls = []
+    def filtered_batch(texts, top_k, filters=None):
+        calls.append(filters)
+        return [[{"text": text, "filters": f}] for text, f in zip(texts, filters or [None] * len(texts))]
+    batcher = QueryBatcher(filtered_batch, window_ms=50, max_batch_size=4)
+    try:
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(
+                lambda i: batcher.submit(f"q{i}", 1, {"country": ["PRT"]} if i % 2 else None), range(4)))
+        assert [r[0]["filters"] for r in results] == [None, {"country": ["PRT"]}, None, {"country": ["PRT"]}]
+        assert batcher.submit("plain", 1)[0]["filters"] is None
+        assert calls[-1] is None
+    finally:
+        batcher.close()
+
+def test_closed_batcher_rejects_queries():
+    batcher = QueryBatcher(_echo_batch, window_ms=1)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit("q", 1)
+
+def test_submit_racing_close_never_hangs():
+    # Every query submitted while another thread closes the batcher is either answered or rejected
+    for _ in range(20):
+        batcher = QueryBatcher(_echo_batch, window_ms=1, result_timeout=5)
+        start = threading.Barrier(9)
+        def _submit(i):
+            start.wait()
+            try:
+                return batcher.submit(f"q{i}", 1)[0]["text"] == f"q{i}"
+            except RuntimeError:
+                return "closed"
+        with ThreadPoolExecutor(9) as executor:
+            futures = [executor.submit(_submit, i) for i in range(8)]
+            start.wait()
+            batcher.close()
+            outcomes = [future.result(timeout=10) for future in futures]
+        assert all(outcome in (True, "closed") for outcome in outcomes)
+
+def test_short_batch_results_fail_the_missing_queries():
+    batcher = QueryBatcher(lambda texts, top_k: _echo_batch(texts, top_k)[:-1], window_ms=50, max_batch_size=2)
+    try:
+        with ThreadPoolExecutor(2) as executor:
+            futures = [executor.submit(batcher.submit, f"q{i}", 1) for i in range(2)]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result(timeout=10)
+    finally:
+        batcher.close()
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_bookings
+from src.analytics.cubes import AnalyticsCubes, default_cubes
+from src.data.storage import to_categoricals
+
+def scan_query(df, filters, group_by):
+    # Reference: filter and group the bookings table directly
+    for dim, values in filters.items():
+        df = df[df[dim].isin(values if isinstance(values, list) else [values])]
+    groups = df.groupby(group_by, observed=True) if group_by else [((), df)]
+    rows = []
+    for key, group in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        rows.append({
+            **dict(zip(group_by, key)),
+            "bookings": len(group),
+            "revenue": round(group["total_price"].sum(), 2),
+            "adr": round(group["adr"].mean(), 2),
+            "cancellation_rate": round(group["is_canceled"].mean() * 100, 2),
+            "avg_lead_time": round(group["lead_time"].mean(), 2),
+            "avg_length_of_stay": round(group["total_nights"].mean(), 2),
+        })
+    return sorted(rows, key=lambda row: tuple(row[dim] for dim in group_by))
+
+@pytest.fixture(scope="module")
+def bookings():
+    return to_categoricals(make_bookings(3000, seed=11))
+
+@pytest.mark.parametrize("filters, group_by, source", [
+    ({}, [], "cube:arrival_date_year,arrival_date_month"),
+    ({"arrival_date_year": 2016}, ["arrival_date_month"], "cube:arrival_date_year,arrival_date_month"),
+    ({"hotel": "City Hotel"}, ["country"], "cube:hotel,country,arrival_date_year,arrival_date_month"),
+    ({"country": ["PRT", "GBR"]}, ["market_segment", "arrival_date_year"], "cube:"),
+    ({"hotel": "Resort Hotel", "customer_type": "Transient"}, ["reserved_room_type"], "scan"),
+])
+def test_query_matches_table_scan(bookings, filters, group_by, source):
+    result = AnalyticsCubes(bookings).query(filters=filters, group_by=group_by)
+    assert result["source"].startswith(source)
+    assert result["row_count"] == len(result["rows"])
+    expected = scan_query(bookings, filters, group_by)
+    assert len(result["rows"]) == len(expected)
+    for row, expected_row in zip(result["rows"], expected):
+        assert row == pytest.approx(expected_row)
+
+def test_order_by_limit_and_metrics(bookings):
+    result = AnalyticsCubes(bookings).query(group_by=["country"], metrics=["revenue"], order_by="revenue", limit=3)
+    assert [set(row) for row in result["rows"]] == [{"country", "revenue"}] * 3
+    revenues = [row["revenue"] for row in result["rows"]]
+    assert revenues == sorted(revenues, reverse=True)
+    assert revenues[0] == round(bookings.groupby("country", observed=True)["total_price"].sum().max(), 2)
+
+@pytest.mark.parametrize("kwargs", [
+    {"filters": {"room": "A"}},
+    {"group_by": ["deposit_type"]},
+    {"metrics": ["profit"]},
+    {"order_by": "hotel"},
+    {"filters": {"arrival_date_year": "last year"}},
+])
+def test_invalid_queries_raise_value_error(bookings, kwargs):
+    with pytest.raises(ValueError):
+        AnalyticsCubes(bookings, default_cubes(0)).query(**kwargs)
+
+def test_add_rows_matches_rebuilt_cubes():
+    df = to_categoricals(make_bookings(2000, seed=5))
+    head, tail = df.iloc[:1500], df.iloc[1500:].copy()
+    tail["country"] = tail["country"].cat.add_categories(["ZZZ"])
+    tail.loc[tail.index[0], "country"] = "ZZZ"
+    merged = AnalyticsCubes(head).add_rows(tail, df)
+    rebuilt = AnalyticsCubes(pd.concat([head, tail], ignore_index=True))
+    query = {"filters": {"country": ["ZZZ", "PRT"]}, "group_by": ["country", "hotel"]}
+    assert merged.query(**query)["rows"] == pytest.approx(rebuilt.query(**query)["rows"])
+    assert merged.query(**query)["rows"][-1]["country"] == "ZZZ"
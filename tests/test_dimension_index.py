@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_bookings
+from src.analytics.dimension_index import DimensionIndex, KeywordMatcher, MONTHS, YEARS
+
+def scan_metrics(df, question):
+    # Reference: the per-question table scans the dimension index replaces
+    metrics = {}
+    question_lower = question.lower()
+    if any(term in question_lower for term in ["revenue", "income", "earnings", "money"]):
+        metrics["total_revenue"] = round(df["total_price"].sum(), 2)
+    for month in MONTHS:
+        if month in question_lower:
+            metrics[f"{month}_bookings"] = len(df[df["arrival_date_month"].str.lower() == month])
+    for year in YEARS:
+        if year in question_lower:
+            metrics[f"year_{year}_bookings"] = len(df[df["arrival_date_year"] == int(year)])
+    for country in df["country"].unique():
+        if str(country).lower() in question_lower:
+            country_data = df[df["country"] == country]
+            metrics[f"{country}_bookings"] = len(country_data)
+            metrics[f"{country}_revenue"] = round(country_data["total_price"].sum(), 2)
+            metrics[f"{country}_cancellation_rate"] = round(country_data["is_canceled"].mean() * 100, 2)
+    if len(metrics) < 2:
+        metrics["total_bookings"] = len(df)
+        metrics["average_daily_rate"] = round(df["adr"].mean(), 2)
+        metrics["cancellation_rate"] = round(df["is_canceled"].mean() * 100, 2)
+    return metrics
+
+@pytest.mark.parametrize("question", [
+    "Show me total revenue for July 2017",
+    "How many bookings from PRT and GBR in August 2016?",
+    "What is the cancellation rate in Spain (ESP)?",
+    "What is the average price of a hotel booking?",
+    "Income from DEU, FRA and ITA in 2015 and 2019",
+])
+def test_extract_metrics_matches_table_scan(question):
+    df = make_bookings(3000, seed=3)
+    metrics = DimensionIndex(df).extract_metrics(question)
+    expected = scan_metrics(df, question)
+    assert list(metrics) == list(expected)
+    assert metrics == pytest.approx(expected)
+
+def test_keyword_matcher_finds_overlapping_substrings():
+    matcher = KeywordMatcher(["he", "she", "his", "hers", "usa"])
+    assert matcher.find("ushers") == {"she", "he", "hers"}
+    assert matcher.find("casual") == set()
+    assert matcher.find("") == set()
+
+def test_add_rows_matches_rebuilt_index():
+    df = make_bookings(2000, seed=7)
+    head, tail = df.iloc[:1500], df.iloc[1500:].copy()
+    tail.loc[tail.index[0], 'country'] = 'ZZZ'
+    merged = DimensionIndex(head).add_rows(tail)
+    rebuilt = DimensionIndex(pd.concat([head, tail]))
+    question = "Revenue from ZZZ and PRT in March 2016"
+    assert merged.extract_metrics(question) == pytest.approx(rebuilt.extract_metrics(question))
+    assert "ZZZ_bookings" in merged.extract_metrics(question)
+
+def test_extract_filters_needs_whole_words():
+    index = DimensionIndex(make_bookings(2000, seed=7))
+    filters = index.extract_filters("Revenue from PRT and GBR in July 2017")
+    assert sorted(filters.pop("country")) == ["GBR", "PRT"]
+    assert filters == {"arrival_date_month": ["July"], "arrival_date_year": [2017]}
+    # "prt" inside another word is not a country filter
+    assert index.extract_filters("Which locations had the most cancellations in the airport?") == {}
@@ -0,0 +1,40 @@
+import zlib
+import numpy as np
+import pytest
+from src.analytics.embedding_engine import EmbeddingConfig, EmbeddingEngine
+
+class HashModel:
+    def encode(self, texts, batch_size=32):
+        return np.stack([np.random.default_rng(zlib.crc32(t.encode())).standard_normal(8) for t in texts])
+
+def hash_loader(model_name, backend, onnx_file, threads):
+    # Module level, so spawned workers can unpickle it
+    return HashModel()
+
+TEXTS = [f"Booking {i} from PRT" for i in range(250)]
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_sharded_encoding_matches_single_call(processes):
+    progress = []
+    engine = EmbeddingEngine("hash-test", EmbeddingConfig(processes=processes, chunk_size=64),
+                             progress=lambda done, total: progress.append((done, total)), loader=hash_loader)
+    embeddings = engine.encode(TEXTS)
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(embeddings, HashModel().encode(TEXTS), rtol=1e-6)
+    # One report per chunk; chunks may finish out of order across workers
+    assert len(progress) == 4 and progress[-1] == (250, 250)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        EmbeddingConfig(backend="tensorrt")
+
+def test_onnx_backend_matches_torch():
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("optimum.onnxruntime")
+    from src import config
+    texts = TEXTS[:32] + ["Booking from GBR at the Resort Hotel in August 2016 for 7 nights. Booking was canceled."]
+    torch_embeddings = EmbeddingEngine(config.EMBEDDING_MODEL_NAME, EmbeddingConfig(backend="torch")).encode(texts)
+    onnx_embeddings = EmbeddingEngine(config.EMBEDDING_MODEL_NAME, EmbeddingConfig(backend="onnx")).encode(texts)
+    # The default export is float32, so only operator-level rounding differs
+    np.testing.assert_allclose(onnx_embeddings, torch_embeddings, rtol=1e-3, atol=1e-4)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from src.analytics.faiss_indexes import INDEX_TYPES, IndexConfig, build_index, search_subset, set_search_params
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_index_types_find_exact_matches(index_type):
+    embeddings = np.random.RandomState(0).rand(2000, 32).astype("float32")
+    index = build_index(embeddings, IndexConfig(index_type=index_type, pq_m=8))
+    set_search_params(index, nprobe=64, ef_search=128)
+    assert index.ntotal == len(embeddings)
+    _, ids = index.search(embeddings[:10], 1)
+    if index_type != "ivf_pq":
+        # Only PQ is lossy enough to miss an exact match
+        assert ids[:, 0].tolist() == list(range(10))
+
+def test_unknown_index_type_is_rejected():
+    with pytest.raises(ValueError):
+        IndexConfig(index_type="annoy")
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("exact_max_rows", [0, 10_000])
+def test_search_subset_only_returns_selected_ids(index_type, exact_max_rows):
+    embeddings = np.random.RandomState(1).rand(2000, 32).astype("float32")
+    index = build_index(embeddings, IndexConfig(index_type=index_type, pq_m=8))
+    set_search_params(index, nprobe=64, ef_search=128)
+    ids = np.arange(0, 2000, 7, dtype=np.int64)
+    distances, labels = search_subset(index, embeddings, embeddings[[7, 8]], 5, ids, exact_max_rows=exact_max_rows)
+    assert set(labels[labels >= 0].tolist()) <= set(ids.tolist())
+    if index_type != "ivf_pq":
+        assert labels[0, 0] == 7
+    # Exact search over the slice agrees with brute force
+    if exact_max_rows:
+        expected = ids[np.argsort(((embeddings[ids] - embeddings[8]) ** 2).sum(1))[:5]]
+        assert labels[1].tolist() == expected.tolist()
+
+def test_search_subset_pads_small_slices():
+    embeddings = np.random.RandomState(2).rand(100, 8).astype("float32")
+    index = build_index(embeddings)
+    distances, labels = search_subset(index, embeddings, embeddings[:1], 4, np.array([3, 50], dtype=np.int64))
+    assert labels[0, 2:].tolist() == [-1, -1]
+    assert sorted(labels[0, :2].tolist()) == [3, 50]
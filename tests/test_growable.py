@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_bookings
+from src.analytics.growable import GrowableArray, GrowableFrame
+
+def test_views_handed_out_are_not_changed_by_appends():
+    array = GrowableArray(np.arange(4))
+    first = array.extend(4, [4, 5])
+    second = array.extend(6, [6])
+    assert first.tolist() == [0, 1, 2, 3, 4, 5]
+    assert second.tolist() == list(range(7))
+    # Capacity doubles, so the next appends write into the same buffer
+    assert np.shares_memory(first, second)
+
+    # Rows written after a view that was never published are overwritten
+    array.extend(7, [100, 101])
+    assert array.extend(7, [7]).tolist() == list(range(8))
+
+def test_read_only_arrays_are_copied_before_writing():
+    initial = np.arange(3)
+    initial.flags.writeable = False
+    assert GrowableArray(initial).extend(3, [3]).tolist() == [0, 1, 2, 3]
+    assert initial.tolist() == [0, 1, 2]
+
+def test_frame_matches_concat():
+    df = make_bookings(300, seed=4)
+    df["hotel"] = df["hotel"].astype("category")
+    current = df.iloc[:100].reset_index(drop=True)
+    frame = GrowableFrame(current)
+    for start, stop in ((100, 150), (150, 151), (151, 300)):
+        rows = df.iloc[start:stop].reset_index(drop=True)
+        current = frame.extend(current, rows)
+    pd.testing.assert_frame_equal(current, df.reset_index(drop=True), check_categorical=False)
+
+def test_new_categories_keep_existing_codes():
+    df = pd.DataFrame({"country": pd.Categorical(["PRT", "GBR", "PRT"]), "adr": [1.0, 2.0, 3.0]})
+    frame = GrowableFrame(df)
+    rows = pd.DataFrame({"country": ["AUT", "GBR"], "adr": [4.0, 5.0]})
+    data = frame.extend(df, rows)
+    assert data["country"].tolist() == ["PRT", "GBR", "PRT", "AUT", "GBR"]
+    assert data["country"].cat.categories.tolist() == ["GBR", "PRT", "AUT"]
+    assert (data["country"].cat.codes[:3].to_numpy() == df["country"].cat.codes.to_numpy()).all()
+    # The published frame is unchanged by the next append
+    frame.extend(data, rows)
+    assert data["country"].tolist() == ["PRT", "GBR", "PRT", "AUT", "GBR"]
+
+def test_columns_that_need_a_wider_dtype_are_converted():
+    df = pd.DataFrame({"children": np.array([0, 1], dtype=np.int64)})
+    data = GrowableFrame(df).extend(df, pd.DataFrame({"children": [np.nan]}))
+    assert data["children"].dtype == np.float64
+    assert data["children"].iloc[:2].tolist() == [0.0, 1.0] and np.isnan(data["children"].iloc[2])
@@ -0,0 +1,39 @@
+import faiss
+import numpy as np
+from src.analytics.index_cache import compute_cache_key, load_index_cache, save_index_cache
+
+def _build(n=20, dim=8):
+    embeddings = np.random.RandomState(0).rand(n, dim).astype("float32")
+    index = faiss.IndexFlatL2(dim)
+    index.add(embeddings)
+    return embeddings, index
+
+def test_cache_key_depends_on_texts_and_model():
+    key = compute_cache_key(["a", "b"], "model-a")
+    assert key == compute_cache_key(["a", "b"], "model-a")
+    assert key != compute_cache_key(["a", "c"], "model-a")
+    assert key != compute_cache_key(["a", "b"], "model-b")
+    # Text boundaries are part of the key
+    assert compute_cache_key(["ab", "c"], "m") != compute_cache_key(["a", "bc"], "m")
+
+def test_cache_round_trip(tmp_path):
+    texts = [f"text {i}" for i in range(20)]
+    embeddings, index = _build()
+    key = compute_cache_key(texts, "model-a")
+    assert load_index_cache(str(tmp_path), key) is None
+
+    save_index_cache(str(tmp_path), key, "model-a", texts, embeddings, index)
+    entry = load_index_cache(str(tmp_path), key, load_texts=True)
+    assert entry is not None
+    assert entry["texts"] == texts
+    assert np.array_equal(entry["embeddings"], embeddings)
+    assert entry["index"].ntotal == len(texts)
+
+def test_new_entry_prunes_stale_entries(tmp_path):
+    embeddings, index = _build()
+    old_key = compute_cache_key(["old"], "model-a")
+    new_key = compute_cache_key(["new"], "model-a")
+    save_index_cache(str(tmp_path), old_key, "model-a", ["old"] * 20, embeddings, index)
+    save_index_cache(str(tmp_path), new_key, "model-a", ["new"] * 20, embeddings, index)
+    assert load_index_cache(str(tmp_path), old_key) is None
+    assert load_index_cache(str(tmp_path), new_key) is not None
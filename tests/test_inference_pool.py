@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.analytics.inference_pool import DeadlineExceededError, InferencePool, PoolFullError
+
+def test_concurrency_limit_and_queue_bound():
+    pool = InferencePool(max_concurrency=1, max_queue=1, timeout=5)
+    release = threading.Event()
+    running = pool.submit(release.wait)
+    # Wait until the first call holds the only slot
+    while pool.stats()["active"] == 0:
+        pass
+    queued = pool.submit(lambda: "second")
+    with pytest.raises(PoolFullError) as error:
+        pool.submit(lambda: "third")
+    assert error.value.retry_after >= 1
+    stats = pool.stats()
+    assert (stats["active"], stats["queued"], stats["rejected"]) == (1, 1, 1)
+    release.set()
+    assert running.result(timeout=5) is True and queued.result(timeout=5) == "second"
+    stats = pool.stats()
+    assert (stats["active"], stats["queued"], stats["completed"]) == (0, 0, 2)
+    pool.shutdown()
+
+def test_queued_request_expires_at_its_deadline():
+    pool = InferencePool(max_concurrency=1, max_queue=4, timeout=5)
+    release = threading.Event()
+    pool.submit(release.wait)
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(pool.run(lambda: "late", timeout=0.05))
+    with pytest.raises(DeadlineExceededError):
+        pool.acquire(timeout=0.05)
+    release.set()
+    acquired_at = pool.acquire(timeout=5)
+    pool.release(acquired_at)
+    stats = pool.stats()
+    assert (stats["expired"], stats["queued"], stats["active"]) == (2, 0, 0)
+    assert stats["queue_wait_ms"]["max"] > 0
+    pool.shutdown()
+
+def test_expired_waiter_passes_the_freed_slot_on():
+    pool = InferencePool(max_concurrency=1, max_queue=4, timeout=5)
+    holder = pool.acquire()
+    outcomes = {}
+    def _wait(name, timeout):
+        try:
+            pool.release(pool.acquire(timeout=timeout))
+            outcomes[name] = "acquired"
+        except DeadlineExceededError:
+            outcomes[name] = "expired"
+    short = threading.Thread(target=_wait, args=("short", 0.1))
+    short.start()
+    while pool.stats()["queued"] < 1:
+        pass
+    long = threading.Thread(target=_wait, args=("long", 3))
+    long.start()
+    while pool.stats()["queued"] < 2:
+        pass
+    # Free the slot once the first waiter's deadline has passed, so its wakeup is the one wasted
+    with pool._lock:
+        time.sleep(0.3)
+        pool.release(holder)
+    short.join(timeout=5)
+    long.join(timeout=1)
+    assert outcomes == {"short": "expired", "long": "acquired"}
+    pool.shutdown()
+
+def test_async_acquire_waits_on_the_event_loop():
+    pool = InferencePool(max_concurrency=1, max_queue=4, timeout=5)
+    holder = pool.acquire()
+
+    async def _scenario():
+        threads = threading.active_count()
+        waiting = asyncio.ensure_future(pool.acquire_async())
+        cancelled = asyncio.ensure_future(pool.acquire_async())
+        await asyncio.sleep(0.05)
+        assert pool.stats()["queued"] == 2 and not waiting.done()
+        # No thread is parked on the waiters
+        assert threading.active_count() == threads
+
+        # A cancelled waiter gives up its place; the first waiter gets the freed slot
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        threading.Timer(0.05, pool.release, args=(holder,)).start()
+        acquired_at = await asyncio.wait_for(waiting, timeout=5)
+        pool.release(acquired_at)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        # Expiry works as for acquire()
+        holder2 = pool.acquire()
+        with pytest.raises(DeadlineExceededError):
+            await pool.acquire_async(timeout=0.05)
+        pool.release(holder2)
+
+    asyncio.run(_scenario())
+    stats = pool.stats()
+    assert (stats["active"], stats["queued"], stats["expired"], stats["completed"]) == (0, 0, 2, 3)
+    pool.shutdown()
+
+def test_slots_are_handed_out_in_arrival_order():
+    pool = InferencePool(max_concurrency=1, max_queue=4, timeout=5)
+    holder = pool.acquire()
+    order = []
+    def _thread_waiter():
+        acquired_at = pool.acquire()
+        order.append("thread")
+        time.sleep(0.05)
+        pool.release(acquired_at)
+
+    async def _scenario():
+        thread = threading.Thread(target=_thread_waiter)
+        thread.start()
+        while pool.stats()["queued"] < 1:
+            await asyncio.sleep(0.001)
+        waiting = asyncio.ensure_future(pool.acquire_async())
+        while pool.stats()["queued"] < 2:
+            await asyncio.sleep(0.001)
+        pool.release(holder)
+        pool.release(await asyncio.wait_for(waiting, timeout=5))
+        order.append("coroutine")
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    asyncio.run(_scenario())
+    assert order == ["thread", "coroutine"]
+    assert pool.stats()["completed"] == 3
+    pool.shutdown()
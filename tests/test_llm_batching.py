@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+from src.analytics.llm import GenerationScheduler
+
+VOCAB = 128
+EOS = 99
+
+class CountingLM(torch.nn.Module):
+    """
+    Predicts the number of positions the current row attends to, so any misalignment of
+    the padded caches or attention masks shows up in the generated tokens.
+    """
+    device = torch.device("cpu")
+
+    def forward(self, input_ids, attention_mask, position_ids, past_key_values=None, use_cache=True):
+        if hasattr(past_key_values, "to_legacy_cache"):
+            past_key_values = past_key_values.to_legacy_cache()
+        new = input_ids.float()[:, None, :, None]
+        keys = new if past_key_values is None else torch.cat([past_key_values[0][0], new], dim=2)
+        assert keys.shape[2] == attention_mask.shape[1]
+        assert torch.equal(position_ids[:, -1], attention_mask.sum(-1) - 1)
+        logits = torch.zeros(input_ids.shape[0], input_ids.shape[1], VOCAB)
+        logits[torch.arange(input_ids.shape[0]), -1, attention_mask.sum(-1) % VOCAB] = 1.0
+        return SimpleNamespace(logits=logits, past_key_values=((keys, keys.clone()),))
+
+class WordTokenizer:
+    eos_token_id = EOS
+    pad_token_id = None
+
+    def __call__(self, text, **kwargs):
+        return {"input_ids": [1] * len(text.split())}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(str(i) for i in ids if not (skip_special_tokens and i == EOS))
+
+def test_concurrent_prompts_are_batched_and_finish_independently():
+    scheduler = GenerationScheduler(CountingLM(), WordTokenizer(), max_batch_size=3, max_new_tokens=4, do_sample=False)
+    prompts = ["w " * 3, "w " * 5, "w " * 97, "w " * 8, "w " * 2]
+    try:
+        with ThreadPoolExecutor(5) as executor:
+            answers = list(executor.map(scheduler.submit, prompts))
+        # Each answer counts up from its prompt length; the 97-word prompt stops at EOS
+        assert answers == ["3 4 5 6", "5 6 7 8", "97 98", "8 9 10 11", "2 3 4 5"]
+        stats = scheduler.stats()
+        assert stats["requests"] == 5 and stats["tokens"] == 4 * 4 + 3
+        assert stats["max_batch_size"] <= 3
+    finally:
+        scheduler.close()
+
+def test_prompts_share_the_prefix_cache():
+    scheduler = GenerationScheduler(CountingLM(), WordTokenizer(), max_batch_size=4, max_new_tokens=2,
+                                    do_sample=False, prefix="p p p p ")
+    try:
+        with ThreadPoolExecutor(3) as executor:
+            answers = list(executor.map(scheduler.submit, ["w", "w w w", "w w"]))
+        # Every row attends to the four prefix positions as well as its own prompt
+        assert answers == ["5 6", "7 8", "6 7"]
+    finally:
+        scheduler.close()
+
+def test_a_prefix_cache_passed_in_is_not_computed_again():
+    model = CountingLM()
+    ids = torch.ones((1, 4), dtype=torch.long)
+    prefix_cache = model(input_ids=ids, attention_mask=torch.ones_like(ids), position_ids=torch.arange(4)[None, :]).past_key_values
+    calls = []
+    def forward(*args, past_key_values=None, **kwargs):
+        calls.append(past_key_values is not None)
+        return CountingLM.forward(model, *args, past_key_values=past_key_values, **kwargs)
+    model.forward = forward
+    scheduler = GenerationScheduler(model, WordTokenizer(), max_batch_size=4, max_new_tokens=2,
+                                    do_sample=False, prefix="p p p p ", prefix_cache=(ids, prefix_cache))
+    try:
+        with ThreadPoolExecutor(3) as executor:
+            answers = list(executor.map(scheduler.submit, ["w", "w w w", "w w"]))
+        assert answers == ["5 6", "7 8", "6 7"]
+        # Every forward pass starts from a cache; none of them encodes the prefix
+        assert calls and all(calls)
+    finally:
+        scheduler.close()
@@ -0,0 +1,121 @@
+import copy
+import zlib
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+from src import config
+from src.analytics import llm
+from src.analytics.prompting import PROMPT_PREFIX
+from src.analytics.vector_store import VectorStore
+
+VOCAB = 64
+EOS = VOCAB - 1
+
+class WordTokenizer:
+    """One token per whitespace-separated word, so the prefix and body tokenize independently."""
+    eos_token_id = EOS
+    pad_token_id = None
+
+    def __call__(self, text, add_special_tokens=True, return_tensors=None):
+        ids = [zlib.crc32(word.encode()) % (VOCAB - 1) for word in text.split()]
+        return {"input_ids": torch.tensor([ids]) if return_tensors == "pt" else ids}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(str(int(i)) for i in ids if not (skip_special_tokens and int(i) == EOS))
+
+def _tiny_lm():
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=VOCAB, n_positions=256, n_embd=32, n_layer=2, n_head=2,
+                                     eos_token_id=EOS, bos_token_id=EOS)
+    return transformers.GPT2LMHeadModel(config).eval()
+
+def _reasoner(monkeypatch, model, **kwargs):
+    # Skip the download: the tokenizer and weights are the small local ones above
+    monkeypatch.setattr(llm.AutoTokenizer, "from_pretrained", lambda name, **_: WordTokenizer())
+    monkeypatch.setattr(llm.LLMReasoner, "_load_model", lambda self, name: model)
+    return llm.LLMReasoner(model_name="tiny", device="cpu", **kwargs)
+
+def test_cached_prefix_matches_the_full_prompt(monkeypatch):
+    model = _tiny_lm()
+    reasoner = _reasoner(monkeypatch, model)
+    body = "Question: what was the revenue in July 2017 ? Context: bookings from PRT Answer:"
+    full_ids = WordTokenizer()(PROMPT_PREFIX + body, return_tensors="pt")["input_ids"]
+    inputs = reasoner._prefixed_inputs(body)
+    assert torch.equal(inputs["input_ids"], full_ids)
+
+    # The body's logits on top of the cached prefix are those of the full prompt
+    body_ids = full_ids[:, reasoner._prefix_ids.shape[1]:]
+    with torch.no_grad():
+        full_logits = model(input_ids=full_ids).logits[:, -body_ids.shape[1]:]
+        cached_logits = model(input_ids=body_ids, past_key_values=copy.deepcopy(reasoner._prefix_cache),
+                              attention_mask=inputs["attention_mask"]).logits
+    assert torch.allclose(cached_logits, full_logits, atol=1e-5)
+
+    # Greedy generation from the cached prefix produces the same tokens, and leaves the
+    # cached prefix untouched for the next request
+    settings = {"max_new_tokens": 12, "do_sample": False, "pad_token_id": EOS}
+    with torch.inference_mode():
+        expected = model.generate(input_ids=full_ids, attention_mask=torch.ones_like(full_ids), **settings)
+        for _ in range(2):
+            output = model.generate(**reasoner._prefixed_inputs(body), **settings)
+            assert torch.equal(output, expected)
+
+def test_batching_reuses_the_reasoners_prefix_cache(monkeypatch):
+    reasoner = _reasoner(monkeypatch, _tiny_lm())
+    reasoner.enable_batching(2)
+    try:
+        scheduler = reasoner.scheduler
+        assert scheduler._prefix_ids is reasoner._prefix_ids
+        key = llm._to_legacy_cache(reasoner._prefix_cache)[0][0]
+        assert scheduler._prefix_cache[0][0].data_ptr() == key.data_ptr()
+    finally:
+        reasoner.scheduler.close()
+
+@pytest.fixture
+def model_loads(monkeypatch):
+    """Records the dtype of every model load; the loaded model is a single linear layer."""
+    dtypes = []
+    def from_pretrained(name, torch_dtype=None, **kwargs):
+        dtypes.append(torch_dtype)
+        return torch.nn.Sequential(torch.nn.Linear(8, 8))
+    monkeypatch.setattr(llm.AutoTokenizer, "from_pretrained", lambda name, **_: WordTokenizer())
+    monkeypatch.setattr(llm.AutoModelForCausalLM, "from_pretrained", from_pretrained)
+    monkeypatch.setattr(llm.LLMReasoner, "_encode_prefix", lambda self: (None, None))
+    return dtypes
+
+@pytest.mark.parametrize("quantization, device, mode, dtype", [
+    ("none", "cpu", "none", torch.float32),
+    ("bf16", "cpu", "bf16", torch.bfloat16),
+    ("int8", "cpu", "int8", torch.float32),
+    # int8 is CPU only; elsewhere the model loads in half precision without it
+    ("int8", "cuda", "none", torch.float16),
+])
+def test_quantization_modes(model_loads, quantization, device, mode, dtype):
+    reasoner = llm.LLMReasoner(model_name="tiny", device=device, quantization=quantization)
+    assert reasoner.quantization == mode
+    assert model_loads == [dtype]
+    quantized = isinstance(reasoner.model[0], torch.ao.nn.quantized.dynamic.Linear)
+    assert quantized == (mode == "int8")
+
+def test_unknown_quantization_mode_is_rejected_before_loading(model_loads):
+    with pytest.raises(ValueError, match="int4"):
+        llm.LLMReasoner(model_name="tiny", device="cpu", quantization="int4")
+    assert model_loads == []
+
+def test_unknown_quantization_setting_falls_back_to_retrieval_answers(model_loads, monkeypatch):
+    monkeypatch.setattr(config, "LLM_QUANTIZATION", "int4")
+    monkeypatch.setattr(config, "LLM_MODEL_NAME", "tiny-unknown-quantization")
+    store = VectorStore.__new__(VectorStore)
+    store.llm_reasoner = None
+    store._load_llm_reasoner()
+    assert model_loads == []
+    assert store.llm_reasoner("question", ["context"], {}).endswith("Here's the retrieved information instead: context")
+
+def test_reasoner_loads_the_model_named_by_its_registry_key(model_loads, monkeypatch):
+    names = []
+    monkeypatch.setattr(llm.AutoModelForCausalLM, "from_pretrained",
+                        lambda name, **kwargs: names.append(name) or torch.nn.Sequential(torch.nn.Linear(8, 8)))
+    monkeypatch.setattr(config, "LLM_MODEL_NAME", "configured-model")
+    reasoner = VectorStore._create_llm_reasoner("llm:registered-model")
+    assert reasoner.model_name == "registered-model" and names == ["registered-model"]
@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from src.analytics.metrics import MetricsRegistry
+
+def test_histogram_quantiles_use_fixed_buckets():
+    registry = MetricsRegistry("test")
+    histogram = registry.histogram("latency_seconds", "Latency", labelnames=("stage",), buckets=(0.1, 0.2, 0.5, 1.0))
+    for value in [0.05] * 50 + [0.15] * 40 + [0.8] * 9 + [3.0]:
+        histogram.observe(value, stage="search")
+    snapshot = histogram.snapshot(stage="search")
+    assert snapshot["count"] == 100
+    assert 0.0 < snapshot["p50"] <= 0.1
+    assert 0.1 < snapshot["p90"] <= 0.2
+    assert 0.5 < snapshot["p99"] <= 1.0
+    assert histogram.snapshot(stage="other") is None
+
+def test_counters_are_thread_safe_and_rendered_in_prometheus_format():
+    registry = MetricsRegistry("test")
+    counter = registry.counter("questions_total", "Questions", labelnames=("outcome",))
+    histogram = registry.histogram("seconds", "Duration", buckets=(1.0,))
+    registry.gauge("queued", "Queue depth", lambda: 3)
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: counter.inc(outcome="success"), range(1000)))
+    histogram.observe(0.5)
+    histogram.observe(2.0)
+    assert counter.value(outcome="success") == 1000
+    lines = registry.render().splitlines()
+    assert "# TYPE test_questions_total counter" in lines
+    assert 'test_questions_total{outcome="success"} 1000' in lines
+    assert 'test_seconds_bucket{le="1"} 1' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 2' in lines
+    assert "test_seconds_sum 2.5" in lines and "test_seconds_count 2" in lines
+    assert "test_queued 3" in lines
@@ -0,0 +1,32 @@
+import numpy as np
+from benchmarks.synthetic import make_bookings
+from src.analytics.partitions import RowPartitions
+
+def test_select_matches_boolean_mask():
+    df = make_bookings(3000, seed=4)
+    partitions = RowPartitions(df)
+    filters = {"country": ["PRT", "GBR"], "arrival_date_year": [2016], "arrival_date_month": ["July", "August"]}
+    mask = (df["country"].isin(filters["country"]) & (df["arrival_date_year"] == 2016)
+            & df["arrival_date_month"].isin(filters["arrival_date_month"]))
+    assert partitions.select(filters).tolist() == np.flatnonzero(mask.to_numpy()).tolist()
+    assert partitions.select(None) is None
+    assert partitions.select({"country": ["ZZZ"]}).size == 0
+    # Columns that are not partitioned do not restrict the selection
+    assert partitions.select({"meal": ["BB"], "hotel": ["City Hotel"]}).tolist() == \
+        np.flatnonzero((df["hotel"] == "City Hotel").to_numpy()).tolist()
+
+def test_add_rows_offsets_new_row_ids():
+    df = make_bookings(1000, seed=6)
+    merged = RowPartitions(df.iloc[:800]).add_rows(df.iloc[800:])
+    rebuilt = RowPartitions(df)
+    filters = {"country": ["PRT"], "hotel": ["Resort Hotel"]}
+    assert merged.size == 1000
+    assert merged.select(filters).tolist() == rebuilt.select(filters).tolist()
+
+def test_arrays_round_trip():
+    df = make_bookings(500, seed=9)
+    partitions = RowPartitions(df)
+    restored = RowPartitions.from_arrays(partitions.size, partitions.to_arrays())
+    filters = {"country": ["PRT", "ESP"], "arrival_date_year": [2016, 2017]}
+    assert restored.columns == partitions.columns
+    assert restored.select(filters).tolist() == partitions.select(filters).tolist()
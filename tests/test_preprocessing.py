@@ -0,0 +1,18 @@
+import pandas as pd
+from benchmarks.synthetic import make_raw_bookings
+from src.data.preprocessing import clean_bookings, preprocess_data
+from src.data.storage import read_bookings
+
+def test_chunked_parallel_preprocessing_matches_single_pass(tmp_path):
+    raw_path = tmp_path / "raw.csv"
+    make_raw_bookings(5000, seed=6).to_csv(raw_path, index=False)
+    expected = clean_bookings(pd.read_csv(raw_path))
+
+    stats = preprocess_data(str(raw_path), str(tmp_path / "processed"), chunk_size=700, workers=2)
+    assert stats["rows_in"] == 5000
+    assert stats["rows_out"] == len(expected)
+
+    # The CSV is byte-identical to writing the whole cleaned frame at once
+    assert (tmp_path / "processed.csv").read_text() == expected.to_csv(index=False)
+    from_parquet = read_bookings(str(tmp_path / "processed.parquet"))
+    pd.testing.assert_frame_equal(from_parquet.astype(object), expected.reset_index(drop=True).astype(object))
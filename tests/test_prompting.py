@@ -0,0 +1,26 @@
+from src.analytics.prompting import PROMPT_SUFFIX, PromptBuilder, render_record
+
+class WordTokenizer:
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": text.split()}
+
+RECORD = {"hotel": "City Hotel", "country": "PRT", "arrival_date_month": "July", "arrival_date_year": 2017,
+          "adr": 112.456, "children": float("nan"), "summary": "Booking from PRT ...", "agent": 9.0}
+
+def test_render_record_is_compact():
+    line = render_record(RECORD)
+    assert line == "hotel=City Hotel, country=PRT, arrival_date_month=July, arrival_date_year=2017, adr=112.46"
+
+def test_build_keeps_the_highest_ranked_lines_within_budget():
+    builder = PromptBuilder(WordTokenizer(), max_context_tokens=12)
+    context = ["first passage here", "second passage is much longer than the budget allows " * 2, "third one"]
+    metadata = {"total_revenue": 1000.5, "relevant_records": [RECORD]}
+    prompt = builder.build("What was the revenue?", context, metadata)
+    assert prompt.startswith("Question: What was the revenue?\n\n")
+    assert prompt.endswith(PROMPT_SUFFIX)
+    # Metrics come first, over-long lines are skipped and later lines that fit are kept
+    assert "- total_revenue: 1000.5" in prompt
+    assert "- first passage here" in prompt and "- third one" in prompt
+    assert "second passage" not in prompt and "booking record" not in prompt
+    # The caller's metadata is left untouched
+    assert "relevant_records" in metadata
@@ -0,0 +1,28 @@
+import time
+from src.analytics.resource_sampler import FIELDS, ResourceSampler
+
+def test_latest_samples_on_demand_and_history_is_bounded():
+    sampler = ResourceSampler(interval=60, history_size=3)
+    started = time.perf_counter()
+    latest = sampler.latest()
+    # No interval is waited for, unlike psutil.cpu_percent(interval=...)
+    assert time.perf_counter() - started < 0.05
+    assert set(FIELDS) <= set(latest) and latest["process_rss_mb"] > 0
+    for _ in range(5):
+        sampler.sample()
+    assert len(sampler.history()) == 3
+    assert sampler.latest() is sampler.history()[-1]
+
+def test_background_sampling_and_summary():
+    sampler = ResourceSampler(interval=0.01, history_size=100)
+    sampler.start()
+    try:
+        while len(sampler.history()) < 5:
+            time.sleep(0.01)
+    finally:
+        sampler.stop()
+    summary = sampler.summary()
+    assert summary["samples"] >= 5 and summary["window_seconds"] >= 0
+    rss = summary["process_rss_mb"]
+    assert rss["min"] <= rss["mean"] <= rss["max"]
+    assert sampler.summary(seconds=0)["samples"] <= 1
@@ -0,0 +1,80 @@
+import os
+import zlib
+import faiss
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_bookings
+from src.analytics.faiss_indexes import IndexConfig
+from src.analytics.model_registry import registry
+from src.analytics.shared_artifacts import current_snapshot, load_shared_artifacts, write_shared_artifacts
+from src.analytics.summaries import build_summary_column
+from src.analytics.vector_store import VectorStore
+
+class HashEncoder:
+    def encode(self, texts, **kwargs):
+        return np.stack([np.random.default_rng(zlib.crc32(t.encode())).standard_normal(16) for t in texts])
+
+def _snapshot(tmp_path, n_rows=600, index_config=None):
+    registry.register("test-shared-encoder", HashEncoder())
+    df = make_bookings(n_rows, seed=7)
+    df = pd.concat([df, df.iloc[:100]], ignore_index=True)
+    df["summary"] = build_summary_column(df)
+    source = tmp_path / "bookings.parquet"
+    source.write_bytes(b"processed bookings")
+    store = VectorStore(df, text_column="summary", model_name="test-shared-encoder", index_config=index_config)
+    root = str(tmp_path / "shared")
+    write_shared_artifacts(root, store, "version-1", str(source))
+    return store, root, str(source)
+
+def test_mapped_store_matches_the_built_one(tmp_path):
+    store, root, source = _snapshot(tmp_path)
+    artifacts = load_shared_artifacts(root, "flat", "test-shared-encoder", source_path=source)
+    assert isinstance(artifacts.embeddings, np.memmap) and not artifacts.embeddings.flags.writeable
+    assert artifacts.manifest["data_version"] == "version-1"
+    pd.testing.assert_frame_equal(artifacts.data, store.data.drop(columns=["summary"]))
+    mapped = VectorStore.from_artifacts(artifacts, "test-shared-encoder")
+    assert list(mapped.texts) == store.texts
+    query = store.texts[3]
+    for filters in (None, {"country": ["PRT"]}, {"arrival_date_year": [2016], "hotel": ["City Hotel"]}):
+        assert mapped.query(query, top_k=5, filters=filters) == store.query(query, top_k=5, filters=filters)
+
+def test_stale_or_mismatched_snapshots_are_ignored(tmp_path):
+    _, root, source = _snapshot(tmp_path)
+    assert load_shared_artifacts(root, "hnsw_m32", "test-shared-encoder") is None
+    assert load_shared_artifacts(root, "flat", "other-model") is None
+    with open(source, "ab") as f:
+        f.write(b" changed")
+    assert load_shared_artifacts(root, "flat", "test-shared-encoder", source_path=source) is None
+
+def test_add_rows_copies_on_write(tmp_path):
+    store, root, source = _snapshot(tmp_path)
+    snapshot = current_snapshot(root)
+    before = {name: os.path.getsize(os.path.join(snapshot, name)) for name in os.listdir(snapshot)}
+    mapped = VectorStore.from_artifacts(load_shared_artifacts(root, "flat", "test-shared-encoder"), "test-shared-encoder")
+    rows = make_bookings(50, seed=8)
+    rows = pd.concat([rows, store.data.iloc[:5].drop(columns=["summary"])], ignore_index=True)
+    rows["summary"] = build_summary_column(rows)
+    mapped.add_rows(rows)
+    store.add_rows(rows)
+    assert mapped.index.ntotal == store.index.ntotal == len(mapped.texts)
+    assert mapped.text_ids.tolist() == store.text_ids.tolist()
+    assert mapped.query(rows["summary"][0], top_k=3) == store.query(rows["summary"][0], top_k=3)
+    assert {name: os.path.getsize(os.path.join(snapshot, name)) for name in os.listdir(snapshot)} == before
+
+def test_ivf_inverted_lists_are_mapped(tmp_path):
+    index_config = IndexConfig(index_type="ivf_flat", nlist=8, nprobe=8)
+    store, root, source = _snapshot(tmp_path, index_config=index_config)
+    artifacts = load_shared_artifacts(root, index_config.spec, "test-shared-encoder", source_path=source)
+    invlists = faiss.downcast_InvertedLists(faiss.extract_index_ivf(artifacts.index).invlists)
+    # The codes and ids are read from the mapped snapshot file, not copied into the worker
+    assert isinstance(invlists, faiss.OnDiskInvertedLists)
+    mapped = VectorStore.from_artifacts(artifacts, "test-shared-encoder", index_config)
+    query = store.texts[3]
+    assert mapped.query(query, top_k=5) == store.query(query, top_k=5)
+
+    rows = make_bookings(30, seed=9)
+    rows["summary"] = build_summary_column(rows)
+    mapped.add_rows(rows)
+    store.add_rows(rows)
+    assert mapped.index.ntotal == store.index.ntotal
+    assert mapped.query(rows["summary"][0], top_k=3) == store.query(rows["summary"][0], top_k=3)
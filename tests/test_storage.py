@@ -0,0 +1,24 @@
+import pandas as pd
+from benchmarks.synthetic import make_bookings
+from src.analytics.reports import compute_data_version
+from src.data.storage import ANALYTICS_COLUMNS, read_bookings, write_bookings
+
+def test_parquet_roundtrip_keeps_values_and_categoricals(tmp_path):
+    df = make_bookings(1000, seed=4)
+    path = str(tmp_path / "bookings.parquet")
+    write_bookings(df, path)
+    loaded = read_bookings(path)
+    assert isinstance(loaded['country'].dtype, pd.CategoricalDtype)
+    assert isinstance(loaded['arrival_date_month'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(loaded.astype(object), df.astype(object))
+    # The data version (and so the ETags) does not depend on the storage format
+    assert compute_data_version(loaded) == compute_data_version(df)
+
+def test_projection_and_csv_fallback(tmp_path):
+    df = make_bookings(500, seed=5)
+    df.to_csv(tmp_path / "bookings.csv", index=False)
+    write_bookings(df, str(tmp_path / "other.parquet"))
+    from_csv = read_bookings(str(tmp_path / "bookings.parquet"), columns=ANALYTICS_COLUMNS + ["missing"])
+    from_parquet = read_bookings(str(tmp_path / "other.parquet"), columns=ANALYTICS_COLUMNS)
+    assert list(from_csv.columns) == ANALYTICS_COLUMNS
+    pd.testing.assert_frame_equal(from_csv, from_parquet, check_categorical=False)
@@ -0,0 +1,21 @@
+import numpy as np
+from benchmarks.synthetic import make_bookings
+from src.analytics.summaries import build_summary_column, build_summary_column_rowwise
+
+def test_columnar_summaries_match_rowwise():
+    df = make_bookings(2000, seed=1)
+    # Missing countries and negative zero are formatted exactly like the f-string does
+    df.loc[0, 'country'] = np.nan
+    df.loc[1, 'adr'] = -0.0
+    df = df[df['lead_time'] > 3]
+    expected = build_summary_column_rowwise(df)
+    result = build_summary_column(df, chunk_size=300)
+    assert result.index.equals(expected.index)
+    assert result.tolist() == expected.tolist()
+
+def test_columnar_summaries_with_categoricals():
+    df = make_bookings(500, seed=2)
+    expected = build_summary_column_rowwise(df).tolist()
+    for column in ['country', 'arrival_date_month', 'customer_type', 'reserved_room_type']:
+        df[column] = df[column].astype('category')
+    assert build_summary_column(df).tolist() == expected
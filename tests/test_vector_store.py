@@ -0,0 +1,118 @@
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_bookings
+from src.analytics.model_registry import registry
+from src.analytics.summaries import build_summary_column
+from src.analytics.vector_store import VectorStore
+
+class HashEncoder:
+    """Deterministic pseudo-embeddings, one random vector per distinct text."""
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return np.stack([np.random.default_rng(zlib.crc32(t.encode())).standard_normal(16) for t in texts])
+
+def _store(df, name):
+    encoder = HashEncoder()
+    registry.register(name, encoder)
+    return VectorStore(df, text_column="summary", model_name=name), encoder
+
+def _bookings(n_rows, seed):
+    df = make_bookings(n_rows, seed=seed)
+    df["summary"] = build_summary_column(df)
+    return df
+
+def test_identical_texts_are_embedded_once():
+    base = _bookings(300, seed=1)
+    df = pd.concat([base, base.iloc[:120], base.iloc[:40]], ignore_index=True)
+    store, encoder = _store(df, "test-dedup-encoder")
+    unique = df["summary"].nunique()
+    assert store.index.ntotal == unique == encoder.encoded
+    assert store.row_ids(store.text_ids[5]).tolist() == [5, 305, 425]
+
+    result = store.query(df["summary"][5], top_k=3)[0]
+    assert result["text"] == df["summary"][5]
+    assert (result["index"], result["bookings"]) == (5, 3)
+    texts = [r["text"] for r in store.query(df["summary"][5], top_k=3)]
+    assert len(set(texts)) == 3
+
+def test_filtered_results_point_at_matching_rows():
+    df = _bookings(400, seed=2)
+    df = pd.concat([df, df.assign(hotel=np.where(df["hotel"] == "City Hotel", "Resort Hotel", "City Hotel"))],
+                   ignore_index=True)
+    store, _ = _store(df, "test-dedup-filtered")
+    for result in store.query(df["summary"][0], top_k=5, filters={"hotel": ["Resort Hotel"]}):
+        assert df["hotel"][result["index"]] == "Resort Hotel"
+        assert result["bookings"] == (df.loc[df["summary"] == result["text"], "hotel"] == "Resort Hotel").sum()
+
+def test_add_rows_only_encodes_new_texts():
+    df = _bookings(300, seed=3)
+    store, encoder = _store(df.iloc[:200].reset_index(drop=True), "test-dedup-add")
+    before = encoder.encoded
+    added = pd.concat([df.iloc[:50], df.iloc[200:]], ignore_index=True)
+    store.add_rows(added)
+    new_texts = set(df["summary"][200:]) - set(df["summary"][:200])
+    assert encoder.encoded - before == len(new_texts)
+    assert store.index.ntotal == df["summary"].nunique()
+    assert store.row_ids(store.text_ids[0]).tolist() == [0, 200]
+    assert len(store.data) == len(store.text_ids) == 350
+
+def test_precomputed_query_embeddings_are_not_encoded_again():
+    df = _bookings(200, seed=3)
+    store, encoder = _store(df, "test-precomputed-encoder")
+    query = df["summary"][7]
+    embedding = encoder.encode([query])[0]
+    encoded = encoder.encoded
+    assert store.query(query, top_k=1, query_embedding=embedding)[0]["index"] == 7
+    assert encoder.encoded == encoded
+
+    # Through the batcher, only the queries without an embedding are encoded
+    store.enable_batching(window_ms=50, max_batch_size=4)
+    try:
+        with ThreadPoolExecutor(2) as executor:
+            with_embedding = executor.submit(store.query, query, 1, None, embedding)
+            without = executor.submit(store.query, df["summary"][9], 1)
+            assert with_embedding.result(timeout=10)[0]["index"] == 7
+            assert without.result(timeout=10)[0]["index"] == 9
+        assert encoder.encoded == encoded + 1
+    finally:
+        store.batcher.close()
+
+def test_repeated_appends_match_a_store_built_at_once():
+    df = _bookings(400, seed=5)
+    df = pd.concat([df, df.iloc[:60]], ignore_index=True)
+    store, encoder = _store(df.iloc[:100].reset_index(drop=True), "test-incremental-add")
+    for start in range(100, len(df), 30):
+        store.add_rows(df.iloc[start:start + 30].reset_index(drop=True))
+    built, _ = _store(df, "test-incremental-built")
+    assert encoder.encoded == df["summary"].nunique()
+    assert store.texts == built.texts
+    for text_id in range(len(built.texts)):
+        assert store.row_ids(text_id).tolist() == built.row_ids(text_id).tolist()
+    order, offsets = store.row_map()
+    assert (order == built._row_order).all() and (offsets == built._row_offsets).all()
+    pd.testing.assert_frame_equal(store.data, df, check_categorical=False)
+
+def test_prepared_rows_are_invisible_until_committed():
+    df = _bookings(300, seed=6)
+    store, _ = _store(df.iloc[:200].reset_index(drop=True), "test-prepare-commit")
+    added = df.iloc[200:].reset_index(drop=True)
+    texts = store.index.ntotal
+    pending = store.prepare_rows(added)
+    assert len(store.text_ids) == len(store.data) == 200
+    assert store.index.ntotal == len(store.texts) == texts
+    store.commit_rows(pending)
+    assert len(store.text_ids) == len(store.data) == 300
+    assert store.query(added["summary"][0], top_k=1)[0]["text"] == added["summary"][0]
+
+    # Rows prepared before another append are rejected
+    stale = store.prepare_rows(added.iloc[:10])
+    store.add_rows(added.iloc[10:20])
+    with pytest.raises(RuntimeError):
+        store.commit_rows(stale)
+    assert len(store.text_ids) == 310